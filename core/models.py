@@ -176,6 +176,8 @@ class FileReference(models.Model):
 
     #Size (in bytes)
     size = models.PositiveBigIntegerField()
+    #SHA-256 of the file content, computed while the upload is streamed
+    checksum = models.CharField(max_length=64, blank=True, default='')
     #Upload Date
     upload_date = models.DateTimeField(auto_now_add=True)
 
@@ -190,18 +192,28 @@ class FileReference(models.Model):
         choices=UploadStatus.choices,
         default=UploadStatus.PENDING
     )
+    #Bytes already written to the storage provider, updated while a background transfer is running
+    uploaded_bytes = models.PositiveBigIntegerField(default=0)
 
     #File Type (ENUM)
     class FileType(models.IntegerChoices):
         EVENT_FILE = 1, 'Event File'
         PREDICTION_FILE = 2, 'Prediction File'
+        EVENT_SEGMENT = 3, 'Event Segment'
 
     file_type = models.IntegerField(
         choices=FileType.choices,
         default=FileType.EVENT_FILE
     )
 
-    is_selected = models.BooleanField(default=False)
+    #The stored content of the file, shared by every FileReference with the same bytes (null for legacy files)
+    blob = models.ForeignKey(
+        'StoredBlob',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='file_references'
+    )
 
     def __str__(self):
         """
@@ -209,6 +221,45 @@ class FileReference(models.Model):
          """
         return f"{self.file_name} ({self.get_file_type_display()})"
 
+class StoredBlob(models.Model):
+    """
+    Content-addressed file content in a storage provider.
+    Identical bytes are stored once per provider, keyed by their SHA-256, and shared by all
+    FileReferences pointing at them. The content is deleted when the last reference is released.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    #SHA-256 of the content, also used to build its storage key
+    sha256 = models.CharField(max_length=64)
+    storage_provider = models.IntegerField(choices=FileReference.StorageProvider.choices)
+    #Key of the content inside the storage provider (relative path / object key)
+    storage_key = models.CharField(max_length=255)
+    #The URL where the content is stored
+    url = models.URLField(max_length=500)
+    #Size of the original content (in bytes)
+    size = models.PositiveBigIntegerField()
+
+    #Codec the content is compressed with at rest (ENUM)
+    class Compression(models.IntegerChoices):
+        NONE = 1, 'None'
+        GZIP = 2, 'gzip'
+        ZSTD = 3, 'zstd'
+
+    compression = models.IntegerField(
+        choices=Compression.choices,
+        default=Compression.NONE
+    )
+    #Size of the content as stored in the provider, after compression (in bytes)
+    stored_size = models.PositiveBigIntegerField(default=0)
+    #Number of FileReferences using this content
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('sha256', 'storage_provider')
+
+    def __str__(self):
+        return f"{self.sha256} ({self.get_storage_provider_display()}, {self.ref_count} references)"
+
 class EventSystem(models.Model):
     #A CharField for the name of the EventSystem.
     name = models.CharField(max_length=255)
@@ -217,7 +268,7 @@ class EventSystem(models.Model):
     id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
 
     #A many-to-many relationship with the FileReference model to allow multiple file associations.
-    file_objects = models.ManyToManyField(FileReference, related_name='event_systems')
+    file_objects = models.ManyToManyField(FileReference, through='EventSystemFile', related_name='event_systems')
 
     class EventStatus(models.IntegerChoices):
         ACTIVE = 1, 'Active'
@@ -241,9 +292,246 @@ class EventSystem(models.Model):
         related_name='event_systems_user'  # Unique related name
     )
 
+    #Upload quotas, null falls back to EVENT_SYSTEM_MAX_STORAGE_BYTES / EVENT_SYSTEM_MAX_FILES (no limit when unset)
+    max_storage_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    max_files = models.PositiveIntegerField(null=True, blank=True)
+
     def __str__(self):
         return self.name
 
+class EventSystemFile(models.Model):
+    """
+    A file of an EventSystem, with what depends on the event system it belongs to (its selection).
+    The file name and upload date are copied from the FileReference, so that name conflict checks,
+    selection queries and file listings of an event system are scans of a single index of this table.
+    """
+
+    event_system = models.ForeignKey(EventSystem, on_delete=models.CASCADE, related_name='file_links')
+    file_reference = models.ForeignKey(FileReference, on_delete=models.CASCADE, related_name='event_system_links')
+
+    #Copy of FileReference.file_name, unique inside an event system
+    file_name = models.CharField(max_length=255)
+    #Copy of FileReference.upload_date
+    upload_date = models.DateTimeField(default=timezone.now)
+    #Whether the file is selected in this event system
+    is_selected = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event_system', 'file_reference'], name='eventsystemfile_file_uniq'),
+            # Also serves name lookups and listings sorted by name
+            models.UniqueConstraint(fields=['event_system', 'file_name'], name='eventsystemfile_name_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['event_system', 'is_selected'], name='eventsystemfile_selected_idx'),
+            # Keyset pagination of file lists sorted by date
+            models.Index(fields=['event_system', 'upload_date', 'id'], name='eventsystemfile_date_idx'),
+            # name_prefix filters (LIKE 'prefix%') on PostgreSQL, whatever the collation of the database
+            models.Index(
+                fields=['event_system', 'file_name'],
+                name='eventsystemfile_prefix_idx',
+                opclasses=['uuid_ops', 'varchar_pattern_ops']
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} in {self.event_system_id}"
+
+class EventSystemUsage(models.Model):
+    """
+    Storage used by the files of an EventSystem, kept up to date as files are added, deleted and selected
+    so that usage and quota checks never have to aggregate the files.
+    """
+
+    event_system = models.OneToOneField(
+        EventSystem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='usage'
+    )
+
+    #Number of files (whatever their upload status), event segments excepted
+    file_count = models.PositiveIntegerField(default=0)
+    #Size of all files (in bytes), event segments excepted
+    total_bytes = models.PositiveBigIntegerField(default=0)
+    #Size of the files of each FileType (in bytes)
+    event_file_bytes = models.PositiveBigIntegerField(default=0)
+    prediction_file_bytes = models.PositiveBigIntegerField(default=0)
+    event_segment_bytes = models.PositiveBigIntegerField(default=0)
+    #Number of selected files
+    selected_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Usage of {self.event_system_id}: {self.file_count} files, {self.total_bytes} bytes"
+
+class EventSegment(models.Model):
+    """
+    A segment of the columnar event store of an EventSystem: parsed events of one event file, sorted by time
+    and stored column by column in a FileReference of type EVENT_SEGMENT (see file_manager.parsing.columnar),
+    which is not linked to the EventSystem as one of its files.
+    Its statistics let jobs skip the segments outside the time range they read without opening them.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_system = models.ForeignKey(EventSystem, on_delete=models.CASCADE, related_name='event_segments')
+    #The stored segment
+    file_reference = models.OneToOneField(FileReference, on_delete=models.CASCADE, related_name='event_segment')
+    #The event file the events were parsed from
+    source_file = models.ForeignKey(FileReference, on_delete=models.CASCADE, related_name='derived_segments')
+    #Position of the segment among the segments of its source file
+    sequence = models.PositiveIntegerField()
+
+    #Number of events
+    row_count = models.PositiveIntegerField()
+    #Time range of the events (null when none of them has a timestamp)
+    min_timestamp = models.DateTimeField(null=True, blank=True)
+    max_timestamp = models.DateTimeField(null=True, blank=True)
+    #Range of the line numbers of the events in the source file
+    min_line_number = models.PositiveBigIntegerField(null=True, blank=True)
+    max_line_number = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # A file shared between event systems has segments in each of them
+            models.UniqueConstraint(
+                fields=['event_system', 'source_file', 'sequence'], name='eventsegment_source_seq_uniq'
+            ),
+        ]
+        indexes = [
+            # Segments overlapping a time range: WHERE min_timestamp < end AND max_timestamp >= start
+            models.Index(fields=['event_system', 'min_timestamp', 'max_timestamp'], name='eventsegment_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"Segment {self.sequence} of {self.source_file_id} ({self.row_count} events)"
+
+class UploadSession(models.Model):
+    """
+    A resumable upload of a single file into an EventSystem.
+    The file is sent as numbered chunks (in any order, possibly in parallel) which are
+    staged on local disk and assembled into the final file when the session is committed.
+    """
+
+    class SessionStatus(models.IntegerChoices):
+        ACTIVE = 1, 'Active'
+        COMMITTED = 2, 'Committed'
+        ABORTED = 3, 'Aborted'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    event_system = models.ForeignKey(
+        EventSystem,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+
+    # The file being uploaded, kept PENDING/PROCESSING until the session is committed
+    file_reference = models.OneToOneField(
+        FileReference,
+        on_delete=models.CASCADE,
+        related_name='upload_session'
+    )
+
+    user = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    total_chunks = models.PositiveIntegerField()
+
+    status = models.IntegerField(
+        choices=SessionStatus.choices,
+        default=SessionStatus.ACTIVE
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Upload session {self.id} ({self.get_status_display()})"
+
+class UploadChunk(models.Model):
+    """A chunk received for an UploadSession."""
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks'
+    )
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('session', 'index')
+
+    def __str__(self):
+        return f"Chunk {self.index} of {self.session_id}"
+
+class DirectUpload(models.Model):
+    """
+    A file the client uploads straight to S3 through presigned URLs.
+    The object is written under a temporary key; once its size and checksum are verified it is moved
+    to its content-addressed blob and the FileReference is created.
+    """
+
+    class DirectUploadStatus(models.IntegerChoices):
+        ACTIVE = 1, 'Active'
+        VERIFYING = 2, 'Verifying'
+        COMPLETE = 3, 'Complete'
+        FAILED = 4, 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    event_system = models.ForeignKey(
+        EventSystem,
+        on_delete=models.CASCADE,
+        related_name='direct_uploads'
+    )
+
+    user = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='direct_uploads'
+    )
+
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    #SHA-256 declared by the client, verified before the file is registered
+    checksum = models.CharField(max_length=64)
+
+    #Temporary object key the client uploads to
+    storage_key = models.CharField(max_length=255)
+    #S3 multipart upload id, empty for single PUT uploads
+    multipart_upload_id = models.CharField(max_length=255, blank=True, default='')
+    part_size = models.PositiveBigIntegerField(default=0)
+
+    #The file created once the upload is verified
+    file_reference = models.OneToOneField(
+        FileReference,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='direct_upload'
+    )
+
+    status = models.IntegerField(
+        choices=DirectUploadStatus.choices,
+        default=DirectUploadStatus.ACTIVE
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Direct upload {self.id} of {self.file_name} ({self.get_status_display()})"
+
 class UserToken(models.Model):
     """Model to store user tokens"""
     user = models.ForeignKey(
@@ -433,6 +721,99 @@ class EventSystemConfiguration(models.Model):
     def __str__(self):
         return f"Configuration for {self.event_system.name}"
 
+class PatternProfile(models.Model):
+    """
+    A run of a candidate LogsPattern on a sample of the selected files of an EventSystem, measuring how fast
+    it parses them and how many lines it matches before it is assigned to the event system.
+    """
+
+    class ProfileStatus(models.IntegerChoices):
+        PENDING = 1, 'Pending'
+        RUNNING = 2, 'Running'
+        COMPLETE = 3, 'Complete'
+        FAILED = 4, 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_system = models.ForeignKey(EventSystem, on_delete=models.CASCADE, related_name='pattern_profiles')
+    logs_pattern = models.ForeignKey(LogsPattern, on_delete=models.CASCADE, related_name='profiles')
+    #The user who asked for the profile
+    user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True, related_name='pattern_profiles')
+
+    status = models.IntegerField(
+        choices=ProfileStatus.choices,
+        default=ProfileStatus.PENDING
+    )
+    #Regex engine the pattern was run with (LOG_PATTERN_ENGINE)
+    engine = models.CharField(max_length=10, default='re')
+
+    #The sample: files read and lines parsed (at most LOGS_PATTERN_PROFILE_SAMPLE_LINES)
+    file_count = models.PositiveIntegerField(default=0)
+    line_count = models.PositiveBigIntegerField(default=0)
+    matched_count = models.PositiveBigIntegerField(default=0)
+    #Lines given up on after the time budget of the linear engine
+    timeout_count = models.PositiveBigIntegerField(default=0)
+
+    #Fraction of the lines matched, and lines parsed per second of parsing time
+    match_rate = models.FloatField(null=True, blank=True)
+    lines_per_second = models.FloatField(null=True, blank=True)
+    #Time spent parsing a line (in microseconds)
+    mean_line_microseconds = models.FloatField(null=True, blank=True)
+    p99_line_microseconds = models.FloatField(null=True, blank=True)
+    max_line_microseconds = models.FloatField(null=True, blank=True)
+    #The slowest lines and a few lines the pattern does not match: file, line number, time and (truncated) text
+    worst_lines = models.JSONField(default=list, blank=True)
+    unmatched_lines = models.JSONField(default=list, blank=True)
+
+    #Why the profile failed
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Latest profile of a pattern for an event system
+            models.Index(fields=['event_system', 'logs_pattern', 'created_at'], name='patternprofile_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"Profile of pattern {self.logs_pattern_id} for {self.event_system_id} ({self.get_status_display()})"
+
+class LogTemplate(models.Model):
+    """
+    A template of the lines of an event file, mined automatically (see file_manager.parsing.mining) and proposed
+    as a LogsPattern, with the share of the lines of the file it covers.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_system = models.ForeignKey(EventSystem, on_delete=models.CASCADE, related_name='log_templates')
+    file_reference = models.ForeignKey(FileReference, on_delete=models.CASCADE, related_name='log_templates')
+    #Position among the templates of the file, the most frequent first
+    rank = models.PositiveIntegerField()
+
+    #The template, <*> where the lines differ
+    template = models.TextField()
+    #The proposed LogsPattern
+    pattern = models.CharField(max_length=255)
+    #Whether the end of long messages is only matched by .* to keep the pattern short enough
+    truncated = models.BooleanField(default=False)
+    #Lines of the file matching the template, and their share of all the lines
+    line_count = models.PositiveBigIntegerField()
+    coverage = models.FloatField()
+    #The first line of the template
+    sample_line = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the templates of a file listed by rank
+            models.UniqueConstraint(
+                fields=['event_system', 'file_reference', 'rank'], name='logtemplate_file_rank_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Template {self.rank} of {self.file_reference_id} ({self.coverage:.1%})"
+
 class UserFcmToken(models.Model):
     """ Model for storing Firebase Cloud Messaging (FCM) tokens associated with a user """
 
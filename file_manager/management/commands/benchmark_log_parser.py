@@ -0,0 +1,123 @@
+import os
+import random
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from file_manager.parsing.parallel import parse_file_parallel
+from file_manager.parsing.parser import LogParser
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.streaming import iter_chunks
+
+LEVELS = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARN', 'ERROR']
+MESSAGES = [
+    'Request served in {n} ms',
+    'Connection from 10.0.{n}.1 accepted',
+    'Cache miss for key user:{n}',
+    'Retrying job {n} after timeout',
+    'Disk usage at {n}%',
+]
+
+
+def write_sample_log(destination, size):
+    """Write about `size` bytes of synthetic log lines matched by the default pattern."""
+    written = 0
+    second = 0
+    while written < size:
+        lines = []
+        for _ in range(1000):
+            second += 1
+            line = (
+                f"2024-01-{1 + second // 86400 % 28:02d} {second // 3600 % 24:02d}:{second // 60 % 60:02d}:"
+                f"{second % 60:02d}.{random.randrange(1000):03d} {random.choice(LEVELS)} "
+                f"{random.choice(MESSAGES).format(n=random.randrange(10000))}\n"
+            )
+            lines.append(line)
+        data = ''.join(lines).encode()
+        destination.write(data)
+        written += len(data)
+
+
+def count_events(events):
+    """Parallel consumer sending back only the number of events, so that the parse itself is measured."""
+    return sum(1 for _ in events)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the log parser on a log file (or a generated one): MB/s of wall time and per core "
+        "(CPU time of this single process), lines/s and match rate. With --workers, the file is also parsed in "
+        "byte ranges on pools of processes and the speedup over the first count is reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Log file to parse, a synthetic log is generated when omitted')
+        parser.add_argument('--size-mb', type=int, default=100, help='Size of the generated log')
+        parser.add_argument('--pattern', default='default-log-pattern', help='LogsPattern text or builtin name')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--chunk-size-kb', type=int, default=1024)
+        parser.add_argument('--workers', help='Comma-separated process counts to benchmark in parallel, e.g. 1,2,4,8')
+        parser.add_argument('--range-size-mb', type=int, default=64, help='Bytes parsed per parallel task')
+
+    def handle(self, *args, **options):
+        try:
+            compiled = compile_pattern(options['pattern'])
+            workers = [int(count) for count in options['workers'].split(',')] if options['workers'] else []
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['file']:
+            self.benchmark(options['file'], compiled, options)
+            self.benchmark_parallel(options['file'], compiled, workers, options)
+            return
+
+        with tempfile.NamedTemporaryFile(suffix='.log') as sample:
+            write_sample_log(sample, options['size_mb'] * 1024 * 1024)
+            sample.flush()
+            self.benchmark(sample.name, compiled, options)
+            self.benchmark_parallel(sample.name, compiled, workers, options)
+
+    def benchmark(self, path, compiled, options):
+        parser = LogParser(compiled)
+        events = 0
+        started, cpu_started = time.perf_counter(), time.process_time()
+        with open(path, 'rb') as log_file:
+            for batch in parser.parse_stream(
+                iter_chunks(log_file, options['chunk_size_kb'] * 1024),
+                options['batch_size']
+            ):
+                events += len(batch)
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+        megabytes = os.path.getsize(path) / (1024 * 1024)
+        self.stdout.write(f"Pattern: {compiled.source}")
+        self.stdout.write(f"{'MB':>10} {'lines':>12} {'matched':>8} {'seconds':>9} {'MB/s':>8} {'MB/s/core':>10} {'lines/s':>12}")
+        self.stdout.write(
+            f"{megabytes:>10.1f} {parser.lines:>12} {parser.match_rate:>8.1%} {elapsed:>9.2f} "
+            f"{megabytes / elapsed:>8.1f} {megabytes / cpu if cpu else 0:>10.1f} {parser.lines / elapsed:>12.0f}"
+        )
+
+    def benchmark_parallel(self, path, compiled, workers, options):
+        if not workers:
+            return
+
+        megabytes = os.path.getsize(path) / (1024 * 1024)
+        self.stdout.write(f"Parallel, {os.cpu_count()} cores, ranges of {options['range_size_mb']} MB")
+        self.stdout.write(f"{'workers':>10} {'lines':>12} {'events':>10} {'seconds':>9} {'MB/s':>8} {'speedup':>8}")
+        baseline = None
+        for count in workers:
+            lines = events = 0
+            started = time.perf_counter()
+            for result in parse_file_parallel(
+                path, compiled.source,
+                workers=count,
+                range_size=options['range_size_mb'] * 1024 * 1024,
+                consumer=count_events
+            ):
+                lines += result.lines
+                events += result.value
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{count:>10} {lines:>12} {events:>10} {elapsed:>9.2f} {megabytes / elapsed:>8.1f} "
+                f"{baseline / elapsed:>7.2f}x"
+            )
@@ -0,0 +1,95 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from file_manager.parsing.multi import MultiPatternMatcher
+from file_manager.parsing.patterns import BUILTIN_PATTERNS, compile_pattern
+
+LEVELS = ['DEBUG', 'INFO', 'INFO', 'WARN', 'ERROR']
+
+
+LAYOUTS = [
+    (
+        r'^%{{TIMESTAMP_ISO8601:timestamp}} %{{LOGLEVEL:level}} \[{name}\] %{{WORD:event_type}}: %{{GREEDYDATA:message}}$',
+        '2024-01-01 10:00:{second:02d} {level} [{name}] job: Processed {number} items'
+    ),
+    (
+        r'^%{{TIMESTAMP_ISO8601:timestamp}} {name} pid=%{{INT:pid:int}} %{{LOGLEVEL:level}} %{{GREEDYDATA:message}}$',
+        '2024-01-01T10:00:{second:02d}Z {name} pid={number} {level} Heartbeat'
+    ),
+    (
+        r'^\[%{{HTTPDATE:timestamp}}\] {name}\.%{{JAVACLASS:event_type}} %{{LOGLEVEL:level}} - %{{GREEDYDATA:message}}$',
+        '[10/Oct/2024:13:55:{second:02d} +0200] {name}.com.example.Worker {level} - Timeout after {number} ms'
+    ),
+]
+
+
+def generate_patterns(count):
+    """The builtin patterns, then patterns of the kind users write: a few layouts, each with a service name."""
+    patterns = list(BUILTIN_PATTERNS)
+    index = 0
+    while len(patterns) < count:
+        patterns.append(LAYOUTS[index % len(LAYOUTS)][0].format(name=f'service-{index:04d}'))
+        index += 1
+    return patterns[:count]
+
+
+def generate_lines(count, pattern_count):
+    """Lines written by random services of the generated patterns, and one in ten lines no pattern matches."""
+    services = max(1, pattern_count - len(BUILTIN_PATTERNS))
+    lines = []
+    for number in range(count):
+        if number % 10 == 9:
+            lines.append(f'unstructured output line {number}')
+            continue
+        index = random.randrange(services)
+        lines.append(LAYOUTS[index % len(LAYOUTS)][1].format(
+            name=f'service-{index:04d}', second=number % 60, level=random.choice(LEVELS), number=number
+        ))
+    return lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark MultiPatternMatcher against trying every pattern on every line: lines/s of both, "
+        "patterns actually tried per line, and a check that both find the same first matching pattern."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patterns', type=int, default=150, help='Number of patterns (100+ to be representative)')
+        parser.add_argument('--lines', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        if options['patterns'] < 1 or options['lines'] < 1:
+            raise CommandError("--patterns and --lines must be positive.")
+
+        compiled = [compile_pattern(pattern) for pattern in generate_patterns(options['patterns'])]
+        lines = generate_lines(options['lines'], options['patterns'])
+
+        started = time.perf_counter()
+        expected = [self.first_match(compiled, line) for line in lines]
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matcher = MultiPatternMatcher(compiled)
+        setup = time.perf_counter() - started
+        started = time.perf_counter()
+        found = [matcher.match(line)[0] for line in lines]
+        prefiltered = time.perf_counter() - started
+
+        if found != expected:
+            raise CommandError("The matcher and the sequential scan disagree.")
+
+        tried = sum(len(matcher.candidates(line)) for line in lines) / len(lines)
+        keyed = sum(key is not None for key in matcher.keys)
+        self.stdout.write(f"{len(compiled)} patterns ({keyed} with a required literal), {len(lines)} lines")
+        self.stdout.write(f"{'method':>12} {'seconds':>9} {'lines/s':>12} {'tried/line':>11}")
+        self.stdout.write(f"{'sequential':>12} {sequential:>9.2f} {len(lines) / sequential:>12.0f} {len(compiled):>11}")
+        self.stdout.write(f"{'prefiltered':>12} {prefiltered:>9.2f} {len(lines) / prefiltered:>12.0f} {tried:>11.1f}")
+        self.stdout.write(f"Speedup: {sequential / prefiltered:.1f}x (matcher built in {setup * 1000:.1f} ms)")
+
+    @staticmethod
+    def first_match(compiled, line):
+        for index, pattern in enumerate(compiled):
+            if pattern.regex.match(line) is not None:
+                return index
+        return None
@@ -0,0 +1,98 @@
+import io
+import os
+import tempfile
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from file_manager.storage.s3_client import create_s3_client, get_transfer_config
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark S3 uploads: multipart throughput vs. part size and concurrency, and small-file latency "
+        "with a fresh client per upload vs. the shared pooled client. "
+        "Point --endpoint-url at a local S3-compatible server (e.g. MinIO) to run it without AWS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bucket', default=getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None))
+        parser.add_argument('--endpoint-url', default=getattr(settings, 'AWS_S3_ENDPOINT_URL', None))
+        parser.add_argument('--file-size-mb', type=int, default=256, help='Size of the large test file')
+        parser.add_argument('--part-sizes-mb', type=_int_list, default=[8, 16, 64])
+        parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 10, 20])
+        parser.add_argument('--small-files', type=int, default=100, help='Number of small objects to upload')
+        parser.add_argument('--small-file-kb', type=int, default=16)
+        parser.add_argument('--prefix', default='benchmarks/')
+
+    def handle(self, *args, **options):
+        bucket = options['bucket']
+        if not bucket:
+            raise CommandError("No bucket configured. Pass --bucket or set AWS_STORAGE_BUCKET_NAME.")
+
+        endpoint_url = options['endpoint_url']
+        max_concurrency = max(options['concurrency'])
+        client = create_s3_client(endpoint_url=endpoint_url, max_pool_connections=max_concurrency)
+
+        self.stdout.write(f"Bucket: {bucket}  Endpoint: {endpoint_url or 'AWS'}")
+        self.benchmark_multipart(client, bucket, options)
+        self.benchmark_small_files(client, bucket, endpoint_url, options)
+
+    def benchmark_multipart(self, client, bucket, options):
+        size = options['file_size_mb'] * 1024 * 1024
+        self.stdout.write(f"\nMultipart upload of a {options['file_size_mb']} MB file")
+        self.stdout.write(f"{'part size (MB)':>15} {'concurrency':>12} {'seconds':>10} {'MB/s':>10}")
+
+        with tempfile.NamedTemporaryFile() as source:
+            # Write random data in blocks so the benchmark itself stays memory-bounded
+            block = 8 * 1024 * 1024
+            remaining = size
+            while remaining > 0:
+                source.write(os.urandom(min(block, remaining)))
+                remaining -= block
+            source.flush()
+
+            for part_size_mb in options['part_sizes_mb']:
+                for concurrency in options['concurrency']:
+                    key = f"{options['prefix']}{uuid.uuid4()}"
+                    config = get_transfer_config(
+                        multipart_chunksize=part_size_mb * 1024 * 1024,
+                        max_concurrency=concurrency
+                    )
+                    started = time.perf_counter()
+                    client.upload_file(source.name, bucket, key, Config=config)
+                    elapsed = time.perf_counter() - started
+                    client.delete_object(Bucket=bucket, Key=key)
+
+                    throughput = size / (1024 * 1024) / elapsed
+                    self.stdout.write(f"{part_size_mb:>15} {concurrency:>12} {elapsed:>10.2f} {throughput:>10.1f}")
+
+    def benchmark_small_files(self, shared_client, bucket, endpoint_url, options):
+        count = options['small_files']
+        payload = os.urandom(options['small_file_kb'] * 1024)
+        self.stdout.write(f"\n{count} uploads of {options['small_file_kb']} KB")
+        self.stdout.write(f"{'client':>15} {'total s':>10} {'ms/upload':>10}")
+
+        keys = []
+        for label, make_client in (
+            ('new per upload', lambda: create_s3_client(endpoint_url=endpoint_url)),
+            ('shared', lambda: shared_client),
+        ):
+            started = time.perf_counter()
+            for _ in range(count):
+                key = f"{options['prefix']}{uuid.uuid4()}"
+                make_client().upload_fileobj(io.BytesIO(payload), bucket, key)
+                keys.append(key)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label:>15} {elapsed:>10.2f} {elapsed / count * 1000:>10.1f}")
+
+        # delete_objects accepts at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            shared_client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]]}
+            )
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from file_manager.management.commands.benchmark_pattern_matcher import generate_lines
+from file_manager.parsing.mining import TemplateMiner
+from file_manager.parsing.patterns import compile_pattern
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark TemplateMiner on generated log lines of many services: lines/s and lines/min of a single "
+        "pass, clusters found, and the share of the lines matched by the patterns it proposes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=1000000)
+        parser.add_argument('--services', type=int, default=150, help='Number of services writing the lines')
+        parser.add_argument('--candidates', type=int, default=20, help='Patterns proposed (and checked)')
+
+    def handle(self, *args, **options):
+        if options['lines'] < 1 or options['services'] < 1:
+            raise CommandError("--lines and --services must be positive.")
+
+        lines = generate_lines(options['lines'], options['services'])
+        miner = TemplateMiner()
+        started = time.perf_counter()
+        miner.add_lines(lines)
+        elapsed = time.perf_counter() - started
+
+        candidates = miner.candidates(options['candidates'], max_length=255)
+        regexes = [compile_pattern(candidate.pattern).regex for candidate in candidates]
+        sample = lines[:100000]
+        matched = sum(any(regex.match(line) for regex in regexes) for line in sample)
+
+        self.stdout.write(f"{len(lines)} lines in {elapsed:.2f} s: {len(lines) / elapsed:.0f} lines/s, "
+                          f"{len(lines) / elapsed * 60 / 1000000:.1f}M lines/min")
+        self.stdout.write(f"{miner.cluster_count} clusters, {miner.evicted_lines} lines in evicted clusters")
+        self.stdout.write(f"Top {len(candidates)} patterns cover {sum(c.coverage for c in candidates):.1%} of the lines "
+                          f"(checked: {matched / len(sample):.1%} of the first {len(sample)} lines match one)")
+        for candidate in candidates[:5]:
+            self.stdout.write(f"{candidate.coverage:>7.1%}  {candidate.pattern}")
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.models import FileReference
+from file_manager.services.reconciliation_services import StorageReconciliationService
+
+PROVIDERS = {
+    'local': FileReference.StorageProvider.LOCAL,
+    's3': FileReference.StorageProvider.S3,
+    'scp': FileReference.StorageProvider.SCP,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a storage provider's content with the database: report, quarantine or delete stored objects no "
+        "blob points to and blobs no file points to, and mark files whose content is missing or whose upload "
+        "never finished as failed. The listing is streamed page by page, so it works on very large buckets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', choices=sorted(PROVIDERS), default='local')
+        parser.add_argument(
+            '--action',
+            choices=StorageReconciliationService.ACTIONS,
+            default='report',
+            help="'report' (default) only lists the problems"
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=settings.STORAGE_RECONCILE_GRACE_PERIOD.total_seconds() / 3600,
+            help='Leave content younger than this alone, it may belong to an upload in progress'
+        )
+        parser.add_argument('--page-size', type=int, default=settings.STORAGE_RECONCILE_PAGE_SIZE)
+        parser.add_argument(
+            '--max-deletes-per-second',
+            type=float,
+            default=settings.STORAGE_RECONCILE_MAX_DELETES_PER_SECOND,
+            help='0 disables rate limiting'
+        )
+
+    def handle(self, *args, **options):
+        if options['page_size'] < 1:
+            raise CommandError("--page-size must be at least 1.")
+
+        try:
+            report = StorageReconciliationService.reconcile(
+                PROVIDERS[options['provider']],
+                action=options['action'],
+                grace_period=timedelta(hours=options['grace_hours']),
+                page_size=options['page_size'],
+                max_deletes_per_second=options['max_deletes_per_second']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Storage: {options['provider']}  Action: {options['action']}")
+        for name, count in report.items():
+            self.stdout.write(f"{name.replace('_', ' '):>20} {count:>10}")
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from prometheus_client import Counter
+
+from file_manager.parsing.patterns import compile_pattern
+
+PATTERN_CACHE_HITS = Counter('log_pattern_cache_hits_total', 'Log patterns served already compiled from the cache')
+PATTERN_CACHE_MISSES = Counter('log_pattern_cache_misses_total', 'Log patterns that had to be compiled')
+PATTERN_CACHE_EVICTIONS = Counter('log_pattern_cache_evictions_total', 'Compiled log patterns evicted from the cache')
+
+
+class CompiledPatternCache:
+    """
+    Process-wide LRU cache of CompiledPatterns, keyed by LogsPattern id and SHA-256 of the pattern text
+    (and the engine options it was compiled with).
+
+    A pattern whose text changed has another key, so a stale compilation is never served, even by processes
+    that were not told about the change: it is simply no longer asked for and ages out. Invalidating a pattern
+    (when a pattern or its assignment changes) drops its entries right away. At most `max_size` patterns are
+    kept, the least recently used ones are evicted first. Invalid patterns are not cached, they raise ValueError.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pattern_id, pattern, engine='re', timeout=None):
+        key = (pattern_id, hashlib.sha256(pattern.encode()).hexdigest(), engine, timeout)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if compiled is not None:
+            PATTERN_CACHE_HITS.inc()
+            return compiled
+
+        PATTERN_CACHE_MISSES.inc()
+        # Compiled outside of the lock, two threads may both compile a new pattern once
+        compiled = compile_pattern(pattern, engine, timeout)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                PATTERN_CACHE_EVICTIONS.inc()
+        return compiled
+
+    def invalidate(self, *pattern_ids):
+        """Drop the compiled versions of the given LogsPatterns."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in pattern_ids]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pattern_cache():
+    """Return the process-wide cache of compiled patterns, or None when LOG_PATTERN_CACHE_SIZE is 0."""
+    global _cache
+    max_size = getattr(settings, 'LOG_PATTERN_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+
+    with _cache_lock:
+        if _cache is None or _cache.max_size != max_size:
+            _cache = CompiledPatternCache(max_size)
+        return _cache
+
+
+def engine_options():
+    """Options compiling LogsPatterns with the engine of LOG_PATTERN_ENGINE, see compile_pattern."""
+    return {
+        'engine': getattr(settings, 'LOG_PATTERN_ENGINE', 're'),
+        'timeout': getattr(settings, 'LOG_PATTERN_MATCH_TIMEOUT', None),
+    }
+
+
+def get_compiled_pattern(logs_pattern):
+    """Return the CompiledPattern of a LogsPattern, from the cache when it is enabled."""
+    cache = get_pattern_cache()
+    if cache is None:
+        return compile_pattern(logs_pattern.pattern, **engine_options())
+    return cache.get(logs_pattern.id, logs_pattern.pattern, **engine_options())
+
+
+def invalidate_patterns(*pattern_ids):
+    """Forget the compiled versions of LogsPatterns that were changed, assigned or unassigned."""
+    cache = get_pattern_cache()
+    if cache is not None:
+        cache.invalidate(*[pattern_id for pattern_id in pattern_ids if pattern_id is not None])
@@ -0,0 +1,246 @@
+import array
+import json
+import mmap
+import struct
+import sys
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from file_manager.parsing.parser import LogEvent
+
+# Kept free of Django imports, like the parser: segments can be written and read by any process
+
+MAGIC = b'EVSEG001'
+# Closes a segment: the length of its JSON footer, then MAGIC again
+TRAILER = struct.Struct('<Q8s')
+# Columns start on multiples of 8 bytes, so that they can be mapped as arrays of 64-bit integers
+ALIGNMENT = 8
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Stored for events without a timestamp, which are sorted after all the others
+NULL_TIMESTAMP = 2 ** 63 - 1
+
+# array typecodes of the columns (little-endian on disk): int64 microseconds since the epoch and line numbers,
+# codes into the dictionary of the level and event type columns, and end offsets of the values of string columns
+TIMESTAMP_TYPE = 'q'
+LINE_NUMBER_TYPE = 'q'
+DICTIONARY_TYPES = {'level': 'H', 'event_type': 'I'}
+OFFSET_TYPE = 'Q'
+
+COLUMNS = ('timestamp', 'line_number', 'level', 'event_type', 'message', 'fields')
+
+
+def encode_timestamp(timestamp):
+    return NULL_TIMESTAMP if timestamp is None else (timestamp - EPOCH) // MICROSECOND
+
+
+def decode_timestamp(value):
+    return None if value == NULL_TIMESTAMP else EPOCH + timedelta(microseconds=value)
+
+
+def write_segment(destination, events):
+    """
+    Write LogEvents to a binary file object as a segment, sorted by timestamp, and return its statistics.
+
+    A segment is MAGIC, then one block per column, then a JSON footer describing the columns and holding the
+    statistics, then the TRAILER. Level and event type are dictionary-encoded (the footer holds the values, the
+    column their codes), messages and the other fields (as JSON) are string columns: the UTF-8 values one after
+    the other, preceded by the end offset of each value. Numeric columns are plain little-endian arrays, which
+    can be read in place from a memory map (see Segment), with numpy.frombuffer as well.
+    """
+    events = sorted(events, key=lambda event: encode_timestamp(event.timestamp))
+
+    timestamps = array.array(TIMESTAMP_TYPE, [encode_timestamp(event.timestamp) for event in events])
+    line_numbers = array.array(LINE_NUMBER_TYPE, [event.line_number or 0 for event in events])
+    dictionaries = {}
+    codes = {}
+    for column, typecode in DICTIONARY_TYPES.items():
+        dictionary = {}
+        codes[column] = array.array(typecode, [
+            dictionary.setdefault(value, len(dictionary)) for value in (getattr(event, column) for event in events)
+        ])
+        dictionaries[column] = list(dictionary)
+    messages = [event.message or '' for event in events]
+    fields = [json.dumps(event.fields, default=str) if event.fields else '' for event in events]
+
+    footer_columns = {}
+    position = destination.write(MAGIC)
+
+    def write_block(data):
+        nonlocal position
+        padding = -position % ALIGNMENT
+        destination.write(b'\0' * padding)
+        position += padding
+        offset = position
+        position += destination.write(data)
+        return {'offset': offset, 'length': len(data)}
+
+    def write_array(values):
+        if sys.byteorder == 'big':
+            values = array.array(values.typecode, values)
+            values.byteswap()
+        return write_block(values.tobytes())
+
+    def write_strings(values):
+        data = [value.encode('utf-8') for value in values]
+        offsets = array.array(OFFSET_TYPE, [0])
+        end = 0
+        for value in data:
+            end += len(value)
+            offsets.append(end)
+        return {'offsets': write_array(offsets), 'data': write_block(b''.join(data))}
+
+    footer_columns['timestamp'] = {'type': TIMESTAMP_TYPE, **write_array(timestamps)}
+    footer_columns['line_number'] = {'type': LINE_NUMBER_TYPE, **write_array(line_numbers)}
+    for column, typecode in DICTIONARY_TYPES.items():
+        footer_columns[column] = {'type': typecode, 'dictionary': dictionaries[column], **write_array(codes[column])}
+    footer_columns['message'] = {'type': 'string', **write_strings(messages)}
+    footer_columns['fields'] = {'type': 'json', **write_strings(fields)}
+
+    known_timestamps = [value for value in timestamps if value != NULL_TIMESTAMP]
+    stats = {
+        'rows': len(events),
+        'min_timestamp': known_timestamps[0] if known_timestamps else None,
+        'max_timestamp': known_timestamps[-1] if known_timestamps else None,
+        'min_line_number': min(line_numbers) if events else None,
+        'max_line_number': max(line_numbers) if events else None,
+        'levels': {
+            str(level): count for level, count in zip(dictionaries['level'], _code_counts(codes['level']))
+        },
+    }
+    footer = json.dumps({'version': 1, 'rows': len(events), 'columns': footer_columns, 'stats': stats}).encode()
+    destination.write(footer)
+    destination.write(TRAILER.pack(len(footer), MAGIC))
+    return stats
+
+
+def _code_counts(codes):
+    counts = {}
+    for code in codes:
+        counts[code] = counts.get(code, 0) + 1
+    return [counts[code] for code in sorted(counts)]
+
+
+class StringColumn:
+    """Values of a string column, decoded one at a time from the memory map when they are accessed."""
+
+    def __init__(self, offsets, data, decode=None):
+        self._offsets = offsets
+        self._data = data
+        self._decode = decode
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        value = str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        return self._decode(value) if self._decode else value
+
+
+class Segment:
+    """
+    Read-only access to a segment file through a memory map: opening it only reads the footer, and the pages
+    of a column are loaded by the OS when the column is read, so jobs pay for the columns and rows they use.
+    Use it as a context manager, the values it returns must not be used once it is closed.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._views = []
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            footer_length, magic = TRAILER.unpack_from(self._map, len(self._map) - TRAILER.size)
+            if magic != MAGIC or self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an event segment.")
+            footer_end = len(self._map) - TRAILER.size
+            footer = json.loads(self._map[footer_end - footer_length:footer_end])
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f"{path} is not a valid event segment: {str(e)}")
+
+        self.rows = footer['rows']
+        self.stats = footer['stats']
+        self._columns = footer['columns']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def dictionary(self, column):
+        """Values of a dictionary-encoded column (level, event_type), indexed by their code."""
+        return self._columns[column]['dictionary']
+
+    def column(self, column):
+        """
+        The stored values of a column without copying them: a memoryview of integers for timestamp (see
+        decode_timestamp), line_number and the codes of level and event_type, a StringColumn for message and fields.
+        """
+        description = self._columns[column]
+        if description['type'] in ('string', 'json'):
+            return StringColumn(
+                self._array(description['offsets'], OFFSET_TYPE),
+                self._bytes(description['data']),
+                _decode_fields if description['type'] == 'json' else None
+            )
+        return self._array(description, description['type'])
+
+    def values(self, column, start=0, stop=None):
+        """Decoded values of a column (datetimes, levels, ...) for the rows in [start, stop)."""
+        stop = self.rows if stop is None else stop
+        stored = self.column(column)
+        if column == 'timestamp':
+            return [decode_timestamp(value) for value in stored[start:stop]]
+        if column in DICTIONARY_TYPES:
+            dictionary = self.dictionary(column)
+            return [dictionary[code] for code in stored[start:stop]]
+        return [stored[index] for index in range(start, stop)]
+
+    def time_range(self, start=None, end=None):
+        """Rows [first, stop) of the events in [start, end): a binary search, rows are sorted by timestamp."""
+        timestamps = self.column('timestamp')
+        first = 0 if start is None else bisect_left(timestamps, encode_timestamp(start))
+        stop = bisect_left(timestamps, NULL_TIMESTAMP if end is None else encode_timestamp(end))
+        if end is None and start is None:
+            # Events without a timestamp are only left out when a time range is asked for
+            stop = self.rows
+        return first, max(first, stop)
+
+    def events(self, start=None, end=None):
+        """Yield the LogEvents of the segment in [start, end), in time order."""
+        first, stop = self.time_range(start, end)
+        columns = [self.values(column, first, stop) for column in COLUMNS]
+        for timestamp, line_number, level, event_type, message, fields in zip(*columns):
+            yield LogEvent(line_number, timestamp, level, event_type, message, fields)
+
+    def _bytes(self, block):
+        view = memoryview(self._map)[block['offset']:block['offset'] + block['length']]
+        self._views.append(view)
+        return view
+
+    def _array(self, block, typecode):
+        view = self._bytes(block)
+        if sys.byteorder == 'big':
+            values = array.array(typecode, view)
+            values.byteswap()
+            return values
+        cast = view.cast(typecode)
+        self._views.append(cast)
+        return cast
+
+
+def _decode_fields(value):
+    return json.loads(value) if value else {}
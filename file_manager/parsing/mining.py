@@ -0,0 +1,306 @@
+import re
+from collections import OrderedDict, namedtuple
+
+from file_manager.parsing.patterns import GROK_PATTERNS, expand_grok
+
+# Kept free of Django imports, like the parser: templates can be mined by any process
+
+#A proposed LogsPattern: its pattern, the template it was written from, and the lines of the file it covers
+TemplateCandidate = namedtuple('TemplateCandidate', ['pattern', 'template', 'count', 'coverage', 'sample', 'truncated'])
+
+WILDCARD = '<*>'
+
+# Timestamps at the start of a line are taken out before tokenizing (they span several tokens) and become the
+# `timestamp` of the pattern: (name, grok of the pattern)
+TIMESTAMP_PREFIXES = (
+    ('iso8601', r'%{TIMESTAMP_ISO8601:timestamp}'),
+    ('httpdate', r'\[%{HTTPDATE:timestamp}\]'),
+    ('syslog', r'%{SYSLOGTIMESTAMP:timestamp}'),
+)
+PREFIX_PATTERNS = dict(TIMESTAMP_PREFIXES)
+TIMESTAMP_PREFIX = re.compile(
+    r'(?:' + '|'.join(
+        f'(?P<{name}>{expand_grok(grok.replace(":timestamp", ""))})' for name, grok in TIMESTAMP_PREFIXES
+    ) + r')(?:\s+|$)'
+)
+
+# Classes of the values of a variable token, the first one all the values of a position belong to is used in
+# the pattern: (grok of the pattern, regular expression matching a whole token)
+TOKEN_CLASSES = (
+    (r'%{LOGLEVEL}', GROK_PATTERNS['LOGLEVEL']),
+    (r'\[%{LOGLEVEL}\]', r'\[' + GROK_PATTERNS['LOGLEVEL'] + r'\]'),
+    (r'%{INT}', GROK_PATTERNS['INT']),
+    (r'%{NUMBER}', GROK_PATTERNS['NUMBER']),
+    (r'%{UUID}', GROK_PATTERNS['UUID']),
+    (r'%{IPV4}', GROK_PATTERNS['IPV4']),
+    (r'%{NOTSPACE}', GROK_PATTERNS['NOTSPACE']),
+)
+# Bit 0 of the classes of a token tells whether it is a variable, the next ones the classes it belongs to
+VARIABLE = 1
+CLASS_MATCHERS = tuple((2 << index, re.compile(regex).fullmatch) for index, (_, regex) in enumerate(TOKEN_CLASSES))
+LEVEL_CLASSES = 2 | 4
+CLASS_GROKS = {2 << index: grok for index, (grok, _) in enumerate(TOKEN_CLASSES)}
+HAS_DIGIT = re.compile(r'\d').search
+DIGITS = re.compile(r'\d+')
+
+# Bounds of the lookup caches, cleared when they are full
+MAX_CACHED_TOKENS = 100000
+MAX_CACHED_LINES = 50000
+
+
+class LogCluster:
+    """Lines sharing a template: its tokens (WILDCARD where the lines differ) and the classes of each position."""
+
+    __slots__ = ('prefix', 'tokens', 'wildcards', 'classes', 'count', 'sample', 'path', 'evicted')
+
+    def __init__(self, prefix, tokens, classes, sample, path):
+        self.prefix = prefix
+        self.tokens = tokens
+        self.wildcards = [index for index, token in enumerate(tokens) if token == WILDCARD]
+        self.classes = classes
+        self.count = 1
+        self.sample = sample
+        # (node, key) pairs from the root of the parse tree to the leaf holding the cluster
+        self.path = path
+        self.evicted = False
+
+    @property
+    def template(self):
+        tokens = ' '.join(self.tokens)
+        return f'<timestamp> {tokens}'.rstrip() if self.prefix else tokens
+
+
+class TemplateMiner:
+    """
+    Mines the templates of log lines in a single streaming pass, with the fixed-depth parse tree of Drain (He et
+    al., ICWS 2017): lines are grouped by timestamp format and number of tokens, then by their first
+    `depth - 2` tokens, and a line joins the most similar cluster of its leaf when at least `similarity` of its
+    tokens are those of the cluster template; the positions where they differ become wildcards.
+
+    Tokens holding digits and upper-case log levels are variables from the start. Memory is bounded: a node
+    has at most `max_children` children (others go to the WILDCARD child), at most `max_clusters` clusters are
+    kept (the least recently used one is evicted, its lines counted in `evicted_lines`), and the caches of
+    token classes and of lines already seen (up to their digits) are cleared when they are full.
+    """
+
+    def __init__(self, depth=4, similarity=0.4, max_children=100, max_clusters=1000):
+        if depth < 3:
+            raise ValueError("The parse tree depth must be at least 3.")
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.lines = 0
+        self.empty = 0
+        self.evicted_lines = 0
+        self._root = {}
+        # Clusters, least recently used first
+        self._clusters = OrderedDict()
+        self._classes = {}
+        # Cluster of each line already seen, with its digits replaced
+        self._seen = {}
+
+    @property
+    def cluster_count(self):
+        return len(self._clusters)
+
+    def clusters(self):
+        """The current clusters, the largest first."""
+        return sorted(self._clusters, key=lambda cluster: cluster.count, reverse=True)
+
+    def add_lines(self, lines):
+        add = self.add
+        for line in lines:
+            add(line)
+
+    def add(self, line):
+        """Add a line to its cluster and return the cluster (None for a blank line)."""
+        self.lines += 1
+        prefix = None
+        rest = line
+        match = TIMESTAMP_PREFIX.match(line)
+        if match is not None:
+            prefix = match.lastgroup
+            rest = line[match.end():]
+        elif not line or line.isspace():
+            self.empty += 1
+            return None
+
+        # Lines equal up to their digits have the same masked tokens: they join the cluster of the first one
+        key = (prefix, DIGITS.sub('0', rest))
+        cluster = self._seen.get(key)
+        tokens = rest.split()
+        if cluster is not None and not cluster.evicted:
+            cluster.count += 1
+            self._clusters.move_to_end(cluster)
+            if cluster.wildcards:
+                self._update_classes(cluster, tokens)
+            return cluster
+
+        cluster = self._add_tokens(prefix, tokens, line)
+        if len(self._seen) >= MAX_CACHED_LINES:
+            self._seen.clear()
+        self._seen[key] = cluster
+        return cluster
+
+    def candidates(self, limit=None, max_length=None):
+        """
+        TemplateCandidates of the clusters, the most frequent first, at most `limit` of them. Clusters written
+        as the same pattern are merged; patterns are kept within `max_length` characters by matching the end of
+        long messages with `.*` (`truncated` is then set), those that cannot be are left out.
+        """
+        merged = OrderedDict()
+        for cluster in self.clusters():
+            rendered = self.render(cluster, max_length)
+            if rendered is None:
+                continue
+            pattern, truncated = rendered
+            if pattern in merged:
+                merged[pattern][2] += cluster.count
+            else:
+                merged[pattern] = [pattern, cluster.template, cluster.count, cluster.sample, truncated]
+
+        candidates = sorted(merged.values(), key=lambda candidate: candidate[2], reverse=True)[:limit]
+        return [
+            TemplateCandidate(pattern, template, count, count / self.lines if self.lines else 0.0, sample, truncated)
+            for pattern, template, count, sample, truncated in candidates
+        ]
+
+    @staticmethod
+    def render(cluster, max_length=None):
+        """
+        Write a cluster as a LogsPattern: its timestamp, then its tokens separated by whitespace. The first log
+        level is the `level`, and the tokens after it (all of them without a level) the `message`. Returns
+        (pattern, truncated), or None if the pattern cannot be kept within `max_length` characters.
+        """
+        parts = []
+        level = None
+        for index, (token, classes) in enumerate(zip(cluster.tokens, cluster.classes)):
+            if token != WILDCARD:
+                parts.append(re.escape(token))
+                continue
+            classes &= ~VARIABLE
+            # The lowest bit: the most specific class all the values belong to
+            token_class = classes & -classes
+            grok = CLASS_GROKS.get(token_class, r'%{NOTSPACE}')
+            if level is None and token_class & LEVEL_CLASSES:
+                level = index
+                grok = grok.replace('%{LOGLEVEL}', '%{LOGLEVEL:level}')
+            parts.append(grok)
+
+        if cluster.prefix:
+            start = '^' + PREFIX_PATTERNS[cluster.prefix] + (r'\s+' if parts else '')
+        else:
+            start = r'^\s*'
+        head = parts[:0 if level is None else level + 1]
+        message = parts[len(head):]
+
+        for kept in range(len(message), -1, -1):
+            body = list(head)
+            if message:
+                text = r'\s+'.join(message[:kept])
+                body.append(f"(?P<message>{text}{'.*' if kept < len(message) else ''})")
+            pattern = start + r'\s+'.join(body) + r'\s*$'
+            if max_length is None or len(pattern) <= max_length:
+                return pattern, kept < len(message)
+        return None
+
+    def _add_tokens(self, prefix, tokens, line):
+        classify = self._classify
+        classes = [classify(token) for token in tokens]
+        masked = [WILDCARD if token_classes & VARIABLE else token for token, token_classes in zip(tokens, classes)]
+
+        leaf, path = self._leaf(prefix, masked)
+        cluster = self._best_cluster(leaf, masked)
+        if cluster is None:
+            cluster = LogCluster(prefix, masked, classes, line, path)
+            leaf.append(cluster)
+            self._clusters[cluster] = None
+            if len(self._clusters) > self.max_clusters:
+                self._evict(next(iter(self._clusters)))
+            return cluster
+
+        cluster.count += 1
+        self._clusters.move_to_end(cluster)
+        template = cluster.tokens
+        for index, token in enumerate(masked):
+            if template[index] != token and template[index] != WILDCARD:
+                template[index] = WILDCARD
+                cluster.wildcards.append(index)
+        cluster.wildcards.sort()
+        self._update_classes(cluster, tokens)
+        return cluster
+
+    def _leaf(self, prefix, masked):
+        """The clusters of the leaf of the parse tree for masked tokens, and the path to it, created if needed."""
+        key = (prefix, len(masked))
+        node = self._root.setdefault(key, {})
+        path = [(self._root, key)]
+        for token in masked[:self.depth - 2]:
+            if token not in node and len(node) >= self.max_children:
+                token = WILDCARD
+            path.append((node, token))
+            node = node.setdefault(token, {})
+        leaf = node.get(None)
+        if leaf is None:
+            leaf = node[None] = []
+        return leaf, path
+
+    def _best_cluster(self, leaf, masked):
+        best = None
+        best_similarity = -1.0
+        best_wildcards = -1
+        length = len(masked) or 1
+        for cluster in leaf:
+            same = 0
+            for template_token, token in zip(cluster.tokens, masked):
+                if template_token == token and template_token != WILDCARD:
+                    same += 1
+            similarity = (same + (not masked)) / length
+            wildcards = len(cluster.wildcards)
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best, best_similarity, best_wildcards = cluster, similarity, wildcards
+        return best if best is not None and best_similarity >= self.similarity else None
+
+    def _update_classes(self, cluster, tokens):
+        classes = cluster.classes
+        token_classes = self._classes
+        for index in cluster.wildcards:
+            token = tokens[index]
+            value = token_classes.get(token)
+            if value is None:
+                value = self._classify(token)
+            classes[index] &= value
+
+    def _classify(self, token):
+        value = self._classes.get(token)
+        if value is not None:
+            return value
+
+        value = 0
+        for bit, fullmatch in CLASS_MATCHERS:
+            if fullmatch(token):
+                value |= bit
+        # Levels are only variables when written in capitals, "error" in a message is a word
+        if HAS_DIGIT(token) or (value & LEVEL_CLASSES and token.isupper()):
+            value |= VARIABLE
+        if len(self._classes) >= MAX_CACHED_TOKENS:
+            self._classes.clear()
+        self._classes[token] = value
+        return value
+
+    def _evict(self, cluster):
+        cluster.evicted = True
+        self.evicted_lines += cluster.count
+        del self._clusters[cluster]
+        node, key = cluster.path[-1]
+        leaf = node[key][None]
+        leaf.remove(cluster)
+        if leaf:
+            return
+        # Remove the nodes left without clusters
+        del node[key][None]
+        for node, key in reversed(cluster.path):
+            if node[key]:
+                break
+            del node[key]
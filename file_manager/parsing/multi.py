@@ -0,0 +1,140 @@
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Shorter literals (a space, a bracket) are in almost every line and would not filter anything
+MIN_LITERAL_LENGTH = 3
+
+REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, 'POSSESSIVE_REPEAT'):
+    REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+def required_literals(regex):
+    """
+    Literal strings that every line matched by a compiled regular expression contains: runs of literal
+    characters outside of alternations and optional parts. Case-insensitive patterns have none.
+    """
+    parsed = sre_parse.parse(regex.pattern)
+    # Inline flags included
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+
+    literals = []
+
+    def walk(items):
+        run = []
+
+        def flush():
+            if len(run) >= MIN_LITERAL_LENGTH:
+                literals.append(''.join(run))
+            run.clear()
+
+        for op, value in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(value))
+                continue
+            flush()
+            if op is sre_constants.SUBPATTERN:
+                _, add_flags, _, subpattern = value
+                if not add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+                    walk(subpattern)
+            elif op in REPEATS and value[0] >= 1:
+                walk(value[2])
+            elif getattr(sre_constants, 'ATOMIC_GROUP', None) is op:
+                walk(value)
+        flush()
+
+    walk(parsed)
+    return literals
+
+
+def trie_regex(literals):
+    """
+    A regular expression matching any of `literals`, the longest one when several start at the same position.
+    Written as a prefix tree (shared prefixes are only compared once, and the regex engine can skip to the
+    characters literals start with), it is much faster to search than an alternation of the literals.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for character in literal:
+            node = node.setdefault(character, {})
+        node[''] = True
+
+    def expression(node):
+        branches = [re.escape(character) + expression(child) for character, child in sorted(node.items()) if character]
+        if not branches:
+            return ''
+        alternation = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # An optional continuation is tried first: the longest literal wins
+        return f"(?:{alternation})?" if '' in node else alternation
+
+    return expression(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Matches lines against many CompiledPatterns without trying every regular expression on every line.
+
+    The longest literal every match of a pattern must contain is its key. A single regex of all the keys (see
+    trie_regex) finds the keys present in a line in one pass of the regex engine; each search restarts one
+    character after the previous hit, and a hit also counts the keys it contains, so overlapping keys are never
+    missed. Only the patterns whose key is present, and those without any key, are then tried, in their order.
+    """
+
+    def __init__(self, compiled_patterns):
+        self.patterns = list(compiled_patterns)
+        self.keys = []
+        self._always = []
+        self._by_key = {}
+        for index, compiled in enumerate(self.patterns):
+            literals = required_literals(compiled.regex)
+            key = max(literals, key=len) if literals else None
+            self.keys.append(key)
+            if key is None:
+                self._always.append(index)
+            else:
+                self._by_key.setdefault(key, []).append(index)
+
+        keys = list(self._by_key)
+        # Keys found with a key: itself and the other keys it contains
+        self._implied = {key: [other for other in keys if other in key] for key in keys}
+        self._search = re.compile(trie_regex(keys)).search if keys else None
+
+    def candidates(self, line):
+        """Indexes of the patterns that may match a line, in pattern order."""
+        if self._search is None:
+            return self._always
+
+        found = set()
+        match = self._search(line)
+        while match is not None:
+            found.update(self._implied[match.group()])
+            match = self._search(line, match.start() + 1)
+        if not found:
+            return self._always
+
+        candidates = list(self._always)
+        for key in found:
+            candidates.extend(self._by_key[key])
+        candidates.sort()
+        return candidates
+
+    def match(self, line):
+        """Return (index, Match) for the first pattern matching a line, (None, None) if none does."""
+        patterns = self.patterns
+        for index in self.candidates(line):
+            match = patterns[index].regex.match(line)
+            if match is not None:
+                return index, match
+        return None, None
+
+    def matching(self, line):
+        """Indexes of all the patterns matching a line."""
+        patterns = self.patterns
+        return [index for index in self.candidates(line) if patterns[index].regex.match(line) is not None]
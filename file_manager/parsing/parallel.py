@@ -0,0 +1,140 @@
+import os
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from file_manager.parsing.parser import LogParser
+from file_manager.parsing.patterns import compile_pattern
+
+# Kept free of Django imports: the functions below run in worker processes
+
+#What a worker process sends back for one byte range: parse counters and the value returned by the consumer
+RangeResult = namedtuple('RangeResult', ['start', 'end', 'first_line_number', 'lines', 'matched', 'continued', 'value'])
+
+READ_SIZE = 1024 * 1024
+
+
+def split_ranges(path, range_size, compiled_pattern=None):
+    """
+    Split a file into byte ranges of about `range_size` bytes. Every range starts at the beginning of a line,
+    or, with `compiled_pattern`, of a record: a line the pattern matches, so that the continuation lines of a
+    multi-line record stay in the range of its first line.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as log_file:
+        position = range_size
+        while position < size:
+            start = _record_start(log_file, position, compiled_pattern)
+            if start >= size:
+                break
+            boundaries.append(start)
+            position = start + range_size
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _record_start(log_file, position, compiled_pattern):
+    """Offset of the first line (record) starting at or after `position`."""
+    # Reading from the previous byte finds a line starting exactly at `position` too
+    log_file.seek(position - 1)
+    log_file.readline()
+    while True:
+        start = log_file.tell()
+        line = log_file.readline()
+        if not line:
+            return start
+        if compiled_pattern is None or compiled_pattern.match(line.decode('utf-8', 'replace').rstrip('\r\n')):
+            return start
+
+
+def read_range(path, start, end, chunk_size=READ_SIZE):
+    """Yield the bytes of a file between two offsets in chunks."""
+    with open(path, 'rb') as log_file:
+        log_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = log_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def count_lines(path, start, end):
+    return sum(chunk.count(b'\n') for chunk in read_range(path, start, end))
+
+
+def discard_events(events):
+    """Default consumer: nothing is sent back but the counters of the RangeResult."""
+    return None
+
+
+def collect_events(events):
+    """Consumer sending the events themselves back to the parent process, as a list holding a whole range."""
+    return list(events)
+
+
+def _iter_events(batches):
+    for batch in batches:
+        yield from batch
+
+
+def parse_range(path, start, end, first_line_number, pattern, tzinfo, multiline, consumer, engine='re', timeout=None):
+    """Parse one byte range in a worker process and return its RangeResult."""
+    parser = LogParser(compile_pattern(pattern, engine, timeout), tzinfo, multiline)
+    events = _iter_events(parser.parse_stream(read_range(path, start, end), first_line_number=first_line_number))
+    value = consumer(events)
+    # The lines the consumer did not read are parsed all the same, for the counters
+    for _ in events:
+        pass
+    return RangeResult(start, end, first_line_number, parser.lines, parser.matched, parser.continued, value)
+
+
+def parse_file_parallel(path, pattern, tzinfo=None, multiline=False, workers=None, range_size=64 * 1024 * 1024,
+                        consumer=discard_events, engine='re', timeout=None, ordered=True):
+    """
+    Parse a local file in byte ranges on a pool of `workers` processes and yield their RangeResults, in file
+    order or, without `ordered`, as soon as each range is parsed.
+
+    `consumer(events)` runs in the worker on an iterator over the events of its range, as they are parsed, and
+    its return value is what is sent back, so that work done on the events (aggregating, writing them out)
+    scales with the workers as well and the events are never held together; it must be a module-level function.
+    By default nothing is sent back but the counters, collect_events sends the events themselves. Line numbers are the same as with a sequential parse: the lines before each range
+    are counted first (a quick pass, also in parallel). At most two ranges per worker are in flight, so memory
+    stays bounded whatever the size of the file. Worker processes cannot be started from a daemonic process
+    (a Celery prefork worker): run it from a command, or from a worker using the threads or solo pool.
+    `engine` and `timeout` are the options the pattern is compiled with, see compile_pattern.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(path, range_size, compile_pattern(pattern, engine, timeout) if multiline else None)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        counts = executor.map(count_lines, *zip(*[(path, start, end) for start, end in ranges]))
+        first_line_numbers = []
+        line_number = 1
+        for count in counts:
+            first_line_numbers.append(line_number)
+            line_number += count
+
+        tasks = iter(zip(ranges, first_line_numbers))
+        pending = deque()
+
+        def submit(tasks_to_submit):
+            for (start, end), first_line_number in tasks_to_submit:
+                pending.append(executor.submit(
+                    parse_range, path, start, end, first_line_number, pattern, tzinfo, multiline, consumer,
+                    engine, timeout
+                ))
+
+        submit(islice(tasks, workers * 2))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            submit(islice(tasks, len(done)))
+            for future in done:
+                yield future.result()
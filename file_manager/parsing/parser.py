@@ -0,0 +1,226 @@
+import codecs
+from collections import namedtuple
+from datetime import datetime, timezone
+
+#A structured event extracted from a log line; `fields` holds the named groups that are not attributes
+LogEvent = namedtuple('LogEvent', ['line_number', 'timestamp', 'level', 'event_type', 'message', 'fields'])
+
+# Groups of a pattern that fill LogEvent attributes instead of `fields`
+EVENT_ATTRIBUTES = ('timestamp', 'level', 'event_type', 'message')
+
+LEVEL_ALIASES = {
+    'WARN': 'WARNING',
+    'ERR': 'ERROR',
+    'CRIT': 'CRITICAL',
+    'FATAL': 'CRITICAL',
+    'SEVERE': 'CRITICAL',
+    'ALERT': 'CRITICAL',
+    'EMERG': 'CRITICAL',
+    'EMERGENCY': 'CRITICAL',
+}
+
+# Tried in order when a timestamp is not ISO 8601 nor a Unix epoch
+TIMESTAMP_FORMATS = (
+    '%d/%b/%Y:%H:%M:%S %z',  # Apache / nginx access logs
+    '%b %d %H:%M:%S',  # syslog, no year
+    '%Y/%m/%d %H:%M:%S',
+    '%d-%m-%Y %H:%M:%S',
+)
+
+
+def iter_lines(chunks):
+    """
+    Split a stream of byte chunks into decoded lines (without their line ending), never holding more than a chunk
+    and one line in memory. Invalid UTF-8 is replaced rather than failing the whole file.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line[:-1] if line.endswith('\r') else line
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending[:-1] if pending.endswith('\r') else pending
+
+
+class LogParser:
+    """
+    Turns the lines of a log into LogEvents with a CompiledPattern.
+    Naive timestamps are interpreted in `tzinfo` (UTC by default). Lines the pattern does not match are
+    counted and skipped, unless `multiline` is set: they then continue the message of the previous event
+    (stack traces, wrapped messages). `lines`, `matched`, `continued` and `bytes` count what was parsed so far.
+    """
+
+    def __init__(self, compiled_pattern, tzinfo=None, multiline=False):
+        self.pattern = compiled_pattern
+        self.tzinfo = tzinfo or timezone.utc
+        self.multiline = multiline
+        self.lines = 0
+        self.matched = 0
+        self.continued = 0
+        self.bytes = 0
+        self._timestamp_format = None
+        # UTC offset of `tzinfo` per hour ('YYYY-MM-DD HH'), and normalized level per level as written
+        self._offsets = {}
+        self._levels = {}
+
+        # Positions in Match.groups() (None when the pattern has no such group), faster than Match.groupdict()
+        group_index = compiled_pattern.regex.groupindex
+        self._attribute_indexes = tuple(
+            group_index[attribute] - 1 if attribute in group_index else None for attribute in EVENT_ATTRIBUTES
+        )
+        self._field_indexes = tuple(
+            (field, index - 1, compiled_pattern.converters.get(field))
+            for field, index in group_index.items() if field not in EVENT_ATTRIBUTES
+        )
+
+    def parse_line(self, line, line_number=None):
+        """Return the LogEvent of a line, or None if the pattern does not match it."""
+        self.lines += 1
+        match = self.pattern.regex.match(line)
+        if match is None:
+            return None
+        self.matched += 1
+
+        groups = match.groups()
+        fields = {}
+        for field, index, converter in self._field_indexes:
+            value = groups[index]
+            if converter is not None and value is not None:
+                try:
+                    value = converter(value)
+                except ValueError:
+                    pass
+            fields[field] = value
+
+        timestamp, level, event_type, message = self._attribute_indexes
+        # Skips the Python-level LogEvent.__new__
+        return tuple.__new__(LogEvent, (
+            line_number,
+            None if timestamp is None else self.parse_timestamp(groups[timestamp]),
+            None if level is None else self._normalize_level(groups[level]),
+            None if event_type is None else groups[event_type],
+            line if message is None else groups[message],
+            fields
+        ))
+
+    def parse_lines(self, lines, first_line_number=1):
+        """Yield the LogEvents of an iterable of lines, numbered from `first_line_number`."""
+        parse_line = self.parse_line
+        for line_number, line in enumerate(lines, first_line_number):
+            event = parse_line(line, line_number)
+            if event is not None:
+                yield event
+
+    def parse_stream(self, chunks, batch_size=10000, first_line_number=1):
+        """Yield lists of at most `batch_size` LogEvents parsed from a stream of byte chunks."""
+        def counted(chunks):
+            for chunk in chunks:
+                self.bytes += len(chunk)
+                yield chunk
+
+        parse_line = self.parse_line
+        multiline = self.multiline
+        batch = []
+        for line_number, line in enumerate(iter_lines(counted(chunks)), first_line_number):
+            event = parse_line(line, line_number)
+            if event is None:
+                if multiline and batch:
+                    batch[-1] = batch[-1]._replace(message=f"{batch[-1].message}\n{line}")
+                    self.continued += 1
+                continue
+            # A full batch is only handed over once the next event starts, its last event may still continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+            batch.append(event)
+        if batch:
+            yield batch
+
+    def parse_timestamp(self, value):
+        """Return the aware datetime of a timestamp (ISO 8601, Unix epoch or TIMESTAMP_FORMATS), None if unknown."""
+        if not value:
+            return None
+
+        if self._timestamp_format is None:
+            try:
+                timestamp = datetime.fromisoformat(value)
+            except ValueError:
+                timestamp = self._parse_any_timestamp(value)
+            else:
+                if timestamp.tzinfo is None and len(value) > 10:
+                    # Parsing the timestamp with its UTC offset appended is several times faster than
+                    # datetime.replace(tzinfo=...), and the offset only changes from one hour to the next
+                    offset = self._offsets.get(value[:13])
+                    if offset is None:
+                        offset = self._utc_offset(timestamp, value[:13])
+                    return datetime.fromisoformat(value + offset)
+        else:
+            # The format that worked for the previous line most likely works for this one too
+            timestamp = self._strptime(value, self._timestamp_format) or self._parse_any_timestamp(value)
+
+        if timestamp is not None and timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=self.tzinfo)
+        return timestamp
+
+    def _parse_any_timestamp(self, value):
+        try:
+            # Python < 3.11 rejects 'Z' and comma decimal separators
+            timestamp = datetime.fromisoformat(value.replace(',', '.').replace('Z', '+00:00'))
+            self._timestamp_format = None
+            return timestamp
+        except ValueError:
+            pass
+
+        try:
+            return datetime.fromtimestamp(float(value), timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            pass
+
+        for timestamp_format in TIMESTAMP_FORMATS:
+            timestamp = self._strptime(value, timestamp_format)
+            if timestamp is not None:
+                self._timestamp_format = timestamp_format
+                return timestamp
+        return None
+
+    def _strptime(self, value, timestamp_format):
+        try:
+            timestamp = datetime.strptime(value, timestamp_format)
+        except ValueError:
+            return None
+        if '%Y' not in timestamp_format:
+            # syslog timestamps have no year
+            timestamp = timestamp.replace(year=datetime.now(self.tzinfo).year)
+        return timestamp
+
+    def _utc_offset(self, timestamp, hour):
+        if len(self._offsets) >= 10000:
+            self._offsets.clear()
+        seconds = int(timestamp.replace(tzinfo=self.tzinfo).utcoffset().total_seconds())
+        sign = '-' if seconds < 0 else '+'
+        self._offsets[hour] = offset = f"{sign}{abs(seconds) // 3600:02d}:{abs(seconds) % 3600 // 60:02d}"
+        return offset
+
+    def _normalize_level(self, value):
+        level = self._levels.get(value)
+        if level is None:
+            level = self.normalize_level(value)
+            if len(self._levels) < 1000:
+                self._levels[value] = level
+        return level
+
+    @staticmethod
+    def normalize_level(value):
+        if not value:
+            return None
+        level = value.upper()
+        return LEVEL_ALIASES.get(level, level)
+
+    @property
+    def match_rate(self):
+        """Fraction of the lines that belong to an event."""
+        return (self.matched + self.continued) / self.lines if self.lines else 0.0
@@ -0,0 +1,233 @@
+import re
+from loguru import logger
+from prometheus_client import Counter
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+try:
+    import re2
+except ImportError:  # Optional (google-re2), the 'linear' engine then falls back to regex with a time budget
+    re2 = None
+
+try:
+    import regex
+except ImportError:  # Optional, see compile_pattern
+    regex = None
+
+# Grok-style tokens usable in a LogsPattern as %{NAME}, %{NAME:field} or %{NAME:field:int|float}.
+# Tokens may refer to other tokens.
+GROK_PATTERNS = {
+    'WORD': r'\b\w+\b',
+    'NOTSPACE': r'\S+',
+    'SPACE': r'\s*',
+    'DATA': r'.*?',
+    'GREEDYDATA': r'.*',
+    'INT': r'[+-]?\d+',
+    'NUMBER': r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)',
+    'BASE16NUM': r'(?:0[xX])?[0-9A-Fa-f]+',
+    'UUID': r'[A-Fa-f0-9]{8}-(?:[A-Fa-f0-9]{4}-){3}[A-Fa-f0-9]{12}',
+    'IPV4': r'(?:\d{1,3}\.){3}\d{1,3}',
+    'IPV6': r'(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}',
+    'IP': r'(?:%{IPV6}|%{IPV4})',
+    'HOSTNAME': r'\b[0-9A-Za-z][0-9A-Za-z-]{0,62}(?:\.[0-9A-Za-z][0-9A-Za-z-]{0,62})*\.?\b',
+    'IPORHOST': r'(?:%{IP}|%{HOSTNAME})',
+    'USER': r'[\w.@-]+',
+    'PATH': r'(?:/[^\s/]*)+',
+    'URIPATHPARAM': r'/[^\s?#]*(?:\?[^\s#]*)?',
+    'QUOTEDSTRING': r'"(?:[^"\\]|\\.)*"',
+    'JAVACLASS': r'(?:[a-zA-Z$_][a-zA-Z$_0-9]*\.)*[a-zA-Z$_][a-zA-Z$_0-9]*',
+    'LOGLEVEL': (
+        r'(?:TRACE|[Tt]race|DEBUG|[Dd]ebug|INFO|[Ii]nfo|NOTICE|[Nn]otice|WARN(?:ING)?|[Ww]arn(?:ing)?|'
+        r'ERR(?:OR)?|[Ee]rr(?:or)?|CRIT(?:ICAL)?|[Cc]rit(?:ical)?|FATAL|[Ff]atal|SEVERE|[Ss]evere|'
+        r'ALERT|[Aa]lert|EMERG(?:ENCY)?|[Ee]merg(?:ency)?)'
+    ),
+    'TIMESTAMP_ISO8601': r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?',
+    'HTTPDATE': r'\d{2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4}',
+    'SYSLOGTIMESTAMP': r'[A-Za-z]{3} +\d{1,2} \d{2}:\d{2}:\d{2}',
+}
+
+# Patterns known by name, a LogsPattern whose pattern is one of these names uses the definition instead
+BUILTIN_PATTERNS = {
+    'default-log-pattern': (
+        r'^%{TIMESTAMP_ISO8601:timestamp}\s+\[?%{LOGLEVEL:level}\]?\s+%{GREEDYDATA:message}$'
+    ),
+    'apache-access-log': (
+        r'^%{IPORHOST:client} %{USER:ident} %{USER:user} \[%{HTTPDATE:timestamp}\] '
+        r'"%{WORD:event_type} %{NOTSPACE:path}(?: HTTP/%{NUMBER:http_version})?" %{INT:status:int} '
+        r'(?:%{INT:bytes:int}|-)%{GREEDYDATA:message}$'
+    ),
+    'syslog': (
+        r'^%{SYSLOGTIMESTAMP:timestamp} %{HOSTNAME:host} %{DATA:event_type}(?:\[%{INT:pid:int}\])?: '
+        r'%{GREEDYDATA:message}$'
+    ),
+}
+
+GROK_TOKEN = re.compile(r'%\{(\w+)(?::(\w+))?(?::(int|float))?\}')
+CONVERTERS = {'int': int, 'float': float}
+MAX_GROK_DEPTH = 10
+
+# 're' is Python's backtracking engine. 'linear' bounds the time spent on a line whatever the pattern and the
+# line: RE2 (linear in the length of the line) when installed, otherwise the regex module with a time budget.
+ENGINES = ('re', 'linear')
+# Constructs that need backtracking, rejected by the 'linear' engine
+BACKTRACKING_CONSTRUCTS = {
+    sre_constants.GROUPREF: 'backreferences',
+    sre_constants.GROUPREF_EXISTS: 'conditional groups',
+    sre_constants.ASSERT: 'lookarounds',
+    sre_constants.ASSERT_NOT: 'lookarounds',
+}
+if hasattr(sre_constants, 'ATOMIC_GROUP'):
+    BACKTRACKING_CONSTRUCTS[sre_constants.ATOMIC_GROUP] = 'atomic groups'
+    BACKTRACKING_CONSTRUCTS[sre_constants.POSSESSIVE_REPEAT] = 'possessive quantifiers'
+# Largest bounded repetition RE2 accepts
+MAX_LINEAR_REPEAT = 1000
+
+MATCH_TIMEOUTS = Counter('log_pattern_match_timeouts_total', 'Lines given up on after the per-line time budget')
+
+
+class CompiledPattern:
+    """
+    A LogsPattern compiled once into a regular expression, with the type conversion of each captured field.
+    `source` is the pattern as it was written, `regex` the expanded regular expression, compiled by `engine`.
+    """
+
+    def __init__(self, source, regex, converters, engine='re', timeout=None):
+        self.source = source
+        self.regex = regex
+        self.converters = converters
+        self.engine = engine
+        self.timeout = timeout
+        self.fields = tuple(regex.groupindex)
+
+    def match(self, line):
+        return self.regex.match(line)
+
+    def __repr__(self):
+        return f"CompiledPattern({self.source!r})"
+
+
+class TimeBoundRegex:
+    """
+    A pattern of the regex module whose matches give up after `timeout` seconds: a line taking longer is
+    counted in `timeouts` and treated as not matched, so that one adversarial line cannot pin a worker.
+    """
+
+    def __init__(self, compiled, timeout):
+        self.compiled = compiled
+        self.timeout = timeout
+        self.pattern = compiled.pattern
+        self.groupindex = compiled.groupindex
+        self.timeouts = 0
+
+    def match(self, line):
+        try:
+            return self.compiled.match(line, timeout=self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            MATCH_TIMEOUTS.inc()
+            return None
+
+
+def expand_grok(pattern, converters=None, depth=0):
+    """
+    Replace the grok tokens of a pattern by their regular expression. Named tokens become named groups and
+    the conversion they ask for (':int', ':float') is recorded in `converters`.
+    """
+    if depth > MAX_GROK_DEPTH:
+        raise ValueError("Grok patterns are nested too deeply.")
+    converters = {} if converters is None else converters
+
+    def replace(token):
+        name, field, converter = token.groups()
+        if name not in GROK_PATTERNS:
+            raise ValueError(f"Unknown grok pattern: {name}")
+        expression = expand_grok(GROK_PATTERNS[name], converters, depth + 1)
+        if not field:
+            return f'(?:{expression})'
+        if converter:
+            converters[field] = CONVERTERS[converter]
+        return f'(?P<{field}>{expression})'
+
+    return GROK_TOKEN.sub(replace, pattern)
+
+
+def check_linear_compatible(expression):
+    """
+    Raise ValueError if a regular expression uses constructs a linear-time engine cannot run
+    (backreferences, lookarounds, ...): they can only be matched by backtracking.
+    """
+    try:
+        parsed = sre_parse.parse(expression)
+    except re.error as e:
+        raise ValueError(f"Invalid log pattern: {e}")
+
+    def walk(items):
+        for op, value in items:
+            if op in BACKTRACKING_CONSTRUCTS:
+                raise ValueError(
+                    f"Log patterns may not use {BACKTRACKING_CONSTRUCTS[op]} with the linear-time engine."
+                )
+            if op is sre_constants.SUBPATTERN:
+                walk(value[3])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+                minimum, maximum, subpattern = value
+                if max(minimum, 0 if maximum is sre_constants.MAXREPEAT else maximum) > MAX_LINEAR_REPEAT:
+                    raise ValueError(f"Log patterns may not repeat more than {MAX_LINEAR_REPEAT} times.")
+                walk(subpattern)
+            elif op is sre_constants.BRANCH:
+                for branch in value[1]:
+                    walk(branch)
+
+    walk(parsed)
+
+
+def compile_pattern(pattern, engine='re', timeout=None):
+    """
+    Compile the text of a LogsPattern: the name of a builtin pattern, or a regular expression with named groups
+    that may use grok tokens. Raises ValueError if the pattern is invalid.
+    Groups named timestamp, level, event_type and message fill the matching LogEvent attributes, any other
+    named group becomes a field of the event.
+    With the 'linear' engine (see ENGINES) patterns must pass check_linear_compatible, and `timeout` is the
+    time budget of a line in seconds when RE2 is not installed.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown log pattern engine: {engine}")
+
+    source = BUILTIN_PATTERNS.get(pattern, pattern)
+    converters = {}
+    expanded = expand_grok(source, converters)
+    if engine == 'linear':
+        check_linear_compatible(expanded)
+        compiled = _compile_linear(expanded, timeout)
+    else:
+        try:
+            compiled = re.compile(expanded)
+        except re.error as e:
+            raise ValueError(f"Invalid log pattern: {e}")
+    if not compiled.groupindex:
+        raise ValueError("A log pattern must capture at least one named group.")
+    return CompiledPattern(pattern, compiled, converters, engine, timeout)
+
+
+def _compile_linear(expanded, timeout):
+    if re2 is not None:
+        try:
+            return re2.compile(expanded)
+        except Exception as e:
+            raise ValueError(f"Invalid log pattern: {e}")
+
+    if regex is not None and timeout:
+        try:
+            return TimeBoundRegex(regex.compile(expanded), timeout)
+        except regex.error as e:
+            raise ValueError(f"Invalid log pattern: {e}")
+
+    logger.warning("Neither re2 nor regex (with a time budget) is available, log patterns are not time-bounded")
+    try:
+        return re.compile(expanded)
+    except re.error as e:
+        raise ValueError(f"Invalid log pattern: {e}")
@@ -0,0 +1,33 @@
+from rest_framework import serializers
+from core.models import DirectUpload
+
+
+class DirectUploadCreateSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$', help_text='SHA-256 (hex) of the file')
+
+
+class DirectUploadPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField()
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    # Optional, the uploaded parts are listed from S3 when they are not given
+    parts = DirectUploadPartSerializer(many=True, required=False)
+
+
+class DirectUploadSerializer(serializers.ModelSerializer):
+    """Serializer for the state of a DirectUpload."""
+
+    upload_id = serializers.UUIDField(source='id', read_only=True)
+    file_id = serializers.UUIDField(source='file_reference_id', read_only=True)
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DirectUpload
+        fields = ['upload_id', 'file_id', 'status', 'file_name', 'size', 'checksum', 'part_size', 'expires_at']
+
+    def get_status(self, obj):
+        return obj.get_status_display()
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from core.models import LogTemplate
+
+
+class LogTemplateSerializer(serializers.ModelSerializer):
+    """Serializer for a template mined from an event file and the LogsPattern it proposes."""
+
+    class Meta:
+        model = LogTemplate
+        fields = [
+            'id', 'file_reference', 'rank', 'template', 'pattern', 'truncated', 'line_count', 'coverage',
+            'sample_line', 'created_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from core.models import PatternProfile
+
+
+class PatternProfileRequestSerializer(serializers.Serializer):
+    """Serializer for a request to profile a LogsPattern on an EventSystem."""
+    logs_pattern_id = serializers.IntegerField(min_value=1)
+
+
+class PatternProfileSerializer(serializers.ModelSerializer):
+    """Serializer for the results of a PatternProfile."""
+
+    status = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = PatternProfile
+        fields = [
+            'id', 'event_system', 'logs_pattern', 'status', 'engine', 'file_count', 'line_count', 'matched_count',
+            'timeout_count', 'match_rate', 'lines_per_second', 'mean_line_microseconds', 'p99_line_microseconds',
+            'max_line_microseconds', 'worst_lines', 'unmatched_lines', 'error', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
@@ -1,5 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 from core.models import EventSystem, FileReference, LogsPattern, EventSystemConfiguration
+from file_manager.parsing.cache import engine_options, invalidate_patterns
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.services import EventSystemFileService
 
 class EventSystemCreateSerializer(serializers.ModelSerializer):
     name = serializers.CharField(required=True, allow_blank=False)
@@ -18,10 +22,16 @@ class FileReferenceSerializer(serializers.ModelSerializer):
     storage_provider = serializers.SerializerMethodField()
     upload_status = serializers.SerializerMethodField()
     file_type = serializers.SerializerMethodField()
+    upload_progress = serializers.SerializerMethodField()
+    compression = serializers.SerializerMethodField()
+    stored_size = serializers.SerializerMethodField()
+    # Selection in the event system the file is read from, set on the instance by the caller
+    is_selected = serializers.SerializerMethodField()
 
     class Meta:
         model = FileReference
-        fields = '__all__'  # Include all fields
+        # The checksum and the blob would tell which content is stored, whoever it belongs to
+        exclude = ['checksum', 'blob']
 
     def get_storage_provider(self, obj):
         return obj.get_storage_provider_display()
@@ -32,6 +42,60 @@ class FileReferenceSerializer(serializers.ModelSerializer):
     def get_file_type(self, obj):
         return obj.get_file_type_display()
 
+    def get_upload_progress(self, obj):
+        """Percentage of the file already written to its storage provider."""
+        if obj.upload_status == FileReference.UploadStatus.COMPLETE or not obj.size:
+            return 100.0
+        return round(min(obj.uploaded_bytes, obj.size) * 100.0 / obj.size, 1)
+
+    def get_is_selected(self, obj):
+        return getattr(obj, 'is_selected', None)
+
+    def get_compression(self, obj):
+        return obj.blob.get_compression_display() if obj.blob else None
+
+    def get_stored_size(self, obj):
+        """Bytes used in the storage provider (compressed size), `size` being the original size."""
+        return obj.blob.stored_size if obj.blob else obj.size
+
+
+class FileListQuerySerializer(serializers.Serializer):
+    """Query parameters of the paginated file list."""
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=EventSystemFileService.LIST_MAX_PAGE_SIZE)
+    ordering = serializers.ChoiceField(choices=EventSystemFileService.LIST_ORDERINGS, default='-upload_date')
+    file_type = serializers.ChoiceField(choices=FileReference.FileType.choices, required=False)
+    upload_status = serializers.ChoiceField(choices=FileReference.UploadStatus.choices, required=False)
+    is_selected = serializers.BooleanField(required=False, allow_null=True, default=None)
+    name_prefix = serializers.CharField(required=False, max_length=255)
+
+
+class FileRenameSerializer(serializers.Serializer):
+    file_id = serializers.UUIDField()
+    file_name = serializers.CharField(max_length=255)
+
+
+class FileBulkActionSerializer(serializers.Serializer):
+    """Body of the bulk file operations endpoint."""
+    MAX_FILES = 1000
+
+    action = serializers.ChoiceField(choices=EventSystemFileService.BULK_ACTIONS)
+    file_ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=MAX_FILES)
+    renames = FileRenameSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if attrs['action'] == 'rename':
+            renames = attrs.get('renames')
+            if not renames:
+                raise serializers.ValidationError({'renames': 'This field is required for the rename action.'})
+            if len(renames) > self.MAX_FILES:
+                raise serializers.ValidationError({'renames': f'At most {self.MAX_FILES} files per request.'})
+            if len({rename['file_id'] for rename in renames}) != len(renames):
+                raise serializers.ValidationError({'renames': 'Every file can only be renamed once.'})
+        elif not attrs.get('file_ids'):
+            raise serializers.ValidationError({'file_ids': 'This field is required.'})
+        return attrs
+
 
 class EventSystemNameUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -45,6 +109,14 @@ class CustomPatternSerializer(serializers.ModelSerializer):
         model = LogsPattern
         fields = ['pattern', 'event_system_id']
 
+    def validate_pattern(self, value):
+        # Rejects invalid patterns, and those the configured engine cannot run (see LOG_PATTERN_ENGINE)
+        try:
+            compile_pattern(value, **engine_options())
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
     def create(self, validated_data):
         # Extract the event system ID and pattern from the validated data
         event_system_id = validated_data.pop('event_system_id')
@@ -57,10 +129,15 @@ class CustomPatternSerializer(serializers.ModelSerializer):
 
             # Create a new log pattern
             log_pattern = LogsPattern.objects.create(pattern=pattern)
+            if settings.LOGS_PATTERN_REQUIRE_PROFILE:
+                # A new pattern cannot have been profiled: it is only assigned once it is (see PatchLogsPatternView)
+                return log_pattern
 
             # Link the log pattern to the event system configuration
+            previous_pattern_id = config.logs_pattern_id
             config.logs_pattern = log_pattern
             config.save()
+            invalidate_patterns(previous_pattern_id, log_pattern.id)
 
             return log_pattern
 
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from core.models import FileReference, UploadSession
+from file_manager.services.upload_session_services import UploadSessionService
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    total_size = serializers.IntegerField(min_value=1)
+    chunk_size = serializers.IntegerField(required=False, min_value=1)
+    storage_provider = serializers.ChoiceField(
+        choices=FileReference.StorageProvider.choices,
+        default=FileReference.StorageProvider.LOCAL
+    )
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for the state of an UploadSession, including which chunks are still missing."""
+
+    session_id = serializers.UUIDField(source='id', read_only=True)
+    file_id = serializers.UUIDField(source='file_reference_id', read_only=True)
+    status = serializers.SerializerMethodField()
+    missing_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'session_id', 'file_id', 'status', 'total_size', 'chunk_size',
+            'total_chunks', 'missing_chunks', 'expires_at'
+        ]
+
+    def get_status(self, obj):
+        return obj.get_status_display()
+
+    def get_missing_chunks(self, obj):
+        return UploadSessionService.missing_chunks(obj)
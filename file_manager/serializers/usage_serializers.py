@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from core.models import EventSystemUsage, FileReference
+from file_manager.services.usage_services import StorageUsageService, TYPE_BYTES_FIELDS
+
+
+class EventSystemUsageSerializer(serializers.ModelSerializer):
+    """Serializer for the storage usage and quotas of an EventSystem."""
+
+    bytes_by_type = serializers.SerializerMethodField()
+    max_storage_bytes = serializers.SerializerMethodField()
+    max_files = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EventSystemUsage
+        fields = [
+            'file_count', 'total_bytes', 'bytes_by_type', 'selected_count',
+            'max_storage_bytes', 'max_files', 'updated_at'
+        ]
+
+    def get_bytes_by_type(self, obj):
+        return {
+            FileReference.FileType(file_type).label: getattr(obj, field)
+            for file_type, field in TYPE_BYTES_FIELDS.items()
+        }
+
+    def get_max_storage_bytes(self, obj):
+        return StorageUsageService.quota(obj.event_system)[0]
+
+    def get_max_files(self, obj):
+        return StorageUsageService.quota(obj.event_system)[1]
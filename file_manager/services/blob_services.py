@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models import F
+from loguru import logger
+
+from core.models import StoredBlob
+
+
+class BlobStoreService:
+    """
+    Reference counting of the content-addressed blobs behind FileReferences.
+    Writing and deleting the bytes is left to the caller (EventSystemFileService), this class
+    only decides when content has to be written or can be removed.
+    """
+
+    @staticmethod
+    def storage_key(sha256, extension=''):
+        """Key of the content with the given SHA-256 inside a storage provider."""
+        return f"blobs/{sha256[:2]}/{sha256}{extension}"
+
+    @staticmethod
+    def acquire(sha256, storage_provider):
+        """
+        Add a reference to content that is already stored in the given provider.
+        Returns the StoredBlob, or None if the content still has to be written.
+        """
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(
+                sha256=sha256,
+                storage_provider=storage_provider
+            ).first()
+            if blob is None:
+                return None
+
+            blob.ref_count = F('ref_count') + 1
+            blob.save(update_fields=['ref_count'])
+
+        blob.refresh_from_db()
+        return blob
+
+    @staticmethod
+    def register(sha256, storage_provider, storage_key, url, size, compression=StoredBlob.Compression.NONE,
+                 stored_size=None):
+        """
+        Record content that was just written to a storage provider and add a reference to it.
+        Concurrent uploads of the same content end up sharing a single StoredBlob.
+        """
+        with transaction.atomic():
+            blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                sha256=sha256,
+                storage_provider=storage_provider,
+                defaults={
+                    'storage_key': storage_key,
+                    'url': url,
+                    'size': size,
+                    'compression': compression,
+                    'stored_size': size if stored_size is None else stored_size
+                }
+            )
+            blob.ref_count = F('ref_count') + 1
+            blob.save(update_fields=['ref_count'])
+
+        if created:
+            logger.debug(f"Stored new blob {sha256}")
+        blob.refresh_from_db()
+        return blob
+
+    @staticmethod
+    def release(blob_id, delete_content):
+        """
+        Drop a reference to a blob. When it was the last one, `delete_content(blob)` is called
+        (while the blob is still locked, so no upload can reuse it meanwhile) and the blob is removed.
+        Returns True if the content was deleted.
+        """
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(id=blob_id).first()
+            if blob is None:
+                return False
+
+            if blob.ref_count > 1 or blob.file_references.exists():
+                blob.ref_count = F('ref_count') - 1
+                blob.save(update_fields=['ref_count'])
+                return False
+
+            try:
+                delete_content(blob)
+            except Exception as e:
+                # The orphaned content can be collected later, the reference is gone either way
+                logger.error(f"Failed to delete content of blob {blob.sha256}: {str(e)}")
+            blob.delete()
+
+        logger.debug(f"Deleted blob {blob.sha256}, no references left")
+        return True
+
+    @staticmethod
+    def delete_unreferenced(blob_id, delete_content):
+        """
+        Remove a blob no FileReference points to anymore, whatever its ref_count says
+        (e.g. when a deletion stopped between removing the FileReference and releasing the blob).
+        Returns True if the blob was removed.
+        """
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(id=blob_id).first()
+            if blob is None or blob.file_references.exists():
+                return False
+
+            delete_content(blob)
+            blob.delete()
+
+        logger.info(f"Deleted unreferenced blob {blob.sha256}")
+        return True
@@ -0,0 +1,342 @@
+import base64
+import hashlib
+import math
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from core.models import DirectUpload, EventSystem, EventSystemFile, FileReference, StoredBlob
+from file_manager.services.blob_services import BlobStoreService
+from file_manager.services.services import EventSystemFileService
+from file_manager.services.usage_services import StorageUsageService
+from file_manager.storage.s3_client import get_s3_client, get_transfer_config, s3_object_url
+
+# S3 limits for multipart uploads
+S3_MAX_PARTS = 10000
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+# Largest object a single CopyObject can copy
+S3_MAX_COPY_SIZE = 5 * 1024 * 1024 * 1024
+
+
+class DirectUploadService:
+    @staticmethod
+    def create_upload(event_system_id, user, file_name, size, checksum):
+        """
+        Start an upload straight to S3.
+        Content the user can already read in one of their event systems (same SHA-256, stored in S3) is
+        registered right away, nothing has to be sent: the returned upload is then COMPLETE and holds its
+        FileReference. Any other content is only shared once its bytes were uploaded and verified, a checksum
+        alone proves nothing.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+        EventSystemFileService.check_upload_permission(event_system, user)
+
+        # Check if a file with the same name already exists in this event system
+        if EventSystemFile.objects.filter(event_system=event_system, file_name=file_name).exists():
+            raise FileExistsError("A file with the same name already exists.")
+        StorageUsageService.check_quota(event_system, size)
+
+        checksum = checksum.lower()
+        with transaction.atomic():
+            upload = DirectUpload(
+                event_system=event_system,
+                user=user,
+                file_name=file_name,
+                size=size,
+                checksum=checksum,
+                expires_at=timezone.now() + settings.DIRECT_UPLOAD_TTL
+            )
+            upload.storage_key = f"uploads/{upload.id}"
+
+            blob = None
+            if DirectUploadService.can_read_content(user, checksum):
+                blob = BlobStoreService.acquire(checksum, FileReference.StorageProvider.S3)
+            if blob:
+                logger.info(f"Direct upload of {file_name} deduplicated against blob {blob.sha256}")
+                upload.status = DirectUpload.DirectUploadStatus.COMPLETE
+                upload.file_reference = DirectUploadService.create_file_reference(upload, blob)
+                upload.save()
+                return upload
+
+            if size > settings.AWS_S3_MULTIPART_THRESHOLD:
+                # Parts must be at least 5MB and there can be at most 10000 of them
+                upload.part_size = max(
+                    settings.AWS_S3_MULTIPART_CHUNKSIZE,
+                    S3_MIN_PART_SIZE,
+                    math.ceil(size / S3_MAX_PARTS)
+                )
+                upload.multipart_upload_id = get_s3_client().create_multipart_upload(
+                    Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                    Key=upload.storage_key
+                )['UploadId']
+            upload.save()
+        return upload
+
+    @staticmethod
+    def can_read_content(user, checksum):
+        """Whether a file of one of the user's event systems holds the content stored in S3 under `checksum`."""
+        return FileReference.objects.filter(
+            blob__sha256=checksum,
+            blob__storage_provider=FileReference.StorageProvider.S3,
+            event_systems__usersystempermissions__user=user
+        ).exists()
+
+    @staticmethod
+    def get_upload(event_system_id, upload_id, user):
+        """Return a direct upload started by the user; raises DirectUpload.DoesNotExist otherwise."""
+        return DirectUpload.objects.get(id=upload_id, event_system_id=event_system_id, user=user)
+
+    @staticmethod
+    def presigned_urls(upload):
+        """
+        Presigned URLs the client sends the file to: a single PUT (which must carry the
+        x-amz-checksum-sha256 header, so S3 itself rejects corrupted bodies) or one PUT per part.
+        """
+        s3_client = get_s3_client()
+        expires_in = settings.DIRECT_UPLOAD_URL_EXPIRY
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+
+        if not upload.multipart_upload_id:
+            checksum = base64.b64encode(bytes.fromhex(upload.checksum)).decode()
+            url = s3_client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': bucket, 'Key': upload.storage_key, 'ChecksumSHA256': checksum},
+                ExpiresIn=expires_in
+            )
+            return {'url': url, 'headers': {'x-amz-checksum-sha256': checksum}, 'parts': []}
+
+        parts = []
+        for part_number in range(1, math.ceil(upload.size / upload.part_size) + 1):
+            parts.append({
+                'part_number': part_number,
+                'url': s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': bucket,
+                        'Key': upload.storage_key,
+                        'UploadId': upload.multipart_upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=expires_in
+                )
+            })
+        return {'url': None, 'headers': {}, 'parts': parts}
+
+    @staticmethod
+    def complete_upload(upload, parts=None):
+        """
+        Completion callback, called by the client once every byte was sent.
+        The object size is checked right away, then the checksum is compared with the SHA-256 S3 computed. S3 only
+        keeps a checksum of the part checksums of multipart objects: they are copied onto themselves first, which
+        has S3 compute the SHA-256 of the whole content without the bytes leaving S3. Objects without a SHA-256
+        (larger than a single copy allows) are hashed by a Celery task and the upload stays VERIFYING.
+        `parts` ([{'part_number', 'etag'}]) is optional for multipart uploads, S3 is asked for them otherwise.
+        """
+        if upload.status != DirectUpload.DirectUploadStatus.ACTIVE:
+            raise ValueError("The upload is not active.")
+        if EventSystemFile.objects.filter(event_system=upload.event_system, file_name=upload.file_name).exists():
+            raise FileExistsError("A file with the same name already exists.")
+
+        s3_client = get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+
+        if upload.multipart_upload_id:
+            if parts:
+                completed_parts = [{'PartNumber': int(part['part_number']), 'ETag': part['etag']} for part in parts]
+            else:
+                completed_parts = DirectUploadService.list_uploaded_parts(upload)
+            s3_client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=upload.storage_key,
+                UploadId=upload.multipart_upload_id,
+                MultipartUpload={'Parts': sorted(completed_parts, key=lambda part: part['PartNumber'])}
+            )
+
+        try:
+            head = s3_client.head_object(Bucket=bucket, Key=upload.storage_key, ChecksumMode='ENABLED')
+        except s3_client.exceptions.ClientError:
+            raise ValueError("The file was not uploaded.")
+
+        if head['ContentLength'] != upload.size:
+            DirectUploadService.fail_upload(upload, "Uploaded size does not match the declared size.")
+            raise ValueError("Uploaded size does not match the declared size.")
+
+        if upload.multipart_upload_id and head['ContentLength'] <= S3_MAX_COPY_SIZE:
+            s3_client.copy_object(
+                Bucket=bucket,
+                Key=upload.storage_key,
+                CopySource={'Bucket': bucket, 'Key': upload.storage_key},
+                ChecksumAlgorithm='SHA256',
+                MetadataDirective='REPLACE'
+            )
+            head = s3_client.head_object(Bucket=bucket, Key=upload.storage_key, ChecksumMode='ENABLED')
+
+        # Composite checksums ('<checksum>-<parts>') are not the SHA-256 of the content
+        s3_checksum = head.get('ChecksumSHA256')
+        if s3_checksum and '-' not in s3_checksum:
+            if base64.b64decode(s3_checksum).hex() != upload.checksum:
+                DirectUploadService.fail_upload(upload, "Checksum mismatch.")
+                raise ValueError("Checksum mismatch for the uploaded file.")
+            return DirectUploadService.register_upload(upload)
+
+        upload.status = DirectUpload.DirectUploadStatus.VERIFYING
+        upload.save(update_fields=['status'])
+
+        # Imported here to avoid a circular import, the tasks module depends on this one
+        from file_manager.services.tasks import verify_direct_upload
+
+        upload_id = str(upload.id)
+        transaction.on_commit(lambda: verify_direct_upload.delay(upload_id))
+        return upload
+
+    @staticmethod
+    def list_uploaded_parts(upload):
+        paginator = get_s3_client().get_paginator('list_parts')
+        completed_parts = []
+        for page in paginator.paginate(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=upload.storage_key,
+            UploadId=upload.multipart_upload_id
+        ):
+            completed_parts.extend(
+                {'PartNumber': part['PartNumber'], 'ETag': part['ETag']} for part in page.get('Parts', [])
+            )
+        if not completed_parts:
+            raise ValueError("No part of the file was uploaded.")
+        return completed_parts
+
+    @staticmethod
+    def verify_upload(upload_id):
+        """Hash the uploaded object (streamed from S3) and register it when it matches the declared checksum."""
+        upload = DirectUpload.objects.select_related('event_system').get(id=upload_id)
+        if upload.status != DirectUpload.DirectUploadStatus.VERIFYING:
+            return upload
+
+        response = get_s3_client().get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=upload.storage_key)
+        sha256 = hashlib.sha256()
+        for chunk in response['Body'].iter_chunks(settings.FILE_UPLOAD_CHUNK_SIZE):
+            sha256.update(chunk)
+
+        if sha256.hexdigest() != upload.checksum:
+            DirectUploadService.fail_upload(upload, "Checksum mismatch.")
+            return upload
+        return DirectUploadService.register_upload(upload)
+
+    @staticmethod
+    def register_upload(upload):
+        """
+        Move the verified object to its content-addressed blob and create the FileReference.
+        Direct uploads are stored uncompressed whatever FILE_COMPRESSION says: the bytes are copied inside S3
+        and never pass through the server, which would have to download and upload them again to compress them.
+
+        The blob reference, the FileReference and the name check are a single transaction. If the name was
+        taken since complete_upload checked it, nothing is kept: bytes copied for a new blob are released and
+        the upload is FAILED. The uploaded object is only deleted once the FileReference is committed.
+        """
+        s3_client = get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        storage_key = BlobStoreService.storage_key(upload.checksum)
+        upload_key = upload.storage_key
+
+        copied = not StoredBlob.objects.filter(
+            sha256=upload.checksum,
+            storage_provider=FileReference.StorageProvider.S3
+        ).exists()
+        if copied:
+            # Server-side copy, the bytes never leave S3. A failure here leaves the upload as it was, to be retried
+            s3_client.copy({'Bucket': bucket, 'Key': upload_key}, bucket, storage_key, Config=get_transfer_config())
+
+        try:
+            with transaction.atomic():
+                if EventSystemFile.objects.filter(event_system=upload.event_system, file_name=upload.file_name).exists():
+                    raise FileExistsError("A file with the same name already exists.")
+
+                blob = BlobStoreService.acquire(upload.checksum, FileReference.StorageProvider.S3)
+                if blob is None:
+                    if not copied:
+                        # The blob found before the copy was deleted since
+                        s3_client.copy({'Bucket': bucket, 'Key': upload_key}, bucket, storage_key, Config=get_transfer_config())
+                        copied = True
+                    blob = DirectUploadService.register_blob(upload, storage_key)
+                upload.file_reference = DirectUploadService.create_file_reference(upload, blob)
+                upload.status = DirectUpload.DirectUploadStatus.COMPLETE
+                upload.save(update_fields=['file_reference', 'status'])
+                transaction.on_commit(lambda: s3_client.delete_object(Bucket=bucket, Key=upload_key))
+        except Exception as e:
+            # The transaction dropped every reference it took: the copied bytes may be nobody's now
+            upload.file_reference = None
+            if copied:
+                blob = DirectUploadService.register_blob(upload, storage_key)
+                BlobStoreService.release(blob.id, EventSystemFileService.delete_content)
+            DirectUploadService.fail_upload(upload, str(e))
+            raise
+
+        logger.info(f"Registered direct upload {upload.id} as file {upload.file_reference.id}")
+        return upload
+
+    @staticmethod
+    def register_blob(upload, storage_key):
+        return BlobStoreService.register(
+            upload.checksum,
+            FileReference.StorageProvider.S3,
+            storage_key,
+            s3_object_url(storage_key),
+            upload.size
+        )
+
+    @staticmethod
+    def create_file_reference(upload, blob):
+        file_reference = FileReference.objects.create(
+            file_name=upload.file_name,
+            storage_provider=FileReference.StorageProvider.S3,
+            size=upload.size,
+            checksum=upload.checksum,
+            file_type=FileReference.FileType.EVENT_FILE
+        )
+        # The quota was checked when the upload started, the bytes are already in S3 by now
+        StorageUsageService.add_file(upload.event_system, file_reference, enforce_quota=False)
+        EventSystemFileService.link_files(upload.event_system, [file_reference])
+        return EventSystemFileService.attach_blob(file_reference, blob)
+
+    @staticmethod
+    def fail_upload(upload, reason):
+        logger.warning(f"Direct upload {upload.id} of {upload.file_name} failed: {reason}")
+        get_s3_client().delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=upload.storage_key)
+        upload.status = DirectUpload.DirectUploadStatus.FAILED
+        upload.save(update_fields=['status'])
+
+    @staticmethod
+    def abort_upload(upload):
+        """Discard an unfinished direct upload and whatever was sent for it."""
+        if upload.status in (DirectUpload.DirectUploadStatus.VERIFYING, DirectUpload.DirectUploadStatus.COMPLETE):
+            raise ValueError("A completed upload cannot be aborted.")
+
+        s3_client = get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        if upload.multipart_upload_id:
+            try:
+                s3_client.abort_multipart_upload(
+                    Bucket=bucket,
+                    Key=upload.storage_key,
+                    UploadId=upload.multipart_upload_id
+                )
+            except s3_client.exceptions.ClientError:
+                # Already completed or aborted
+                pass
+        s3_client.delete_object(Bucket=bucket, Key=upload.storage_key)
+        upload.delete()
+
+    @staticmethod
+    def delete_expired_uploads():
+        """Abort every unfinished direct upload past its expiry date. Returns the number of uploads removed."""
+        expired = DirectUpload.objects.filter(
+            status__in=[DirectUpload.DirectUploadStatus.ACTIVE, DirectUpload.DirectUploadStatus.FAILED],
+            expires_at__lt=timezone.now()
+        )
+
+        count = 0
+        for upload in expired.iterator():
+            DirectUploadService.abort_upload(upload)
+            count += 1
+        return count
@@ -0,0 +1,128 @@
+import mimetypes
+import re
+from django.utils.http import content_disposition_header
+from core.models import EventSystem, FileReference, StoredBlob, UserSystemPermissions
+from file_manager.storage.drivers import get_storage_driver
+from file_manager.storage.s3_client import presigned_download_url
+
+# Content-Encoding tokens of the at-rest codecs
+CONTENT_ENCODINGS = {
+    StoredBlob.Compression.GZIP: 'gzip',
+    StoredBlob.Compression.ZSTD: 'zstd',
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside of the file."""
+
+
+class FileDownloadService:
+    @staticmethod
+    def get_downloadable_file(event_system_id, file_id, user):
+        """Return the FileReference (with its blob) a user may download from an EventSystem."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+
+        # Every permission level may read the files of the event system
+        if not UserSystemPermissions.objects.filter(user=user, event_system=event_system).exists():
+            raise PermissionError("You do not have access to this file.")
+
+        file_reference = FileReference.objects.select_related('blob').filter(
+            id=file_id,
+            event_systems=event_system
+        ).first()
+        if file_reference is None:
+            if FileReference.objects.filter(id=file_id).exists():
+                raise ValueError("File does not belong to this EventSystem.")
+            raise FileReference.DoesNotExist()
+
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+        return file_reference
+
+    @staticmethod
+    def negotiate_encoding(file_reference, accept_encoding):
+        """
+        Return the Content-Encoding the stored bytes can be sent with as they are, or None when the
+        content is stored uncompressed or the client does not accept its codec (it is then decompressed).
+        """
+        blob = file_reference.blob
+        if blob is None or blob.compression == StoredBlob.Compression.NONE:
+            return None
+
+        token = CONTENT_ENCODINGS[blob.compression]
+        for item in (accept_encoding or '').split(','):
+            name, _, params = item.strip().partition(';')
+            if name.strip().lower() != token:
+                continue
+            quality = params.strip()
+            if quality.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                return None
+            return token
+        return None
+
+    @staticmethod
+    def content_type(file_reference):
+        return mimetypes.guess_type(file_reference.file_name)[0] or 'application/octet-stream'
+
+    @staticmethod
+    def presigned_url(file_reference, encoding=None):
+        """Presigned S3 GET URL of a file's stored bytes, sent with the given Content-Encoding."""
+        blob = file_reference.blob
+        if (blob.storage_provider if blob else file_reference.storage_provider) != FileReference.StorageProvider.S3:
+            raise ValueError("Only files stored in S3 can be downloaded with a presigned URL.")
+
+        response_headers = {
+            'ResponseContentType': FileDownloadService.content_type(file_reference),
+            'ResponseContentDisposition': content_disposition_header(True, file_reference.file_name),
+        }
+        if encoding:
+            response_headers['ResponseContentEncoding'] = encoding
+        if blob:
+            key = blob.storage_key
+        else:
+            # Legacy files are stored under the key of their URL, their name may have changed since
+            key = get_storage_driver(FileReference.StorageProvider.S3).key_from_url(file_reference.url)
+        return presigned_download_url(key, **response_headers)
+
+    @staticmethod
+    def representation_length(file_reference, encoding):
+        """Size in bytes of the body sent for a file, in the given content encoding."""
+        return file_reference.blob.stored_size if encoding else file_reference.size
+
+    @staticmethod
+    def etag(file_reference, encoding):
+        """Strong ETag of a file representation, derived from its content checksum."""
+        tag = file_reference.checksum or f"{file_reference.id}-{file_reference.size}"
+        return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+    @staticmethod
+    def parse_range(range_header, length):
+        """
+        Parse a single `bytes=` Range header into an inclusive (start, end) tuple.
+        Returns None when the whole file has to be sent (no header, or a form that is not supported,
+        such as multiple ranges). Raises RangeNotSatisfiable when the range lies outside of the file.
+        """
+        if not range_header:
+            return None
+
+        match = RANGE_RE.match(range_header.strip())
+        if not match or match.group(1) == match.group(2) == '':
+            return None
+
+        first, last = match.groups()
+        if first == '':
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable()
+            return max(length - suffix, 0), length - 1
+
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+        if start >= length:
+            raise RangeNotSatisfiable()
+        if end < start:
+            return None
+        return start, end
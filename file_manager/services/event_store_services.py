@@ -0,0 +1,139 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from loguru import logger
+
+from core.models import EventSegment, EventSystem, FileReference
+from file_manager.parsing.columnar import Segment, decode_timestamp, write_segment
+from file_manager.services.parsing_services import LogParsingService
+from file_manager.services.services import EventSystemFileService
+from file_manager.services.streaming import file_sha256
+from file_manager.services.usage_services import StorageUsageService
+
+
+class EventStoreService:
+    """
+    Columnar store of the parsed events of an EventSystem. The events of each event file are stored in segments
+    of at most EVENT_SEGMENT_MAX_ROWS events sorted by time, each one a FileReference of type EVENT_SEGMENT
+    with an EventSegment holding its statistics. Segments are found through their EventSegment, they are not
+    files of the event system: they are counted in its event_segment_bytes, but neither in its quota nor in
+    its file list, and their names never take the name of a user's file. Jobs find the segments of a time range in the database, then read only the columns they need.
+    """
+
+    @staticmethod
+    def build_segments(file_reference_id, event_system_id, max_rows=None):
+        """
+        Parse an event file with the pattern of its event system and store its events as segments, replacing
+        the segments built from it before. Returns the EventSegments.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+        source = FileReference.objects.get(id=file_reference_id, event_system_links__event_system=event_system)
+        if source.file_type != FileReference.FileType.EVENT_FILE:
+            raise ValueError("Only event files can be stored as event segments.")
+
+        max_rows = max_rows or settings.EVENT_SEGMENT_MAX_ROWS
+        parser = LogParsingService.get_parser(event_system)
+        EventStoreService.delete_segments(source, event_system)
+
+        segments = []
+        events = []
+        try:
+            for batch in LogParsingService.parse_file(source, parser):
+                events.extend(batch)
+                while len(events) >= max_rows:
+                    segment = EventStoreService.store_segment(event_system, source, len(segments), events[:max_rows])
+                    segments.append(segment)
+                    del events[:max_rows]
+            if events:
+                segments.append(EventStoreService.store_segment(event_system, source, len(segments), events))
+        except Exception:
+            # A file is either entirely in the store or not at all
+            EventStoreService.delete_segments(source, event_system)
+            raise
+
+        logger.info(f"Stored {parser.matched} events of {source.file_name} in {len(segments)} segments")
+        return segments
+
+    @staticmethod
+    def store_segment(event_system, source, sequence, events):
+        """Write events as a segment file, store it like an uploaded file and record its statistics."""
+        staging_directory = os.path.join(settings.FILE_UPLOAD_STAGING_ROOT, 'segments')
+        os.makedirs(staging_directory, exist_ok=True)
+        # Not a name users see, the source file may be renamed or replaced
+        file_name = f"{source.id}.{sequence:05d}.segment"
+
+        with tempfile.TemporaryFile(dir=staging_directory) as segment_file:
+            stats = write_segment(segment_file, events)
+            size = segment_file.tell()
+            segment_file.seek(0)
+            content = File(segment_file, name=file_name)
+            checksum = file_sha256(content)
+            segment_file.seek(0)
+
+            with transaction.atomic():
+                file_reference = FileReference.objects.create(
+                    file_name=file_name,
+                    storage_provider=source.storage_provider,
+                    size=size,
+                    checksum=checksum,
+                    upload_status=FileReference.UploadStatus.PENDING,
+                    file_type=FileReference.FileType.EVENT_SEGMENT
+                )
+                StorageUsageService.add_file(event_system, file_reference)
+                blob = EventSystemFileService.store_content(content, checksum, size, source.storage_provider)
+                EventSystemFileService.attach_blob(file_reference, blob)
+
+                return EventSegment.objects.create(
+                    event_system=event_system,
+                    file_reference=file_reference,
+                    source_file=source,
+                    sequence=sequence,
+                    row_count=stats['rows'],
+                    min_timestamp=EventStoreService._timestamp(stats['min_timestamp']),
+                    max_timestamp=EventStoreService._timestamp(stats['max_timestamp']),
+                    min_line_number=stats['min_line_number'],
+                    max_line_number=stats['max_line_number']
+                )
+
+    @staticmethod
+    def delete_segments(source, event_system):
+        """Delete the segments built from an event file for an event system."""
+        segments = EventSegment.objects.filter(source_file=source, event_system=event_system)
+        with transaction.atomic():
+            for segment in segments.select_related('file_reference'):
+                EventSystemFileService.remove_file(event_system, segment.file_reference)
+
+    @staticmethod
+    def find_segments(event_system, start=None, end=None):
+        """
+        EventSegments of an event system that may hold events in [start, end), in time order. Segments
+        without any timestamp are only returned when no time range is given.
+        """
+        segments = EventSegment.objects.filter(event_system=event_system).select_related('file_reference__blob')
+        if start is not None:
+            segments = segments.filter(max_timestamp__gte=start)
+        if end is not None:
+            segments = segments.filter(min_timestamp__lt=end)
+        return segments.order_by(F('min_timestamp').asc(nulls_last=True), 'source_file_id', 'sequence')
+
+    @staticmethod
+    @contextmanager
+    def open_segment(segment):
+        """Yield a memory-mapped Segment reader for an EventSegment."""
+        with LogParsingService.local_copy(segment.file_reference) as path, Segment(path) as reader:
+            yield reader
+
+    @staticmethod
+    def iter_events(event_system, start=None, end=None):
+        """Yield the stored LogEvents of an event system in [start, end), segment by segment."""
+        for segment in EventStoreService.find_segments(event_system, start, end):
+            with EventStoreService.open_segment(segment) as reader:
+                yield from reader.events(start, end)
+
+    @staticmethod
+    def _timestamp(value):
+        return None if value is None else decode_timestamp(value)
@@ -0,0 +1,129 @@
+import time
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from loguru import logger
+
+from core.models import EventSystem, FileReference, LogsPattern, LogTemplate, UserSystemPermissions
+from file_manager.parsing.cache import engine_options
+from file_manager.parsing.mining import TemplateMiner
+from file_manager.parsing.parser import iter_lines
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.services import EventSystemFileService
+
+# Sample lines are stored truncated to this many characters
+SAMPLE_LINE_LENGTH = 500
+
+
+class TemplateMiningService:
+    """
+    Proposes LogsPatterns for an event file: its lines are streamed once through a TemplateMiner and the most
+    frequent templates are stored as LogTemplates, which users can accept as LogsPatterns (then profile and assign
+    them) instead of writing patterns by hand.
+    """
+
+    @staticmethod
+    def request_mining(event_system_id, user, file_id):
+        """Mine the templates of an uploaded event file in the background once the request is committed."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+        TemplateMiningService.check_permission(event_system, user)
+        file_reference = FileReference.objects.get(id=file_id, event_system_links__event_system=event_system)
+        if file_reference.file_type != FileReference.FileType.EVENT_FILE:
+            raise ValueError("Only event files can be mined for templates.")
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+
+        # Imported here to avoid a circular import, the tasks module depends on this one
+        from file_manager.services.tasks import mine_log_templates
+
+        transaction.on_commit(lambda: mine_log_templates.delay(str(file_reference.id), str(event_system.id)))
+        return file_reference
+
+    @staticmethod
+    def mine_file(file_reference_id, event_system_id, max_lines=None):
+        """
+        Mine the templates of an event file and store them, replacing those mined before for the event system.
+        Returns the LogTemplates.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+        file_reference = FileReference.objects.get(id=file_reference_id, event_system_links__event_system=event_system)
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+
+        miner = TemplateMiner(
+            depth=settings.LOG_TEMPLATE_MINING_DEPTH,
+            similarity=settings.LOG_TEMPLATE_SIMILARITY,
+            max_children=settings.LOG_TEMPLATE_MAX_CHILDREN,
+            max_clusters=settings.LOG_TEMPLATE_MAX_CLUSTERS
+        )
+        started = time.perf_counter()
+        lines = iter_lines(EventSystemFileService.iter_file_content(file_reference))
+        miner.add_lines(islice(lines, max_lines or settings.LOG_TEMPLATE_MINING_MAX_LINES))
+        elapsed = time.perf_counter() - started
+
+        candidates = miner.candidates(
+            settings.LOG_TEMPLATE_CANDIDATES, max_length=LogsPattern._meta.get_field('pattern').max_length
+        )
+        with transaction.atomic():
+            LogTemplate.objects.filter(file_reference=file_reference, event_system=event_system).delete()
+            templates = LogTemplate.objects.bulk_create([
+                LogTemplate(
+                    event_system=event_system,
+                    file_reference=file_reference,
+                    rank=rank,
+                    template=candidate.template,
+                    pattern=candidate.pattern,
+                    truncated=candidate.truncated,
+                    line_count=candidate.count,
+                    coverage=candidate.coverage,
+                    sample_line=candidate.sample[:SAMPLE_LINE_LENGTH]
+                )
+                for rank, candidate in enumerate(candidates, 1)
+            ])
+
+        logger.info(
+            f"Mined {file_reference.file_name}: {miner.lines} lines, {miner.cluster_count} templates, "
+            f"the top {len(templates)} cover {sum(template.coverage for template in templates):.1%}, "
+            f"{miner.lines / elapsed if elapsed else 0:.0f} lines/s"
+        )
+        return templates
+
+    @staticmethod
+    def list_templates(event_system_id, user, file_id):
+        """The LogTemplates of a file of an event system, the most frequent first; every member may see them."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+        if not UserSystemPermissions.objects.filter(user=user, event_system=event_system).exists():
+            raise PermissionError("You do not have access to this EventSystem.")
+        file_reference = FileReference.objects.get(id=file_id, event_system_links__event_system=event_system)
+        return LogTemplate.objects.filter(file_reference=file_reference, event_system=event_system).order_by('rank')
+
+    @staticmethod
+    def accept_template(event_system_id, user, template_id):
+        """
+        Return the LogsPattern of a LogTemplate, created if it does not exist yet. It is not assigned: it can
+        be profiled on the event system, then assigned like any other pattern.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+        TemplateMiningService.check_permission(event_system, user)
+        template = LogTemplate.objects.get(id=template_id, event_system=event_system)
+        # Raises ValueError if the configured engine cannot run the pattern
+        compile_pattern(template.pattern, **engine_options())
+
+        logs_pattern, _ = LogsPattern.objects.get_or_create(pattern=template.pattern)
+        return logs_pattern
+
+    @staticmethod
+    def check_permission(event_system, user):
+        """Raise PermissionError unless the user may propose patterns for the event system."""
+        try:
+            user_permission = UserSystemPermissions.objects.get(user=user, event_system=event_system)
+        except UserSystemPermissions.DoesNotExist:
+            raise PermissionError("You do not have permission to propose patterns for this EventSystem.")
+
+        allowed_roles = {
+            UserSystemPermissions.PermissionLevel.EDITOR,
+            UserSystemPermissions.PermissionLevel.ADMIN,
+            UserSystemPermissions.PermissionLevel.OWNER
+        }
+        if user_permission.permission_level not in allowed_roles:
+            raise PermissionError("You do not have permission to propose patterns for this EventSystem.")
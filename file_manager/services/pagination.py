@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(ordering, value, pk):
+    """Opaque cursor pointing right after the row with the given sort value and primary key."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'o': ordering, 'v': value, 'pk': str(pk)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering, model=None):
+    """
+    Return the (sort value, primary key) stored in a cursor; raises ValueError if it is invalid.
+    With `model`, both are converted to the type of their field, so a tampered cursor cannot reach the query.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, pk = payload['v'], payload['pk']
+        cursor_ordering = payload['o']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+    if cursor_ordering != ordering:
+        raise ValueError("The cursor was created with a different ordering.")
+    if model is None:
+        return value, pk
+
+    try:
+        value = model._meta.get_field(ordering.lstrip('-')).to_python(value)
+        pk = model._meta.pk.to_python(pk)
+    except (ValidationError, ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    # None cannot be compared to, and the sort fields are never null
+    if value is None or pk is None:
+        raise ValueError("Invalid cursor.")
+    return value, pk
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=50):
+    """
+    Return one page of `queryset` sorted by `ordering` ('field' or '-field') then primary key, and the
+    cursor of the next page (None on the last page).
+    Instead of an OFFSET, the page starts right after the last row of the previous one
+    (WHERE (field, pk) > (value, last pk)), so every page costs the same however deep it is,
+    and no COUNT query is needed.
+    """
+    descending = ordering.startswith('-')
+    field = ordering.lstrip('-')
+    pk_name = queryset.model._meta.pk.name
+
+    if cursor:
+        value, pk = decode_cursor(cursor, ordering, queryset.model)
+        if descending:
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, f'{pk_name}__lt': pk}))
+        else:
+            queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, f'{pk_name}__gt': pk}))
+
+    sign = '-' if descending else ''
+    # One extra row tells whether there is a next page
+    items = list(queryset.order_by(f'{sign}{field}', f'{sign}{pk_name}')[:page_size + 1])
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(ordering, getattr(last, field), getattr(last, pk_name))
+    return items, next_cursor
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from loguru import logger
+
+from core.models import EventSystemConfiguration, FileReference, LogsPattern, StoredBlob
+from file_manager.parsing.cache import get_compiled_pattern
+from file_manager.parsing.multi import MultiPatternMatcher
+from file_manager.parsing.parallel import discard_events, parse_file_parallel
+from file_manager.parsing.parser import LogParser, iter_lines
+from file_manager.services.services import EventSystemFileService
+
+
+class LogParsingService:
+    """Parses the event files of an event system with the LogsPattern of its configuration."""
+
+    @staticmethod
+    def get_parser(event_system):
+        """
+        Return a LogParser for the LogsPattern and timezone configured for an event system.
+        The pattern is only compiled once per process, see CompiledPatternCache.
+        """
+        configuration = EventSystemConfiguration.objects.select_related('logs_pattern').get(event_system=event_system)
+        return LogParser(
+            get_compiled_pattern(configuration.logs_pattern),
+            ZoneInfo(configuration.get_timezone_display())
+        )
+
+    @staticmethod
+    def parse_file(file_reference, parser, batch_size=None, chunk_size=None):
+        """
+        Yield the LogEvents of a stored file in lists of at most `batch_size` (LOG_PARSE_BATCH_SIZE) events.
+        The content is streamed from its storage provider (and decompressed) chunk by chunk, whatever its size.
+        """
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+
+        started = time.perf_counter()
+        yield from parser.parse_stream(
+            EventSystemFileService.iter_file_content(file_reference, chunk_size),
+            batch_size or settings.LOG_PARSE_BATCH_SIZE
+        )
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Parsed {file_reference.file_name}: {parser.lines} lines, {parser.match_rate:.1%} matched, "
+            f"{parser.bytes / (1024 * 1024) / elapsed if elapsed else 0:.1f} MB/s"
+        )
+
+    @staticmethod
+    def detect_patterns(file_reference, logs_patterns=None, max_lines=None):
+        """
+        Try LogsPatterns (all of them by default) on the first lines of a stored file (LOG_PATTERN_DETECTION_LINES)
+        to find the ones fitting a file of unknown format, or the formats of a file mixing several. Returns
+        (LogsPattern, matched lines, match rate) tuples, best first. Patterns that do not compile are skipped.
+        """
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+
+        candidates = []
+        for logs_pattern in (LogsPattern.objects.all() if logs_patterns is None else logs_patterns):
+            try:
+                candidates.append((logs_pattern, get_compiled_pattern(logs_pattern)))
+            except ValueError as e:
+                logger.warning(f"Skipping invalid LogsPattern {logs_pattern.id}: {str(e)}")
+        matcher = MultiPatternMatcher(compiled for _, compiled in candidates)
+
+        counts = [0] * len(candidates)
+        line_count = 0
+        lines = iter_lines(EventSystemFileService.iter_file_content(file_reference))
+        for line in islice(lines, max_lines or settings.LOG_PATTERN_DETECTION_LINES):
+            line_count += 1
+            for index in matcher.matching(line):
+                counts[index] += 1
+
+        results = [
+            (logs_pattern, count, count / line_count if line_count else 0.0)
+            for (logs_pattern, _), count in zip(candidates, counts)
+        ]
+        return sorted(results, key=lambda result: result[1], reverse=True)
+
+    @staticmethod
+    def parse_file_in_parallel(file_reference, parser, consumer=discard_events, workers=None, range_size=None,
+                               ordered=True):
+        """
+        Parse a stored file in byte ranges on a pool of processes (LOG_PARSE_WORKERS, ranges of
+        LOG_PARSE_RANGE_SIZE bytes) with the pattern, timezone and multi-line mode of `parser`, and yield the
+        RangeResults (in file order unless not `ordered`), see file_manager.parsing.parallel.parse_file_parallel.
+        `parser` gets the totals.
+        """
+        if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+            raise ValueError("The file is not available yet, its upload is not complete.")
+
+        started = time.perf_counter()
+        with LogParsingService.local_copy(file_reference) as path:
+            parser.bytes += os.path.getsize(path)
+            for result in parse_file_parallel(
+                path,
+                parser.pattern.source,
+                parser.tzinfo,
+                parser.multiline,
+                workers=workers or settings.LOG_PARSE_WORKERS,
+                range_size=range_size or settings.LOG_PARSE_RANGE_SIZE,
+                consumer=consumer,
+                engine=parser.pattern.engine,
+                timeout=parser.pattern.timeout,
+                ordered=ordered
+            ):
+                parser.lines += result.lines
+                parser.matched += result.matched
+                parser.continued += result.continued
+                yield result
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Parsed {file_reference.file_name} in parallel: {parser.lines} lines, {parser.match_rate:.1%} matched, "
+            f"{parser.bytes / (1024 * 1024) / elapsed if elapsed else 0:.1f} MB/s"
+        )
+
+    @staticmethod
+    @contextmanager
+    def local_copy(file_reference):
+        """
+        Yield the path of a local file holding the original content of a stored file, which can be read by
+        byte ranges. Uncompressed local (or cached) content is used in place, anything else is first
+        decompressed into a temporary file of the staging area, removed afterwards.
+        """
+        blob = file_reference.blob
+        if blob is None or blob.compression == StoredBlob.Compression.NONE:
+            path = EventSystemFileService.cached_content_path(file_reference)
+            if path is None:
+                driver, key = EventSystemFileService.stored_location(file_reference)
+                path = driver.local_path(key)
+            if path is not None:
+                yield path
+                return
+
+        staging_directory = os.path.join(settings.FILE_UPLOAD_STAGING_ROOT, 'parsing')
+        os.makedirs(staging_directory, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=staging_directory, suffix='.log')
+        try:
+            with os.fdopen(descriptor, 'wb') as local_file:
+                for chunk in EventSystemFileService.iter_file_content(file_reference):
+                    local_file.write(chunk)
+            yield path
+        finally:
+            os.remove(path)
@@ -0,0 +1,197 @@
+import heapq
+import time
+from itertools import islice
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from core.models import (
+    EventSystem, EventSystemConfiguration, FileReference, LogsPattern, PatternProfile,
+    UserSystemPermissions
+)
+from file_manager.parsing.cache import engine_options, get_compiled_pattern
+from file_manager.parsing.parser import LogParser, iter_lines
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.services import EventSystemFileService
+
+# Lines reported in a profile are truncated to this many characters
+PROFILE_LINE_LENGTH = 500
+
+
+class PatternProfilingService:
+    """
+    Profiles a candidate LogsPattern before it is assigned to an EventSystem: the pattern parses a sample of the
+    selected event files (LOGS_PATTERN_PROFILE_SAMPLE_LINES lines, shared between the files) and the
+    PatternProfile records its match rate, its throughput, the time it takes per line and the slowest lines.
+    """
+
+    @staticmethod
+    def request_profile(event_system_id, user, logs_pattern_id):
+        """Create a PENDING PatternProfile and profile the pattern in the background once it is committed."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+        PatternProfilingService.check_permission(event_system, user)
+        logs_pattern = LogsPattern.objects.get(id=logs_pattern_id)
+        # Raises ValueError if the configured engine cannot run the pattern
+        get_compiled_pattern(logs_pattern)
+
+        if not PatternProfilingService.sample_files(event_system).exists():
+            raise ValueError("Select at least one uploaded event file to profile the pattern on.")
+
+        # Imported here to avoid a circular import, the tasks module depends on this one
+        from file_manager.services.tasks import profile_pattern
+
+        with transaction.atomic():
+            profile = PatternProfile.objects.create(
+                event_system=event_system,
+                logs_pattern=logs_pattern,
+                user=user,
+                engine=engine_options()['engine']
+            )
+            transaction.on_commit(lambda: profile_pattern.delay(str(profile.id)))
+        return profile
+
+    @staticmethod
+    def get_profile(event_system_id, user, profile_id):
+        """Return a PatternProfile of an event system; every member may see it."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+        if not UserSystemPermissions.objects.filter(user=user, event_system=event_system).exists():
+            raise PermissionError("You do not have access to this EventSystem.")
+        return PatternProfile.objects.get(id=profile_id, event_system=event_system)
+
+    @staticmethod
+    def check_permission(event_system, user):
+        """Raise PermissionError unless the user may change the pattern of the event system."""
+        try:
+            user_permission = UserSystemPermissions.objects.get(user=user, event_system=event_system)
+        except UserSystemPermissions.DoesNotExist:
+            raise PermissionError("You do not have permission to profile patterns for this EventSystem.")
+
+        allowed_roles = {
+            UserSystemPermissions.PermissionLevel.EDITOR,
+            UserSystemPermissions.PermissionLevel.ADMIN,
+            UserSystemPermissions.PermissionLevel.OWNER
+        }
+        if user_permission.permission_level not in allowed_roles:
+            raise PermissionError("You do not have permission to profile patterns for this EventSystem.")
+
+    @staticmethod
+    def sample_files(event_system):
+        """The selected, uploaded event files of an event system, which profiles are run on."""
+        return FileReference.objects.filter(
+            event_system_links__event_system=event_system,
+            event_system_links__is_selected=True,
+            file_type=FileReference.FileType.EVENT_FILE,
+            upload_status=FileReference.UploadStatus.COMPLETE
+        ).order_by('upload_date', 'id')
+
+    @staticmethod
+    def run_profile(profile_id):
+        """Profile the pattern of a PENDING PatternProfile and store the results (or why it FAILED)."""
+        profile = PatternProfile.objects.select_related('event_system', 'logs_pattern').get(id=profile_id)
+        if profile.status != PatternProfile.ProfileStatus.PENDING:
+            return profile
+
+        profile.status = PatternProfile.ProfileStatus.RUNNING
+        profile.save(update_fields=['status'])
+        try:
+            PatternProfilingService.measure(profile)
+            profile.status = PatternProfile.ProfileStatus.COMPLETE
+        except Exception as e:
+            logger.exception(f"Profiling of LogsPattern {profile.logs_pattern_id} failed")
+            profile.status = PatternProfile.ProfileStatus.FAILED
+            profile.error = str(e)
+        profile.completed_at = timezone.now()
+        profile.save()
+        return profile
+
+    @staticmethod
+    def measure(profile, sample_lines=None, worst_lines=None):
+        """Parse the sample of a PatternProfile line by line, timing each line, and fill in its results."""
+        sample_lines = sample_lines or settings.LOGS_PATTERN_PROFILE_SAMPLE_LINES
+        worst_lines = worst_lines or settings.LOGS_PATTERN_PROFILE_WORST_LINES
+        # Compiled for this run only: the regex of the linear engine counts the lines it gives up on, and the
+        # cached one is shared with every parser (and profile) of the process
+        compiled = compile_pattern(profile.logs_pattern.pattern, **engine_options())
+        parser = LogParser(compiled, PatternProfilingService._timezone(profile.event_system))
+        files = list(PatternProfilingService.sample_files(profile.event_system))
+        if not files:
+            raise ValueError("No uploaded event file is selected.")
+
+        durations = []
+        # (microseconds, order, file, line number, line, matched) of the slowest lines so far, fastest first
+        slowest = []
+        unmatched = []
+        parse_line = parser.parse_line
+        clock = time.perf_counter
+        for position, file_reference in enumerate(files):
+            # What the previous files did not use is left to the next ones
+            share = -(-(sample_lines - len(durations)) // (len(files) - position))
+            lines = iter_lines(EventSystemFileService.iter_file_content(file_reference))
+            for line_number, line in enumerate(islice(lines, share), 1):
+                started = clock()
+                event = parse_line(line, line_number)
+                microseconds = (clock() - started) * 1000000
+                durations.append(microseconds)
+
+                entry = (microseconds, len(durations), file_reference, line_number, line, event is not None)
+                if len(slowest) < worst_lines:
+                    heapq.heappush(slowest, entry)
+                elif microseconds > slowest[0][0]:
+                    heapq.heapreplace(slowest, entry)
+                if event is None and len(unmatched) < worst_lines:
+                    unmatched.append(entry)
+
+        profile.file_count = len(files)
+        profile.line_count = parser.lines
+        profile.matched_count = parser.matched
+        profile.timeout_count = getattr(compiled.regex, 'timeouts', 0)
+        profile.match_rate = parser.match_rate
+        profile.worst_lines = [PatternProfilingService._line(entry) for entry in sorted(slowest, reverse=True)]
+        profile.unmatched_lines = [PatternProfilingService._line(entry) for entry in unmatched]
+        if durations:
+            total = sum(durations)
+            durations.sort()
+            profile.lines_per_second = len(durations) / (total / 1000000) if total else None
+            profile.mean_line_microseconds = total / len(durations)
+            profile.p99_line_microseconds = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+            profile.max_line_microseconds = durations[-1]
+
+        logger.info(
+            f"Profiled LogsPattern {profile.logs_pattern_id} on {parser.lines} lines: "
+            f"{parser.match_rate:.1%} matched, {profile.lines_per_second or 0:.0f} lines/s"
+        )
+        return profile
+
+    @staticmethod
+    def check_assignable(event_system, logs_pattern):
+        """
+        Raise ValueError if LOGS_PATTERN_REQUIRE_PROFILE is set and the pattern was not profiled successfully
+        for the event system yet.
+        """
+        if not settings.LOGS_PATTERN_REQUIRE_PROFILE:
+            return
+        if not PatternProfile.objects.filter(
+            event_system=event_system,
+            logs_pattern=logs_pattern,
+            status=PatternProfile.ProfileStatus.COMPLETE
+        ).exists():
+            raise ValueError("The LogsPattern must be profiled on this EventSystem before it is assigned.")
+
+    @staticmethod
+    def _timezone(event_system):
+        configuration = EventSystemConfiguration.objects.filter(event_system=event_system).first()
+        return ZoneInfo(configuration.get_timezone_display()) if configuration else None
+
+    @staticmethod
+    def _line(entry):
+        microseconds, _, file_reference, line_number, line, matched = entry
+        return {
+            'file_id': str(file_reference.id),
+            'file_name': file_reference.file_name,
+            'line_number': line_number,
+            'microseconds': round(microseconds, 3),
+            'matched': matched,
+            'line': line[:PROFILE_LINE_LENGTH],
+        }
@@ -0,0 +1,179 @@
+import time
+from itertools import islice
+from django.conf import settings
+from django.utils import timezone
+from loguru import logger
+
+from core.models import FileReference, StoredBlob
+from file_manager.services.blob_services import BlobStoreService
+from file_manager.storage.drivers import get_storage_driver
+
+
+class RateLimiter:
+    """Spaces calls to `wait()` so that at most `rate` operations run per second (no limit when rate is falsy)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+class StorageReconciliationService:
+    """
+    Finds what the storage providers and the database disagree on:
+    stored objects without a StoredBlob (a write that was never registered), StoredBlobs without content,
+    StoredBlobs no FileReference points to, and FileReferences whose upload never finished.
+    """
+    ACTIONS = ('report', 'quarantine', 'delete')
+    # Every content-addressed blob lives under this prefix (see BlobStoreService.storage_key)
+    BLOB_PREFIX = 'blobs/'
+    QUARANTINE_PREFIX = 'quarantine/'
+
+    @staticmethod
+    def reconcile(storage_provider, action='report', grace_period=None, page_size=None, max_deletes_per_second=None):
+        """
+        Reconcile one storage provider and return the number of problems found and fixed.
+
+        The provider's listing is streamed in key order, one page at a time, and each page is compared with
+        the StoredBlobs of the same key range with a single query, so memory stays bounded whatever the size
+        of the bucket. With `action` 'report' nothing is changed. With 'quarantine' orphaned content is moved
+        under quarantine/ (and can be restored), with 'delete' it is removed. Removals are rate limited.
+        Anything younger than `grace_period` may belong to an upload in progress and is left alone.
+        """
+        if action not in StorageReconciliationService.ACTIONS:
+            raise ValueError(f"Action must be one of: {', '.join(StorageReconciliationService.ACTIONS)}.")
+
+        driver = get_storage_driver(storage_provider)
+        cutoff = timezone.now() - (settings.STORAGE_RECONCILE_GRACE_PERIOD if grace_period is None else grace_period)
+        page_size = page_size or settings.STORAGE_RECONCILE_PAGE_SIZE
+        limiter = RateLimiter(
+            settings.STORAGE_RECONCILE_MAX_DELETES_PER_SECOND if max_deletes_per_second is None
+            else max_deletes_per_second
+        )
+        report = {
+            'scanned': 0,
+            'orphaned_objects': 0,
+            'removed_objects': 0,
+            'missing_content': 0,
+            'unreferenced_blobs': 0,
+            'removed_blobs': 0,
+            'failed_uploads': 0,
+        }
+
+        def remove_content(key):
+            limiter.wait()
+            if action == 'quarantine':
+                driver.move(key, StorageReconciliationService.QUARANTINE_PREFIX + key)
+            else:
+                driver.delete(key)
+
+        blobs = StoredBlob.objects.filter(
+            storage_provider=storage_provider,
+            storage_key__startswith=StorageReconciliationService.BLOB_PREFIX
+        )
+
+        def check_missing(blob_ids):
+            missing, failed = StorageReconciliationService.handle_missing_content(driver, blob_ids, action)
+            report['missing_content'] += missing
+            report['failed_uploads'] += failed
+
+        previous_key = None
+        listing = driver.list(StorageReconciliationService.BLOB_PREFIX)
+        while True:
+            page = list(islice(listing, page_size))
+            if not page:
+                break
+            report['scanned'] += len(page)
+            stored = {item.key: item for item in page}
+
+            # StoredBlobs whose key falls in the range covered by this page of the listing
+            page_blobs = blobs.filter(storage_key__lte=page[-1].key)
+            if previous_key is not None:
+                page_blobs = page_blobs.filter(storage_key__gt=previous_key)
+            known = dict(page_blobs.values_list('storage_key', 'id'))
+            previous_key = page[-1].key
+
+            check_missing([blob_id for key, blob_id in known.items() if key not in stored])
+
+            for key in stored.keys() - known.keys():
+                modified_at = stored[key].modified_at
+                if modified_at is not None and modified_at > cutoff:
+                    continue
+                report['orphaned_objects'] += 1
+                logger.warning(f"Orphaned object {key} in {FileReference.StorageProvider(storage_provider).label}")
+
+                # Checked again right before the removal, the content may have been registered meanwhile
+                if action == 'report' or blobs.filter(storage_key=key).exists():
+                    continue
+                remove_content(key)
+                report['removed_objects'] += 1
+
+        if previous_key is None and blobs.exists():
+            # Most likely a misconfigured provider (wrong bucket or root), not content that vanished
+            logger.error("Storage listing is empty although blobs are registered, skipping the missing content check")
+        else:
+            # StoredBlobs sorted after the last listed key
+            tail = blobs.filter(storage_key__gt=previous_key) if previous_key is not None else blobs
+            tail_ids = tail.values_list('id', flat=True).iterator()
+            while True:
+                blob_ids = list(islice(tail_ids, page_size))
+                if not blob_ids:
+                    break
+                check_missing(blob_ids)
+
+        unreferenced = StoredBlob.objects.filter(
+            storage_provider=storage_provider,
+            created_at__lt=cutoff,
+            file_references__isnull=True
+        ).values_list('id', flat=True)
+        for blob_id in unreferenced.iterator():
+            report['unreferenced_blobs'] += 1
+            if action == 'report':
+                continue
+            if BlobStoreService.delete_unreferenced(blob_id, lambda blob: remove_content(blob.storage_key)):
+                report['removed_blobs'] += 1
+
+        # Uploads that stopped before their content was stored never leave PENDING/PROCESSING on their own
+        stale_uploads = FileReference.objects.filter(
+            storage_provider=storage_provider,
+            blob__isnull=True,
+            upload_status__in=[FileReference.UploadStatus.PENDING, FileReference.UploadStatus.PROCESSING],
+            upload_date__lt=cutoff
+        )
+        if action == 'report':
+            report['failed_uploads'] += stale_uploads.count()
+        else:
+            report['failed_uploads'] += stale_uploads.update(upload_status=FileReference.UploadStatus.FAILED)
+
+        logger.info(f"Storage reconciliation of {FileReference.StorageProvider(storage_provider).label}: {report}")
+        return report
+
+    @staticmethod
+    def handle_missing_content(driver, blob_ids, action):
+        """
+        Mark the files of StoredBlobs whose content is not in storage as FAILED.
+        Each blob is checked again first, it may have been deleted (or written) since the listing.
+        Returns the number of blobs without content and the number of files marked FAILED.
+        """
+        if not blob_ids:
+            return 0, 0
+
+        missing = []
+        for blob in StoredBlob.objects.filter(id__in=blob_ids).only('id', 'storage_key').iterator():
+            if driver.stat(blob.storage_key) is None:
+                logger.error(f"Content of blob {blob.storage_key} is missing from storage")
+                missing.append(blob.id)
+
+        if not missing:
+            return 0, 0
+        files = FileReference.objects.filter(blob_id__in=missing).exclude(upload_status=FileReference.UploadStatus.FAILED)
+        if action == 'report':
+            return len(missing), files.count()
+        return len(missing), files.update(upload_status=FileReference.UploadStatus.FAILED)
@@ -1,124 +1,418 @@
-from core.models import EventSystem, FileReference, UserSystemPermissions, EventSystemConfiguration, LogsPattern
+from core.models import (
+    EventSegment, EventSystem, EventSystemFile, EventSystemUsage, FileReference, StoredBlob, UserSystemPermissions,
+    EventSystemConfiguration, LogsPattern
+)
 import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import boto3
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.db import IntegrityError, connection, transaction
 from loguru import logger
-import paramiko
+from file_manager.services.blob_services import BlobStoreService
+from file_manager.services.pagination import keyset_page
+from file_manager.services.streaming import copy_stream, file_sha256, iter_chunks
+from file_manager.services.usage_services import StorageUsageService
+from file_manager.storage.cache import get_blob_cache
+from file_manager.storage.drivers import get_storage_driver
+from file_manager.storage.compression import CompressingReader, FILE_EXTENSIONS, iter_decompressed, select_compression
+
+class UploadProgressRecorder:
+    """
+    Progress callback for storage transfers: accumulates the bytes sent and records them on the
+    FileReference at most once per `interval` seconds. Thread-safe, as S3 multipart uploads call it from several threads.
+    """
+
+    def __init__(self, file_reference_id, interval=1.0):
+        self.file_reference_id = file_reference_id
+        self.interval = interval
+        self.bytes_sent = 0
+        self._last_saved = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self.bytes_sent += bytes_amount
+            now = time.monotonic()
+            if now - self._last_saved < self.interval:
+                return
+            self._last_saved = now
+            bytes_sent = self.bytes_sent
+        FileReference.objects.filter(id=self.file_reference_id).update(uploaded_bytes=bytes_sent)
+
 
 class EventSystemFileService:
     @staticmethod
     def upload_file(file, event_system_id, user, storage_provider):
-        """Save file to local storage or s3 or scp and create a FileReference entry."""
+        """
+        Create a FileReference entry for an uploaded file and write it to its storage provider.
+        Content already stored in the provider (same SHA-256) is shared instead of being written again.
+        Otherwise local files are stored right away, while files for remote providers are staged on local
+        disk and transferred by a Celery task; their FileReference stays PENDING/PROCESSING until then.
+        """
 
         event_system = EventSystem.objects.get(id=event_system_id)
+        EventSystemFileService.check_upload_permission(event_system, user)
 
-        try:
-            user_permission = UserSystemPermissions.objects.get(user=user, event_system=event_system)
-        except UserSystemPermissions.DoesNotExist:
-            raise PermissionError("You do not have permission to upload files to this EventSystem.")
+        driver = get_storage_driver(storage_provider)
+        if not driver.available:
+            raise ValueError(f"{FileReference.StorageProvider(storage_provider).label} storage is not supported yet.")
 
-        # Only allow users with 'Editor', 'Admin', or 'Owner' permissions to upload files
-        allowed_roles = {
-            UserSystemPermissions.PermissionLevel.EDITOR,
-            UserSystemPermissions.PermissionLevel.ADMIN,
-            UserSystemPermissions.PermissionLevel.OWNER
-        }
+        # Check if a file with the same name already exists in this event system
+        if EventSystemFile.objects.filter(event_system=event_system, file_name=file.name).exists():
+            raise FileExistsError("A file with the same name already exists.")
 
-        if user_permission.permission_level not in allowed_roles:
-            raise PermissionError("You do not have permission to upload files to this EventSystem.")
+        # Fail fast, the quota is enforced again when the file is counted below
+        StorageUsageService.check_quota(event_system, file.size)
+
+        # Uploads handled by HashingFileUploadHandler were already hashed while being received
+        checksum = file_sha256(file)
+
+        with transaction.atomic():
+            # Create FileReference entry
+            file_reference = FileReference.objects.create(
+                file_name=file.name,
+                storage_provider=storage_provider,
+                size=file.size,
+                checksum=checksum,
+                upload_status=FileReference.UploadStatus.PENDING,
+                file_type=FileReference.FileType.EVENT_FILE
+            )
 
-        # Check if a file with the same name already exists in this event system
-        existing_file = event_system.file_objects.filter(file_name=file.name).first()
-        if existing_file:
+            # Associate file with EventSystem, nothing is stored if it does not fit in the quota
+            StorageUsageService.add_file(event_system, file_reference)
+            EventSystemFileService.link_files(event_system, [file_reference])
+
+            # Identical content is already stored: nothing has to be transferred
+            blob = BlobStoreService.acquire(checksum, storage_provider)
+            if blob:
+                logger.info(f"Upload of {file.name} deduplicated against blob {blob.sha256}")
+                EventSystemFileService.attach_blob(file_reference, blob)
+            elif driver.remote:
+                staged_path = EventSystemFileService.stage_file(file, file_reference.id)
+                EventSystemFileService.finalize_upload(file_reference, staged_path)
+            else:
+                blob = EventSystemFileService.store_content(file, checksum, file_reference.size, storage_provider)
+                EventSystemFileService.attach_blob(file_reference, blob)
+
+        return file_reference
+
+    @staticmethod
+    def upload_files(files, event_system_id, user, storage_provider):
+        """
+        Upload several files to an event system at once, see upload_file.
+        The whole batch is checked (permission, name conflicts, quota) before anything is stored, and all the
+        FileReferences and their associations are inserted in bulk. Files for remote providers are transferred
+        by a single Celery task, a few at a time (FILE_UPLOAD_MAX_CONCURRENCY).
+        """
+        if not files:
+            raise ValueError("No files were uploaded.")
+
+        event_system = EventSystem.objects.get(id=event_system_id)
+        EventSystemFileService.check_upload_permission(event_system, user)
+
+        driver = get_storage_driver(storage_provider)
+        if not driver.available:
+            raise ValueError(f"{FileReference.StorageProvider(storage_provider).label} storage is not supported yet.")
+
+        names = [file.name for file in files]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Several uploaded files are named {', '.join(duplicates)}.")
+
+        # A single query for the name conflicts of the whole batch
+        existing = sorted(EventSystemFile.objects.filter(
+            event_system=event_system,
+            file_name__in=names
+        ).values_list('file_name', flat=True))
+        if existing:
+            raise FileExistsError(f"Files with the same name already exist: {', '.join(existing)}.")
+
+        # Fail fast, the quota is enforced again when the files are counted below
+        StorageUsageService.check_quota(event_system, sum(file.size for file in files), len(files))
+
+        file_references = [
+            FileReference(
+                file_name=file.name,
+                storage_provider=storage_provider,
+                size=file.size,
+                # Uploads handled by HashingFileUploadHandler were already hashed while being received
+                checksum=file_sha256(file),
+                upload_status=FileReference.UploadStatus.PENDING,
+                file_type=FileReference.FileType.EVENT_FILE
+            )
+            for file in files
+        ]
+
+        staged = []
+        with transaction.atomic():
+            # Nothing is stored if the batch does not fit in the quota
+            StorageUsageService.add_files(event_system, file_references)
+
+            for file, file_reference in zip(files, file_references):
+                # Identical content is already stored: nothing has to be transferred
+                blob = BlobStoreService.acquire(file_reference.checksum, storage_provider)
+                if blob is None and driver.remote:
+                    staged.append((str(file_reference.id), EventSystemFileService.stage_file(file, file_reference.id)))
+                    continue
+                if blob is None:
+                    blob = EventSystemFileService.store_content(
+                        file, file_reference.checksum, file_reference.size, storage_provider
+                    )
+                else:
+                    logger.info(f"Upload of {file.name} deduplicated against blob {blob.sha256}")
+                file_reference.blob = blob
+                file_reference.url = blob.url
+                file_reference.uploaded_bytes = file_reference.size
+                file_reference.upload_status = FileReference.UploadStatus.COMPLETE
+
+            FileReference.objects.bulk_create(file_references)
+            EventSystemFileService.link_files(event_system, file_references)
+
+            if staged:
+                # Imported here to avoid a circular import, the tasks module depends on this one
+                from file_manager.services.tasks import finalize_file_uploads
+
+                transaction.on_commit(lambda: finalize_file_uploads.delay(staged))
+
+        return file_references
+
+    @staticmethod
+    def link_files(event_system, file_references):
+        """
+        Add files to an event system. Raises FileExistsError if one of their names is taken, the unique
+        index on (event system, file name) rejects conflicts even between concurrent uploads.
+        """
+        try:
+            with transaction.atomic():
+                return EventSystemFile.objects.bulk_create([
+                    EventSystemFile(
+                        event_system=event_system,
+                        file_reference=file_reference,
+                        file_name=file_reference.file_name,
+                        upload_date=file_reference.upload_date
+                    )
+                    for file_reference in file_references
+                ])
+        except IntegrityError:
             raise FileExistsError("A file with the same name already exists.")
 
-        if storage_provider == FileReference.StorageProvider.S3:
-            # Upload to S3
-            file_url = EventSystemFileService.upload_to_s3(file, file.name)
+    @staticmethod
+    def complete_staged_uploads(uploads, max_workers=None):
+        """
+        Run complete_staged_upload for several (file_reference_id, staged_path) pairs, at most `max_workers`
+        (FILE_UPLOAD_MAX_CONCURRENCY) transfers at a time. Returns the (file_reference_id, staged_path, error)
+        of the transfers that failed; files deleted in the meantime have their staged copy discarded.
+        """
+        def complete(upload):
+            file_reference_id, staged_path = upload
+            try:
+                EventSystemFileService.complete_staged_upload(file_reference_id, staged_path)
+            except FileReference.DoesNotExist:
+                logger.warning(f"File {file_reference_id} no longer exists, discarding its staged upload")
+                if os.path.exists(staged_path):
+                    os.remove(staged_path)
+            except Exception as e:
+                return file_reference_id, staged_path, e
+            finally:
+                # Each worker thread opens its own database connection
+                connection.close()
+            return None
+
+        max_workers = max_workers or settings.FILE_UPLOAD_MAX_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads)))) as executor:
+            return [failure for failure in executor.map(complete, uploads) if failure is not None]
 
-        elif storage_provider == FileReference.StorageProvider.SCP:
-            # SCP upload
-            file_url = EventSystemFileService.upload_to_scp(file, file.name)
+    @staticmethod
+    def attach_blob(file_reference, blob):
+        """Point a FileReference at its stored content and mark it COMPLETE."""
+        file_reference.blob = blob
+        file_reference.url = blob.url
+        file_reference.uploaded_bytes = file_reference.size
+        file_reference.upload_status = FileReference.UploadStatus.COMPLETE  # Mark as complete
+        file_reference.save(update_fields=['blob', 'url', 'uploaded_bytes', 'upload_status'])
+        return file_reference
 
+    @staticmethod
+    def store_content(file, checksum, size, storage_provider, progress=None):
+        """
+        Add a reference to the content of a file in a storage provider and return its StoredBlob.
+        The bytes are only written if that provider does not hold the same content yet, compressed
+        on the fly with the codec selected by FILE_COMPRESSION.
+        """
+        blob = BlobStoreService.acquire(checksum, storage_provider)
+        if blob:
+            return blob
+
+        driver = get_storage_driver(storage_provider)
+        compression = select_compression(file.name or '')
+        storage_key = BlobStoreService.storage_key(checksum, FILE_EXTENSIONS[compression])
+        if compression == StoredBlob.Compression.NONE:
+            url = driver.write(storage_key, file, progress)
+            stored_size = size
         else:
-            # Upload to local storage
-            file_path = os.path.join('event_system', str(event_system_id), file.name)
-            saved_path = default_storage.save(file_path, ContentFile(file.read()))
-            file_url = settings.MEDIA_URL + saved_path
-
-        # Create FileReference entry
-        file_reference = FileReference.objects.create(
-            file_name=file.name,
-            url=file_url,
-            storage_provider=storage_provider,
-            size=file.size,
-            upload_status=FileReference.UploadStatus.COMPLETE,  # Mark as complete
-            file_type=FileReference.FileType.EVENT_FILE
+            # Progress is reported in uncompressed bytes, like FileReference.size
+            reader = CompressingReader(file, compression, progress=progress)
+            url = driver.write(storage_key, File(reader, name=storage_key))
+            stored_size = reader.bytes_out
+            logger.debug(f"Compressed {size} bytes to {stored_size} ({compression.label})")
+
+        return BlobStoreService.register(
+            checksum, storage_provider, storage_key, url, size,
+            compression=compression,
+            stored_size=stored_size
         )
 
-        # Associate file with EventSystem
-        event_system.file_objects.add(file_reference)
+    @staticmethod
+    def iter_file_content(file_reference, chunk_size=None):
+        """Yield the original content of a stored file in chunks, decompressing it while it is read."""
+        compression = file_reference.blob.compression if file_reference.blob else StoredBlob.Compression.NONE
+        yield from iter_decompressed(EventSystemFileService.read_stored_content(file_reference, chunk_size), compression)
 
-        return file_reference
+    @staticmethod
+    def read_stored_content(file_reference, chunk_size=None, offset=0):
+        """Yield the bytes of a file exactly as they are stored (possibly compressed), starting at `offset`."""
+        cached_path = EventSystemFileService.cached_content_path(file_reference)
+        if cached_path:
+            with open(cached_path, 'rb') as cached_file:
+                cached_file.seek(offset)
+                yield from iter_chunks(cached_file, chunk_size)
+            return
+
+        driver, key = EventSystemFileService.stored_location(file_reference)
+        yield from driver.read(key, chunk_size, offset)
 
     @staticmethod
-    def upload_to_s3(file, file_name):
-        """Upload file to AWS S3 and return the file URL."""
-        try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-            )
-            s3_client.upload_fileobj(file, settings.AWS_STORAGE_BUCKET_NAME, file_name)
+    def cached_content_path(file_reference):
+        """
+        Local path of a copy of the stored bytes of a remote file, downloaded into the file cache on the first read.
+        Returns None when the content is read straight from storage (local or legacy files, files larger than
+        FILE_CACHE_MAX_FILE_BYTES, cache disabled).
+        """
+        blob = file_reference.blob
+        cache = get_blob_cache()
+        if cache is None or blob is None or blob.stored_size > settings.FILE_CACHE_MAX_FILE_BYTES:
+            return None
+        driver = get_storage_driver(blob.storage_provider)
+        if not driver.remote:
+            return None
+
+        def fetch(destination):
+            for chunk in driver.read(blob.storage_key):
+                destination.write(chunk)
+
+        return cache.get(blob.storage_provider, blob.storage_key, fetch)
 
-            file_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{file_name}"
-            return file_url
+    @staticmethod
+    def stored_location(file_reference):
+        """
+        Return the storage driver and key holding the content of a file.
+        Files stored before content-addressed blobs were introduced are located from their own URL.
+        """
+        blob = file_reference.blob
+        if blob:
+            return get_storage_driver(blob.storage_provider), blob.storage_key
+
+        driver = get_storage_driver(file_reference.storage_provider)
+        return driver, driver.key_from_url(file_reference.url)
 
-        except NoCredentialsError:
-            raise ValueError("AWS credentials not found.")
-        except PartialCredentialsError:
-            raise ValueError("AWS credentials are incomplete.")
-        except Exception as e:
-            raise ValueError(f"Error uploading file to S3: {str(e)}")
+    @staticmethod
+    def staged_file_path(file_reference_id):
+        """Local path where a file waiting to be transferred to its storage provider is kept."""
+        return os.path.join(settings.FILE_UPLOAD_STAGING_ROOT, 'files', str(file_reference_id))
 
     @staticmethod
-    def upload_to_scp(file, file_name):
-        """Upload file to a remote server via SCP and return the file URL."""
-        try:
-            # SCP configuration
-            scp_host = settings.SCP_HOST
-            scp_port = settings.SCP_PORT
-            scp_user = settings.SCP_USER
-            scp_password = settings.SCP_PASSWORD
-            scp_remote_path = settings.SCP_REMOTE_PATH
+    def stage_file(file, file_reference_id):
+        """Move (or stream) an uploaded file into the local staging area and return its path."""
+        staged_path = EventSystemFileService.staged_file_path(file_reference_id)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+
+        if hasattr(file, 'temporary_file_path'):
+            # The upload is already on disk, a rename is enough
+            file_move_safe(file.temporary_file_path(), staged_path, allow_overwrite=True)
+        else:
+            with open(staged_path, 'wb') as staged_file:
+                copy_stream(file, staged_file)
+        return staged_path
 
-            # Create an SSH client
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh_client.connect(scp_host, port=scp_port, username=scp_user, password=scp_password)
+    @staticmethod
+    def finalize_upload(file_reference, staged_path):
+        """
+        Transfer a staged file to its storage provider: inline for local storage,
+        in a Celery task (started once the current transaction commits) for remote providers.
+        """
+        if not get_storage_driver(file_reference.storage_provider).remote:
+            return EventSystemFileService.complete_staged_upload(file_reference.id, staged_path)
+
+        # Imported here to avoid a circular import, the tasks module depends on this one
+        from file_manager.services.tasks import finalize_file_upload
+
+        file_reference_id = str(file_reference.id)
+        transaction.on_commit(lambda: finalize_file_upload.delay(file_reference_id, staged_path))
+        return file_reference
 
-            # Upload file using SCP
-            scp = paramiko.SFTPClient.from_transport(ssh_client.get_transport())
-            remote_file_path = os.path.join(scp_remote_path, file_name)
+    @staticmethod
+    def complete_staged_upload(file_reference_id, staged_path):
+        """Write a staged file to its storage provider (unless its content is stored already) and mark it COMPLETE."""
+        file_reference = FileReference.objects.get(id=file_reference_id)
+        FileReference.objects.filter(id=file_reference_id).update(
+            upload_status=FileReference.UploadStatus.PROCESSING,
+            uploaded_bytes=0
+        )
 
-            # Save the file to the remote server
-            with scp.open(remote_file_path, 'wb') as remote_file:
-                remote_file.write(file.read())
-            scp.close()
+        progress = UploadProgressRecorder(file_reference_id)
+        with open(staged_path, 'rb') as staged_file:
+            staged = File(staged_file, name=file_reference.file_name)
+            blob = EventSystemFileService.store_content(
+                staged,
+                file_reference.checksum or file_sha256(staged),
+                file_reference.size,
+                file_reference.storage_provider,
+                progress=progress
+            )
 
-            # Close the SSH connection
-            ssh_client.close()
+        updated = FileReference.objects.filter(id=file_reference_id).update(
+            blob=blob,
+            url=blob.url,
+            uploaded_bytes=file_reference.size,
+            upload_status=FileReference.UploadStatus.COMPLETE
+        )
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
 
-            # Construct the URL (or return the remote path as URL)
-            file_url = f"scp://{scp_host}/{remote_file_path}"
-            return file_url
+        if not updated:
+            # The file was deleted while it was being transferred
+            BlobStoreService.release(blob.id, EventSystemFileService.delete_content)
+            raise FileReference.DoesNotExist(f"File {file_reference_id} was deleted during the upload.")
 
-        except Exception as e:
-            raise ValueError(f"Error uploading file to SCP: {str(e)}")
+        file_reference.refresh_from_db()
+        return file_reference
+
+    @staticmethod
+    def check_upload_permission(event_system, user):
+        """Raise PermissionError unless the user may upload files to the event system."""
+        try:
+            user_permission = UserSystemPermissions.objects.get(user=user, event_system=event_system)
+        except UserSystemPermissions.DoesNotExist:
+            raise PermissionError("You do not have permission to upload files to this EventSystem.")
+
+        # Only allow users with 'Editor', 'Admin', or 'Owner' permissions to upload files
+        allowed_roles = {
+            UserSystemPermissions.PermissionLevel.EDITOR,
+            UserSystemPermissions.PermissionLevel.ADMIN,
+            UserSystemPermissions.PermissionLevel.OWNER
+        }
+
+        if user_permission.permission_level not in allowed_roles:
+            raise PermissionError("You do not have permission to upload files to this EventSystem.")
+
+    @staticmethod
+    def delete_content(blob):
+        """Delete the bytes of a StoredBlob from its storage provider."""
+        get_storage_driver(blob.storage_provider).delete(blob.storage_key)
 
     @staticmethod
     def delete_file(event_system_id, file_id, user):
@@ -142,26 +436,48 @@ class EventSystemFileService:
             raise PermissionError("You do not have permission to delete this file.")
 
         # Ensure file belongs to the event system
-        if not event_system.file_objects.filter(id=file_id).exists():
+        if not EventSystemFile.objects.filter(event_system=event_system, file_reference=file_reference).exists():
             raise ValueError("File does not belong to this EventSystem.")
 
-        # Remove the file reference from the EventSystem's Many-to-Many relationship
-        event_system.file_objects.remove(file_reference)
+        # The event segments parsed from the file go with it
+        for segment in EventSegment.objects.filter(source_file=file_reference).select_related('file_reference'):
+            EventSystemFileService.remove_file(segment.event_system_id, segment.file_reference)
 
-        # Delete the file from local storage
-        relative_path = file_reference.url.replace(settings.MEDIA_URL, "").lstrip("/")
-        file_path = os.path.join(settings.MEDIA_ROOT, relative_path)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        EventSystemFileService.remove_file(event_system, file_reference)
+        return file_id
+
+    @staticmethod
+    def remove_file(event_system, file_reference):
+        """Remove a file from an event system and delete it, releasing its content. No permission is checked."""
+
+        # Remove the file reference from the EventSystem
+        StorageUsageService.remove_files([file_reference.id])
+        EventSystemFile.objects.filter(event_system=event_system, file_reference=file_reference).delete()
+
+        if file_reference.blob_id:
+            # The content may be shared with other files, only drop this reference to it
+            file_reference.delete()
+            BlobStoreService.release(file_reference.blob_id, EventSystemFileService.delete_content)
+            return
+
+        EventSystemFileService.delete_legacy_file(file_reference.storage_provider, file_reference.url)
 
         # Remove the file reference from DB
         file_reference.delete()
 
-        return file_id
+    @staticmethod
+    def delete_legacy_file(storage_provider, url):
+        """Delete a file stored before content-addressed blobs were introduced."""
+        driver = get_storage_driver(storage_provider)
+        driver.delete(driver.key_from_url(url))
 
     @staticmethod
     def update_file_name(event_system_id, file_id, new_file_name, user):
-        """Update the file name for the given event system and file ID."""
+        """
+        Update the file name for the given event system and file ID. Only the name in this event system
+        changes: a file shared with other event systems keeps its name there, and its FileReference the
+        name it was uploaded with.
+        """
 
         event_system = EventSystem.objects.get(id=event_system_id)
         file_reference = FileReference.objects.get(id=file_id)
@@ -182,37 +498,63 @@ class EventSystemFileService:
             raise PermissionError("You do not have permission to update this file name.")
 
         # Ensure the file belongs to the event system
-        if not event_system.file_objects.filter(id=file_id).exists():
+        links = EventSystemFile.objects.filter(event_system=event_system)
+        link = links.filter(file_reference=file_reference).first()
+        if link is None:
             raise ValueError("File does not belong to this EventSystem.")
 
         # Check if the new file name is the same as the current one
-        if file_reference.file_name == new_file_name:
+        if link.file_name == new_file_name:
             raise ValueError("The new file name is the same as the existing one. No update needed.")
 
         # Check if a file with the same name already exists in this event system
-        existing_file = event_system.file_objects.filter(file_name=new_file_name).first()
-        if existing_file:
+        if links.filter(file_name=new_file_name).exists():
             raise FileExistsError("A file with the same name already exists.")
 
-        # Update the file name in the database
-        file_reference.file_name = new_file_name
+        shared = EventSystemFile.objects.filter(file_reference=file_reference).exclude(event_system=event_system).exists()
+        try:
+            with transaction.atomic():
+                link.file_name = new_file_name
+                link.save(update_fields=['file_name'])
+                if not shared:
+                    file_reference.file_name = new_file_name
+                    file_reference.save(update_fields=['file_name'])
+        except IntegrityError:
+            # Another file took the name in the meantime
+            raise FileExistsError("A file with the same name already exists.")
 
-        # Rename the file in the local storage
-        relative_path = file_reference.url.replace(settings.MEDIA_URL, "").lstrip("/")
-        old_file_path = os.path.join(settings.MEDIA_ROOT, relative_path)
-        new_file_path = os.path.join(os.path.dirname(old_file_path), new_file_name)
+        if not shared and not file_reference.blob_id and file_reference.url:
+            # Content-addressed files are stored under their checksum, the name only lives in the database
+            EventSystemFileService.move_legacy_files([file_reference])
 
-        if os.path.exists(old_file_path):
-            os.rename(old_file_path, new_file_path)  # Rename the file
-            # Update the file URL/path in the database
-            event_system_directory = os.path.join("event_system", str(event_system.uuid))
-            file_reference.url = os.path.join(settings.MEDIA_URL, event_system_directory, new_file_name)
-            print(f"Updated file URL: {file_reference.url}")
+        return file_reference
 
-        # Save the updated file reference in the database
-        file_reference.save()
+    @staticmethod
+    def rename_legacy_file(file_reference, new_file_name):
+        """
+        Rename a file stored before content-addressed blobs were introduced (they are stored under
+        their name) and update its URL.
+        """
+        driver, key = EventSystemFileService.stored_location(file_reference)
+        if driver.stat(key) is None:
+            logger.warning(f"Content of file {file_reference.id} not found at {file_reference.url}")
+            return
+
+        file_reference.url = driver.move(key, posixpath.join(posixpath.dirname(key), new_file_name))
+        logger.debug(f"Updated file URL: {file_reference.url}")
 
-        return file_reference
+    @staticmethod
+    def move_legacy_files(file_references):
+        """
+        Move legacy files to their new name once it is committed, and save their URL. Until a file is moved
+        (or if moving it fails) its URL still points at its content under the old name.
+        """
+        for file_reference in file_references:
+            try:
+                EventSystemFileService.rename_legacy_file(file_reference, file_reference.file_name)
+                file_reference.save(update_fields=['url'])
+            except Exception as e:
+                logger.error(f"Failed to move the content of file {file_reference.id} to its new name: {str(e)}")
 
     @staticmethod
     def flag_file(event_system_id, file_id, user, action):
@@ -239,22 +581,210 @@ class EventSystemFileService:
             raise PermissionError("Only Admins and Owners can select or deselect files.")
 
         # Ensure the file belongs to the event system
-        if not event_system.file_objects.filter(id=file_id).exists():
+        link = EventSystemFile.objects.filter(event_system=event_system, file_reference=file_reference).first()
+        if link is None:
             raise ValueError("File does not belong to this EventSystem.")
 
-        # Select the file or deselect it
+        # Select the file or deselect it, the selection is specific to this event system
         if action == 'select':
-            if file_reference.is_selected:
+            if link.is_selected:
                 raise ValueError("File is already selected.")
-            file_reference.is_selected = True
+            link.is_selected = True
         elif action == 'deselect':
-            if not file_reference.is_selected:
+            if not link.is_selected:
                 raise ValueError("File is already not selected.")
-            file_reference.is_selected = False
+            link.is_selected = False
 
-        file_reference.save()
+        with transaction.atomic():
+            link.save(update_fields=['is_selected'])
+            StorageUsageService.change_selection(event_system, 1, link.is_selected)
+        file_reference.is_selected = link.is_selected
         return file_reference
 
+    BULK_ACTIONS = ('select', 'deselect', 'delete', 'rename')
+
+    @staticmethod
+    def bulk_action(event_system_id, user, action, file_ids, new_names=None):
+        """
+        Apply one action to many files of an event system with a handful of queries: the permission is
+        checked once and the change is made with bulk UPDATE/DELETE statements in a single transaction.
+        `new_names` maps file ids to their new name for the 'rename' action.
+        Stored content of deleted files is removed afterwards by a Celery task. Returns the number of files changed.
+        """
+        if action not in EventSystemFileService.BULK_ACTIONS:
+            raise ValueError(f"Invalid action. Action must be one of: {', '.join(EventSystemFileService.BULK_ACTIONS)}.")
+
+        event_system = EventSystem.objects.get(id=event_system_id)
+        permission_level = UserSystemPermissions.objects.filter(
+            user=user,
+            event_system=event_system
+        ).values_list('permission_level', flat=True).first()
+
+        # Same roles as the single-file operations
+        if action == 'rename':
+            allowed_roles = {
+                UserSystemPermissions.PermissionLevel.EDITOR,
+                UserSystemPermissions.PermissionLevel.ADMIN,
+                UserSystemPermissions.PermissionLevel.OWNER
+            }
+        else:
+            allowed_roles = {
+                UserSystemPermissions.PermissionLevel.ADMIN,
+                UserSystemPermissions.PermissionLevel.OWNER
+            }
+        if permission_level not in allowed_roles:
+            raise PermissionError(f"You do not have permission to {action} these files.")
+
+        file_ids = set(file_ids)
+        files = FileReference.objects.filter(event_systems=event_system, id__in=file_ids)
+
+        with transaction.atomic():
+            if action == 'rename':
+                return EventSystemFileService.bulk_rename(event_system, files, file_ids, new_names or {})
+
+            # Ensure every file belongs to the event system, the batch is applied entirely or not at all
+            found = {row['id']: row for row in files.values('id', 'blob_id', 'storage_provider', 'url')}
+            missing = file_ids - set(found)
+            if missing:
+                raise ValueError(f"Files do not belong to this EventSystem: {', '.join(sorted(map(str, missing)))}")
+
+            if action in ('select', 'deselect'):
+                selected = action == 'select'
+                changed = EventSystemFile.objects.filter(
+                    event_system=event_system,
+                    file_reference_id__in=file_ids
+                ).exclude(is_selected=selected).update(is_selected=selected)
+                StorageUsageService.change_selection(event_system, changed, selected)
+                return len(file_ids)
+
+            # The event segments parsed from the files go with them
+            found.update({row['id']: row for row in FileReference.objects.filter(
+                event_segment__source_file_id__in=file_ids
+            ).values('id', 'blob_id', 'storage_provider', 'url')})
+
+            blob_ids = [str(row['blob_id']) for row in found.values() if row['blob_id']]
+            legacy_files = [
+                (row['storage_provider'], row['url']) for row in found.values() if not row['blob_id'] and row['url']
+            ]
+            # Also removes the files from every EventSystem they were associated with
+            StorageUsageService.remove_files(list(found))
+            FileReference.objects.filter(id__in=list(found)).delete()
+
+            # Imported here to avoid a circular import, the tasks module depends on this one
+            from file_manager.services.tasks import delete_stored_files
+            transaction.on_commit(lambda: delete_stored_files.delay(blob_ids, legacy_files))
+            return len(file_ids)
+
+    @staticmethod
+    def bulk_rename(event_system, files, file_ids, new_names):
+        """
+        Rename many files at once; names must stay unique inside the event system. As with update_file_name,
+        files shared with other event systems are only renamed in this one.
+        """
+        new_names = {str(file_id): name for file_id, name in new_names.items()}
+        files = list(files.select_for_update())
+        if len(files) != len(file_ids):
+            missing = {str(file_id) for file_id in file_ids} - {str(file_reference.id) for file_reference in files}
+            raise ValueError(f"Files do not belong to this EventSystem: {', '.join(sorted(missing))}")
+
+        if len(set(new_names.values())) != len(new_names):
+            raise ValueError("Every file must get a different name.")
+        # Files of the batch may swap names, any other file keeps its name
+        links = EventSystemFile.objects.filter(event_system=event_system)
+        if links.filter(file_name__in=new_names.values()).exclude(file_reference_id__in=file_ids).exists():
+            raise FileExistsError("A file with the same name already exists.")
+
+        # Legacy files are stored under their name, they cannot take the name of another file of the batch
+        current_names = {file_reference.file_name for file_reference in files}
+        for file_reference in files:
+            new_file_name = new_names[str(file_reference.id)]
+            if (not file_reference.blob_id and file_reference.url and new_file_name != file_reference.file_name
+                    and new_file_name in current_names):
+                raise FileExistsError(f"{file_reference.file_name} cannot be renamed to the name of another file.")
+
+        shared_ids = set(
+            EventSystemFile.objects.filter(file_reference_id__in=file_ids)
+            .exclude(event_system=event_system)
+            .values_list('file_reference_id', flat=True)
+        )
+        renamed = []
+        legacy = []
+        for file_reference in files:
+            new_file_name = new_names[str(file_reference.id)]
+            if file_reference.id in shared_ids or file_reference.file_name == new_file_name:
+                continue
+            file_reference.file_name = new_file_name
+            renamed.append(file_reference)
+            if not file_reference.blob_id and file_reference.url:
+                legacy.append(file_reference)
+        FileReference.objects.bulk_update(renamed, ['file_name'])
+        # Legacy files are stored under their name: moved once the new names are committed
+        if legacy:
+            transaction.on_commit(lambda: EventSystemFileService.move_legacy_files(legacy))
+
+        # Names are unique per event system: the files first take a placeholder name, so that they can swap names
+        file_links = list(EventSystemFile.objects.filter(event_system=event_system, file_reference_id__in=file_ids))
+        for link in file_links:
+            link.file_name = f"{link.file_reference_id}.renaming"
+        EventSystemFile.objects.bulk_update(file_links, ['file_name'])
+        for link in file_links:
+            link.file_name = new_names[str(link.file_reference_id)]
+        EventSystemFile.objects.bulk_update(file_links, ['file_name'])
+        return len(files)
+
+    # Sort orders supported by list_files, each paginated on (field, id)
+    LIST_ORDERINGS = ('upload_date', '-upload_date', 'file_name', '-file_name')
+    LIST_DEFAULT_PAGE_SIZE = 50
+    LIST_MAX_PAGE_SIZE = 500
+
+    @staticmethod
+    def list_files(event_system_id, user, filters=None, ordering='-upload_date', cursor=None, page_size=None):
+        """
+        Return a page of the files of an event system and the cursor of the next page.
+        `filters` may hold file_type, upload_status, is_selected and name_prefix.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+
+        permission_level = UserSystemPermissions.objects.filter(
+            user=user,
+            event_system=event_system
+        ).values_list('permission_level', flat=True).first()
+
+        allowed_roles = {
+            UserSystemPermissions.PermissionLevel.ADMIN,
+            UserSystemPermissions.PermissionLevel.OWNER,
+            UserSystemPermissions.PermissionLevel.VIEWER
+        }
+        if permission_level not in allowed_roles:
+            raise PermissionError("You do not have permission to view files.")
+
+        if ordering not in EventSystemFileService.LIST_ORDERINGS:
+            raise ValueError(f"Ordering must be one of: {', '.join(EventSystemFileService.LIST_ORDERINGS)}.")
+
+        page_size = page_size or EventSystemFileService.LIST_DEFAULT_PAGE_SIZE
+        if not 1 <= page_size <= EventSystemFileService.LIST_MAX_PAGE_SIZE:
+            raise ValueError(f"Page size must be between 1 and {EventSystemFileService.LIST_MAX_PAGE_SIZE}.")
+
+        # Listed through the event system's own file table, its indexes match the sort orders
+        links = EventSystemFile.objects.filter(event_system=event_system).select_related('file_reference__blob')
+
+        filters = filters or {}
+        if filters.get('file_type') is not None:
+            links = links.filter(file_reference__file_type=filters['file_type'])
+        if filters.get('upload_status') is not None:
+            links = links.filter(file_reference__upload_status=filters['upload_status'])
+        if filters.get('is_selected') is not None:
+            links = links.filter(is_selected=filters['is_selected'])
+        if filters.get('name_prefix'):
+            links = links.filter(file_name__startswith=filters['name_prefix'])
+
+        links, next_cursor = keyset_page(links, ordering, cursor, page_size)
+        files = []
+        for link in links:
+            link.file_reference.is_selected = link.is_selected
+            files.append(link.file_reference)
+        return files, next_cursor
+
 
 class EventSystemService:
     @staticmethod
@@ -270,6 +800,7 @@ class EventSystemService:
         )
 
         event_system.users.add(user)
+        EventSystemUsage.objects.create(event_system=event_system)
 
         # Get or create the default logs pattern
         default_logs_pattern, _ = LogsPattern.objects.get_or_create(pattern='default-log-pattern')
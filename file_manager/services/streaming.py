@@ -0,0 +1,74 @@
+import hashlib
+from django.conf import settings
+
+
+def get_chunk_size(chunk_size=None):
+    """Return the chunk size used when streaming file content."""
+    return chunk_size or getattr(settings, 'FILE_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def iter_chunks(file, chunk_size=None):
+    """Yield the content of a file (Django File or plain file-like object) in bounded chunks."""
+    chunk_size = get_chunk_size(chunk_size)
+
+    # Django files know how to rewind themselves and read in chunks
+    if hasattr(file, 'chunks'):
+        yield from file.chunks(chunk_size)
+        return
+
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        yield data
+
+
+def copy_stream(file, destination, chunk_size=None, callback=None):
+    """
+    Copy a file into a writable file-like object chunk by chunk.
+    `callback`, if given, is called with the number of bytes of every chunk written.
+    Returns a tuple of (bytes written, SHA-256 hex digest).
+    """
+    sha256 = hashlib.sha256()
+    written = 0
+    for chunk in iter_chunks(file, chunk_size):
+        sha256.update(chunk)
+        destination.write(chunk)
+        written += len(chunk)
+        if callback:
+            callback(len(chunk))
+    return written, sha256.hexdigest()
+
+
+def file_sha256(file, chunk_size=None):
+    """
+    Return the SHA-256 of a file.
+    Uses the checksum computed by HashingFileUploadHandler while the file was received when available.
+    """
+    precomputed = getattr(file, 'sha256', None)
+    if precomputed:
+        return precomputed
+
+    sha256 = hashlib.sha256()
+    for chunk in iter_chunks(file, chunk_size):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def slice_chunks(chunks, skip, count):
+    """Yield `count` bytes of an iterable of chunks after skipping the first `skip` bytes."""
+    try:
+        for chunk in chunks:
+            if count <= 0:
+                break
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            chunk = chunk[skip:skip + count]
+            skip = 0
+            count -= len(chunk)
+            yield chunk
+    finally:
+        # Release the source (open file, pooled SFTP connection) when the client stops early
+        if hasattr(chunks, 'close'):
+            chunks.close()
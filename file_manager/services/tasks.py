@@ -0,0 +1,182 @@
+import os
+from celery import shared_task
+from django.conf import settings
+from loguru import logger
+from core.models import DirectUpload, FileReference, StoredBlob
+from file_manager.services.blob_services import BlobStoreService
+from file_manager.services.direct_upload_services import DirectUploadService
+from file_manager.services.event_store_services import EventStoreService
+from file_manager.services.mining_services import TemplateMiningService
+from file_manager.services.profiling_services import PatternProfilingService
+from file_manager.services.reconciliation_services import StorageReconciliationService
+from file_manager.services.services import EventSystemFileService
+from file_manager.services.upload_session_services import UploadSessionService
+from file_manager.services.usage_services import StorageUsageService
+
+
+@shared_task
+def delete_expired_upload_sessions():
+    """Abort resumable uploads that were never committed and free their staged chunks."""
+    deleted_count = UploadSessionService.delete_expired_sessions()
+    logger.info(f"Deleted {deleted_count} expired upload sessions")
+    return f"Deleted {deleted_count} expired upload sessions."
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_file_upload(self, file_reference_id, staged_path):
+    """Transfer a staged upload to its remote storage provider and mark it COMPLETE (or FAILED)."""
+    try:
+        file_reference = EventSystemFileService.complete_staged_upload(file_reference_id, staged_path)
+        logger.info(f"Finalized upload of file {file_reference_id} to {file_reference.url}")
+        return str(file_reference_id)
+
+    except FileReference.DoesNotExist:
+        # The file was deleted while it was waiting to be transferred
+        logger.warning(f"File {file_reference_id} no longer exists, discarding its staged upload")
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Transfer of file {file_reference_id} failed, retrying: {str(e)}")
+            FileReference.objects.filter(id=file_reference_id).update(upload_status=FileReference.UploadStatus.PENDING)
+            raise self.retry(exc=e)
+
+        logger.error(f"Transfer of file {file_reference_id} failed: {str(e)}")
+        FileReference.objects.filter(id=file_reference_id).update(upload_status=FileReference.UploadStatus.FAILED)
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        raise
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_file_uploads(self, uploads):
+    """
+    Transfer the staged files of a multi-file upload, given as (file_reference_id, staged_path) pairs, to their
+    remote storage provider a few at a time. Only the transfers that failed are retried.
+    """
+    failures = EventSystemFileService.complete_staged_uploads(uploads)
+    if not failures:
+        logger.info(f"Finalized upload of {len(uploads)} files")
+        return [str(file_reference_id) for file_reference_id, _ in uploads]
+
+    failed_ids = [file_reference_id for file_reference_id, _, _ in failures]
+    if self.request.retries < self.max_retries:
+        logger.warning(f"Transfer of files {', '.join(failed_ids)} failed, retrying: {str(failures[0][2])}")
+        FileReference.objects.filter(id__in=failed_ids).update(upload_status=FileReference.UploadStatus.PENDING)
+        raise self.retry(
+            args=[[[file_reference_id, staged_path] for file_reference_id, staged_path, _ in failures]],
+            exc=failures[0][2]
+        )
+
+    logger.error(f"Transfer of files {', '.join(failed_ids)} failed: {str(failures[0][2])}")
+    FileReference.objects.filter(id__in=failed_ids).update(upload_status=FileReference.UploadStatus.FAILED)
+    for _, staged_path, _ in failures:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+    raise failures[0][2]
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def verify_direct_upload(self, direct_upload_id):
+    """Check the checksum of a file uploaded straight to S3 and register it (or mark the upload FAILED)."""
+    try:
+        upload = DirectUploadService.verify_upload(direct_upload_id)
+        logger.info(f"Verified direct upload {direct_upload_id}: {upload.get_status_display()}")
+        return upload.get_status_display()
+
+    except DirectUpload.DoesNotExist:
+        logger.warning(f"Direct upload {direct_upload_id} no longer exists")
+
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Verification of direct upload {direct_upload_id} failed, retrying: {str(e)}")
+            raise self.retry(exc=e)
+
+        logger.error(f"Verification of direct upload {direct_upload_id} failed: {str(e)}")
+        DirectUpload.objects.filter(id=direct_upload_id).update(status=DirectUpload.DirectUploadStatus.FAILED)
+        raise
+
+
+@shared_task
+def delete_expired_direct_uploads():
+    """Abort direct-to-S3 uploads that were never completed and delete what was sent for them."""
+    deleted_count = DirectUploadService.delete_expired_uploads()
+    logger.info(f"Deleted {deleted_count} expired direct uploads")
+    return f"Deleted {deleted_count} expired direct uploads."
+
+
+@shared_task
+def delete_stored_files(blob_ids, legacy_files):
+    """
+    Remove the stored content of deleted files: release one reference per blob id (deleting the bytes
+    with the last one) and delete the files stored before blobs existed ([storage provider, url] pairs).
+    """
+    deleted_count = 0
+    for blob_id in blob_ids:
+        if BlobStoreService.release(blob_id, EventSystemFileService.delete_content):
+            deleted_count += 1
+
+    for storage_provider, url in legacy_files:
+        try:
+            EventSystemFileService.delete_legacy_file(storage_provider, url)
+            deleted_count += 1
+        except Exception as e:
+            logger.error(f"Failed to delete stored file {url}: {str(e)}")
+
+    logger.info(f"Deleted {deleted_count} stored files")
+    return f"Deleted {deleted_count} stored files."
+
+
+@shared_task
+def reconcile_storage(storage_provider=None, action=None):
+    """
+    Reconcile a storage provider (by default every provider holding blobs) with the database and clean up
+    orphaned content, unreferenced blobs and uploads that never finished (see STORAGE_RECONCILE_ACTION).
+    """
+    if storage_provider is None:
+        storage_providers = sorted(set(StoredBlob.objects.values_list('storage_provider', flat=True)))
+    else:
+        storage_providers = [storage_provider]
+
+    reports = {}
+    for provider in storage_providers:
+        label = FileReference.StorageProvider(provider).label
+        try:
+            reports[label] = StorageReconciliationService.reconcile(
+                provider,
+                action=action or settings.STORAGE_RECONCILE_ACTION
+            )
+        except Exception as e:
+            logger.error(f"Reconciliation of {label} storage failed: {str(e)}")
+    return reports
+
+
+@shared_task
+def repair_storage_usage():
+    """Recompute the storage usage counters of every event system from their files."""
+    drifted_count = StorageUsageService.recompute()
+    if drifted_count:
+        logger.warning(f"Repaired the storage usage of {drifted_count} event systems")
+    return f"Repaired the storage usage of {drifted_count} event systems."
+
+
+@shared_task
+def build_event_segments(file_reference_id, event_system_id):
+    """Parse an event file into the columnar event store of its event system."""
+    segments = EventStoreService.build_segments(file_reference_id, event_system_id)
+    return [str(segment.id) for segment in segments]
+
+
+@shared_task
+def profile_pattern(profile_id):
+    """Run a PatternProfile: time a candidate LogsPattern on a sample of the selected files of its event system."""
+    profile = PatternProfilingService.run_profile(profile_id)
+    return f"Profile {profile_id}: {profile.get_status_display()}"
+
+
+@shared_task
+def mine_log_templates(file_reference_id, event_system_id):
+    """Propose LogsPatterns for an event file: mine the templates of its lines and store the most frequent ones."""
+    templates = TemplateMiningService.mine_file(file_reference_id, event_system_id)
+    return [str(template.id) for template in templates]
@@ -0,0 +1,32 @@
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler that streams every uploaded file to a temporary file on disk
+    while computing its SHA-256 checksum.
+
+    Only one chunk of the request body is held in memory at a time, so the memory
+    used by an upload does not grow with the size of the file.
+    The checksum is exposed on the resulting file as `uploaded_file.sha256`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunk_size = getattr(settings, 'FILE_UPLOAD_CHUNK_SIZE', self.chunk_size)
+        self.sha256 = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.sha256 = self.sha256.hexdigest()
+        return uploaded_file
@@ -0,0 +1,245 @@
+import hashlib
+import math
+import os
+import shutil
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from core.models import EventSystem, EventSystemFile, FileReference, UploadSession, UploadChunk
+from file_manager.services.services import EventSystemFileService
+from file_manager.services.streaming import get_chunk_size, iter_chunks
+from file_manager.storage.drivers import get_storage_driver
+from file_manager.services.usage_services import StorageUsageService
+
+
+class UploadSessionService:
+    @staticmethod
+    def staging_dir(session_id):
+        """Local directory holding the staged chunks of an upload session."""
+        return os.path.join(settings.FILE_UPLOAD_STAGING_ROOT, str(session_id))
+
+    @staticmethod
+    def chunk_path(session_id, index):
+        return os.path.join(UploadSessionService.staging_dir(session_id), f"{index:08d}.part")
+
+    @staticmethod
+    def create_session(event_system_id, user, file_name, total_size, storage_provider, chunk_size=None):
+        """
+        Start a resumable upload.
+        The FileReference is created right away (PENDING) so the file name is reserved in the event system.
+        """
+        event_system = EventSystem.objects.get(id=event_system_id)
+        EventSystemFileService.check_upload_permission(event_system, user)
+
+        # Nothing is reserved for a provider no file can be stored in
+        if not get_storage_driver(storage_provider).available:
+            raise ValueError(f"{FileReference.StorageProvider(storage_provider).label} storage is not supported yet.")
+
+        # Check if a file with the same name already exists in this event system
+        if EventSystemFile.objects.filter(event_system=event_system, file_name=file_name).exists():
+            raise FileExistsError("A file with the same name already exists.")
+
+        chunk_size = chunk_size or settings.UPLOAD_SESSION_DEFAULT_CHUNK_SIZE
+        if not settings.UPLOAD_SESSION_MIN_CHUNK_SIZE <= chunk_size <= settings.UPLOAD_SESSION_MAX_CHUNK_SIZE:
+            raise ValueError(
+                f"Chunk size must be between {settings.UPLOAD_SESSION_MIN_CHUNK_SIZE} "
+                f"and {settings.UPLOAD_SESSION_MAX_CHUNK_SIZE} bytes."
+            )
+
+        with transaction.atomic():
+            file_reference = FileReference.objects.create(
+                file_name=file_name,
+                storage_provider=storage_provider,
+                size=total_size,
+                upload_status=FileReference.UploadStatus.PENDING,
+                file_type=FileReference.FileType.EVENT_FILE
+            )
+            # The declared size is reserved against the quota before any chunk is received
+            StorageUsageService.add_file(event_system, file_reference)
+            EventSystemFileService.link_files(event_system, [file_reference])
+
+            session = UploadSession.objects.create(
+                event_system=event_system,
+                file_reference=file_reference,
+                user=user,
+                total_size=total_size,
+                chunk_size=chunk_size,
+                total_chunks=max(1, math.ceil(total_size / chunk_size)),
+                expires_at=timezone.now() + settings.UPLOAD_SESSION_TTL
+            )
+
+        os.makedirs(UploadSessionService.staging_dir(session.id), exist_ok=True)
+        return session
+
+    @staticmethod
+    def get_session(event_system_id, session_id, user):
+        """Return an upload session owned by the user; raises UploadSession.DoesNotExist otherwise."""
+        return UploadSession.objects.select_related('file_reference').get(
+            id=session_id,
+            event_system_id=event_system_id,
+            user=user
+        )
+
+    @staticmethod
+    def expected_chunk_size(session, index):
+        """Every chunk has the session's chunk size except the last one, which holds the remainder."""
+        if index < session.total_chunks - 1:
+            return session.chunk_size
+        return session.total_size - session.chunk_size * (session.total_chunks - 1)
+
+    @staticmethod
+    def receive_chunk(session, index, stream, expected_checksum=None):
+        """
+        Stream one chunk of the request body to the staging area.
+        Chunks can arrive in any order and be sent again; the last write wins.
+        """
+        if session.status != UploadSession.SessionStatus.ACTIVE:
+            raise ValueError("The upload session is not active.")
+        if session.expires_at < timezone.now():
+            raise ValueError("The upload session has expired.")
+        if index >= session.total_chunks:
+            raise ValueError(f"Chunk index must be lower than {session.total_chunks}.")
+
+        expected_size = UploadSessionService.expected_chunk_size(session, index)
+        final_path = UploadSessionService.chunk_path(session.id, index)
+        partial_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        sha256 = hashlib.sha256()
+        received = 0
+        try:
+            with open(partial_path, 'wb') as partial_file:
+                buffer_size = get_chunk_size()
+                while received <= expected_size:
+                    data = stream.read(min(buffer_size, expected_size + 1 - received))
+                    if not data:
+                        break
+                    sha256.update(data)
+                    partial_file.write(data)
+                    received += len(data)
+
+            if received != expected_size:
+                raise ValueError(f"Chunk {index} must be exactly {expected_size} bytes.")
+
+            checksum = sha256.hexdigest()
+            if expected_checksum and expected_checksum.lower() != checksum:
+                raise ValueError(f"Checksum mismatch for chunk {index}.")
+
+            # Atomic rename so a retried chunk never leaves a half-written part behind
+            os.replace(partial_path, final_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        chunk, _ = UploadChunk.objects.update_or_create(
+            session=session,
+            index=index,
+            defaults={'size': received, 'checksum': checksum}
+        )
+        return chunk
+
+    @staticmethod
+    def missing_chunks(session):
+        received = set(session.chunks.values_list('index', flat=True))
+        return [index for index in range(session.total_chunks) if index not in received]
+
+    @staticmethod
+    def commit_session(session, expected_checksum=None):
+        """
+        Assemble the staged chunks in order and hand the file over to EventSystemFileService.finalize_upload.
+        Local files are complete on return, remote ones are transferred in the background. If storing a local
+        file fails, the file is FAILED and the session can still be aborted to release its name and usage.
+        """
+        with transaction.atomic():
+            # Lock the session so concurrent commits cannot assemble the same file twice
+            session = UploadSession.objects.select_for_update().select_related('file_reference').get(id=session.id)
+            if session.status != UploadSession.SessionStatus.ACTIVE:
+                raise ValueError("The upload session is not active.")
+
+            missing = UploadSessionService.missing_chunks(session)
+            if missing:
+                raise ValueError(f"Missing chunks: {missing[:50]}")
+
+            file_reference = session.file_reference
+            file_reference.upload_status = FileReference.UploadStatus.PROCESSING
+            file_reference.save(update_fields=['upload_status'])
+            session.status = UploadSession.SessionStatus.COMMITTED
+            session.save(update_fields=['status'])
+
+        staging_dir = UploadSessionService.staging_dir(session.id)
+        assembled_path = os.path.join(staging_dir, 'assembled')
+        try:
+            with open(assembled_path, 'wb') as assembled_file:
+                sha256 = hashlib.sha256()
+                size = 0
+                for index in range(session.total_chunks):
+                    with open(UploadSessionService.chunk_path(session.id, index), 'rb') as part:
+                        for data in iter_chunks(part):
+                            sha256.update(data)
+                            assembled_file.write(data)
+                            size += len(data)
+            checksum = sha256.hexdigest()
+
+            if size != session.total_size:
+                raise ValueError("Assembled file size does not match the declared size.")
+            if expected_checksum and expected_checksum.lower() != checksum:
+                raise ValueError("Checksum mismatch for the assembled file.")
+        except Exception:
+            # Keep the staged chunks and reopen the session so the commit can be retried
+            logger.exception(f"Failed to commit upload session {session.id}")
+            if os.path.exists(assembled_path):
+                os.remove(assembled_path)
+            FileReference.objects.filter(id=file_reference.id).update(upload_status=FileReference.UploadStatus.PENDING)
+            UploadSession.objects.filter(id=session.id).update(status=UploadSession.SessionStatus.ACTIVE)
+            raise
+
+        # Hand the assembled file over to the regular upload pipeline, the chunks are no longer needed
+        staged_path = EventSystemFileService.staged_file_path(file_reference.id)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        os.replace(assembled_path, staged_path)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        file_reference.size = size
+        file_reference.checksum = checksum
+        file_reference.save(update_fields=['size', 'checksum'])
+        try:
+            return EventSystemFileService.finalize_upload(file_reference, staged_path)
+        except Exception:
+            # The chunks are gone, the commit cannot be retried
+            logger.exception(f"Failed to store the file of upload session {session.id}")
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+            FileReference.objects.filter(id=file_reference.id).update(upload_status=FileReference.UploadStatus.FAILED)
+            raise
+
+    @staticmethod
+    def abort_session(session):
+        """Discard the staged chunks and the reserved FileReference."""
+        # Committed sessions whose file could not be stored are aborted like the others
+        if (session.status == UploadSession.SessionStatus.COMMITTED
+                and session.file_reference.upload_status != FileReference.UploadStatus.FAILED):
+            raise ValueError("A committed upload session cannot be aborted.")
+
+        shutil.rmtree(UploadSessionService.staging_dir(session.id), ignore_errors=True)
+        # Deleting the file reference also deletes the session and its chunks
+        with transaction.atomic():
+            StorageUsageService.remove_files([session.file_reference_id])
+            session.file_reference.delete()
+
+    @staticmethod
+    def delete_expired_sessions():
+        """Abort every active session past its expiry date. Returns the number of sessions removed."""
+        expired = UploadSession.objects.filter(
+            status=UploadSession.SessionStatus.ACTIVE,
+            expires_at__lt=timezone.now()
+        ).select_related('file_reference')
+
+        count = 0
+        for session in expired.iterator():
+            UploadSessionService.abort_session(session)
+            count += 1
+        return count
+
@@ -0,0 +1,198 @@
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+
+from core.models import EventSegment, EventSystem, EventSystemFile, EventSystemUsage, FileReference, UserSystemPermissions
+
+# EventSystemUsage field holding the bytes of each FileType
+TYPE_BYTES_FIELDS = {
+    FileReference.FileType.EVENT_FILE: 'event_file_bytes',
+    FileReference.FileType.PREDICTION_FILE: 'prediction_file_bytes',
+    FileReference.FileType.EVENT_SEGMENT: 'event_segment_bytes',
+}
+# Files derived from the uploaded ones (not files of the event system, see EventSegment): counted in their
+# FileType bytes, but not in the file count, the total bytes or the quota, which only cover what users uploaded
+DERIVED_FILE_TYPES = (FileReference.FileType.EVENT_SEGMENT,)
+
+
+class QuotaExceeded(ValueError):
+    """Adding a file would take an event system over its storage or file quota."""
+
+
+class StorageUsageService:
+    """
+    Maintains EventSystemUsage: every change to the files of an event system updates its counters with a
+    single UPDATE in the same transaction, so reading the usage (or checking a quota) is one row lookup.
+    """
+
+    @staticmethod
+    def get_usage(event_system_id, user):
+        """Return the usage of an event system; every member may see it."""
+        event_system = EventSystem.objects.get(id=event_system_id)
+        if not UserSystemPermissions.objects.filter(user=user, event_system=event_system).exists():
+            raise PermissionError("You do not have access to this EventSystem.")
+
+        return StorageUsageService.ensure_usage(event_system)
+
+    @staticmethod
+    def ensure_usage(event_system):
+        """Return the usage of an event system, counting its files the first time."""
+        usage = EventSystemUsage.objects.filter(event_system=event_system).first()
+        if usage is None:
+            StorageUsageService.recompute([event_system.id])
+            usage = EventSystemUsage.objects.get(event_system=event_system)
+        return usage
+
+    @staticmethod
+    def quota(event_system):
+        """Return the (max bytes, max files) of an event system, None meaning no limit."""
+        max_bytes = event_system.max_storage_bytes
+        if max_bytes is None:
+            max_bytes = getattr(settings, 'EVENT_SYSTEM_MAX_STORAGE_BYTES', None)
+        max_files = event_system.max_files
+        if max_files is None:
+            max_files = getattr(settings, 'EVENT_SYSTEM_MAX_FILES', None)
+        return max_bytes, max_files
+
+    @staticmethod
+    def check_quota(event_system, size, file_count=1):
+        """Raise QuotaExceeded if `file_count` files of `size` bytes do not fit in the event system's quota."""
+        max_bytes, max_files = StorageUsageService.quota(event_system)
+        if max_bytes is None and max_files is None:
+            return
+
+        usage = StorageUsageService.ensure_usage(event_system)
+        StorageUsageService._raise_if_exceeded(usage, size, file_count, max_bytes, max_files)
+
+    @staticmethod
+    def add_file(event_system, file_reference, enforce_quota=True):
+        """
+        Count a file about to be added to an event system. Call it in the transaction that adds the file,
+        before adding it: with `enforce_quota`, QuotaExceeded is raised (and nothing is counted) when the file
+        does not fit. The quota is checked by the UPDATE itself, so concurrent uploads cannot overshoot it together.
+        """
+        StorageUsageService.add_files(event_system, [file_reference], enforce_quota)
+
+    @staticmethod
+    def add_files(event_system, file_references, enforce_quota=True):
+        """Count several files about to be added to an event system at once, see add_file."""
+        counted = [item for item in file_references if item.file_type not in DERIVED_FILE_TYPES]
+        size = sum(file_reference.size for file_reference in counted)
+        StorageUsageService.ensure_usage(event_system)
+        usage = EventSystemUsage.objects.filter(event_system=event_system)
+
+        max_bytes, max_files = StorageUsageService.quota(event_system) if enforce_quota and counted else (None, None)
+        if max_bytes is not None:
+            usage = usage.filter(total_bytes__lte=max_bytes - size)
+        if max_files is not None:
+            usage = usage.filter(file_count__lte=max_files - len(counted))
+
+        # Files are never selected when they are added
+        updates = {
+            'file_count': F('file_count') + len(counted),
+            'total_bytes': F('total_bytes') + size,
+        }
+        for file_type, field in TYPE_BYTES_FIELDS.items():
+            type_size = sum(item.size for item in file_references if item.file_type == file_type)
+            if type_size:
+                updates[field] = F(field) + type_size
+
+        while not usage.update(**updates):
+            # Over quota, unless files were removed in between (then the update is tried again)
+            StorageUsageService._raise_if_exceeded(
+                EventSystemUsage.objects.get(event_system=event_system),
+                size, len(counted), max_bytes, max_files
+            )
+
+    @staticmethod
+    def remove_files(file_ids):
+        """
+        Stop counting files that are about to be deleted, in every event system they belong to.
+        Call it in the transaction that deletes them, before the deletion.
+        """
+        for row in StorageUsageService._aggregate(file_reference_id__in=file_ids):
+            EventSystemUsage.objects.filter(event_system_id=row['event_system_id']).update(
+                # Never below zero, even if the counters drifted (the repair job fixes them)
+                file_count=Greatest(F('file_count') - row['file_count'], 0),
+                total_bytes=Greatest(F('total_bytes') - row['total_bytes'], 0),
+                selected_count=Greatest(F('selected_count') - row['selected_count'], 0),
+                **{field: Greatest(F(field) - row[field], 0) for field in TYPE_BYTES_FIELDS.values() if field in row}
+            )
+        for row in StorageUsageService._segment_aggregate(file_reference_id__in=file_ids):
+            EventSystemUsage.objects.filter(event_system_id=row['event_system_id']).update(
+                event_segment_bytes=Greatest(F('event_segment_bytes') - row['event_segment_bytes'], 0)
+            )
+
+    @staticmethod
+    def change_selection(event_system, file_count, selected):
+        """Count `file_count` files of an event system whose selection just changed to `selected`."""
+        delta = file_count if selected else -file_count
+        EventSystemUsage.objects.filter(event_system=event_system).update(
+            selected_count=Greatest(F('selected_count') + delta, 0)
+        )
+
+    @staticmethod
+    def recompute(event_system_ids=None):
+        """
+        Rebuild the counters from the files themselves (repair job), for the given event systems or all of
+        them. Returns the number of usages that had drifted.
+        """
+        event_systems = EventSystem.objects.all()
+        if event_system_ids is not None:
+            event_systems = event_systems.filter(id__in=event_system_ids)
+
+        usages = {usage.event_system_id: usage for usage in EventSystemUsage.objects.filter(
+            event_system__in=event_systems
+        )}
+        actual = {row['event_system_id']: row for row in StorageUsageService._aggregate(event_system__in=event_systems)}
+        for row in StorageUsageService._segment_aggregate(event_system__in=event_systems):
+            actual.setdefault(row['event_system_id'], {})['event_segment_bytes'] = row['event_segment_bytes']
+
+        fields = ['file_count', 'total_bytes', 'selected_count', *TYPE_BYTES_FIELDS.values()]
+        drifted = []
+        for event_system_id in event_systems.values_list('id', flat=True).iterator():
+            usage = usages.get(event_system_id)
+            if usage is None:
+                usage, _ = EventSystemUsage.objects.get_or_create(event_system_id=event_system_id)
+            row = actual.get(event_system_id, {})
+            expected = {field: row.get(field, 0) for field in fields}
+            if any(getattr(usage, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(usage, field, value)
+                drifted.append(usage)
+
+        EventSystemUsage.objects.bulk_update(drifted, fields, batch_size=500)
+        return len(drifted)
+
+    @staticmethod
+    def _aggregate(**filters):
+        """Counters of the files of the event system/file associations matching `filters`, per event system."""
+        aggregates = {
+            'file_count': Count('id'),
+            'total_bytes': Sum('file_reference__size', default=0),
+            'selected_count': Count('id', filter=Q(is_selected=True)),
+        }
+        for file_type, field in TYPE_BYTES_FIELDS.items():
+            if file_type not in DERIVED_FILE_TYPES:
+                aggregates[field] = Sum(
+                    'file_reference__size', filter=Q(file_reference__file_type=file_type), default=0
+                )
+
+        return EventSystemFile.objects.filter(**filters).values('event_system_id').annotate(**aggregates)
+
+    @staticmethod
+    def _segment_aggregate(**filters):
+        """Bytes of the EventSegments matching `filters`, per event system."""
+        return EventSegment.objects.filter(**filters).values('event_system_id').annotate(
+            event_segment_bytes=Sum('file_reference__size', default=0)
+        )
+
+    @staticmethod
+    def _raise_if_exceeded(usage, size, file_count, max_bytes, max_files):
+        if max_files is not None and usage.file_count + file_count > max_files:
+            raise QuotaExceeded(f"File quota exceeded: this EventSystem may hold at most {max_files} files.")
+        if max_bytes is not None and usage.total_bytes + size > max_bytes:
+            raise QuotaExceeded(
+                f"Storage quota exceeded: {usage.total_bytes + size} bytes would be used, "
+                f"the limit is {max_bytes} bytes."
+            )
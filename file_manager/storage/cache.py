@@ -0,0 +1,212 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.conf import settings
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, fetches are then only deduplicated within a process
+    fcntl = None
+
+CACHE_HITS = Counter('file_cache_hits_total', 'Reads of remote file content served from the local cache')
+CACHE_MISSES = Counter('file_cache_misses_total', 'Reads of remote file content that had to fetch it')
+CACHE_EVICTIONS = Counter('file_cache_evictions_total', 'Files evicted from the local cache')
+CACHE_FETCHED_BYTES = Counter('file_cache_fetched_bytes_total', 'Bytes downloaded into the local cache')
+CACHE_SIZE_BYTES = Gauge('file_cache_size_bytes', 'Bytes currently held by the local cache of this process')
+
+
+class BlobCache:
+    """
+    Disk-backed read-through LRU cache of remote content (S3/SCP blobs), kept under `root`.
+
+    Blobs are content addressed and never change, so a cached copy never has to be invalidated.
+    When a blob is missing it is downloaded once, however many threads or processes ask for it at the
+    same time: the others wait for that download and then read the local copy. Once the cache holds more
+    than `max_bytes`, the least recently read files are evicted. The budget is enforced per process
+    (every process knows the files it wrote or read), processes sharing the directory re-read it on start.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._entries = None
+        self._size = 0
+
+    def path(self, storage_provider, storage_key):
+        return os.path.join(self.root, str(storage_provider), storage_key)
+
+    def get(self, storage_provider, storage_key, fetch):
+        """
+        Return the local path of a cached blob. On a miss `fetch(destination)` is called to write its
+        content to the given file object.
+        """
+        path = self.path(storage_provider, storage_key)
+        if self._touch(path):
+            self._record_hit()
+            return path
+
+        with self._fetch_lock(path):
+            # Fetched by another thread or process while this one was waiting
+            if self._touch(path):
+                self._record_hit()
+                return path
+
+            self._record_miss()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial_path = f"{path}.{uuid.uuid4().hex}.part"
+            try:
+                with open(partial_path, 'wb') as destination:
+                    fetch(destination)
+                size = os.path.getsize(partial_path)
+                os.replace(partial_path, path)
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+        CACHE_FETCHED_BYTES.inc(size)
+        self._add(path, size)
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': self._size,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._load()
+            for path in list(self._entries):
+                self._remove(path)
+
+    def _record_hit(self):
+        CACHE_HITS.inc()
+        with self._lock:
+            self.hits += 1
+
+    def _record_miss(self):
+        CACHE_MISSES.inc()
+        with self._lock:
+            self.misses += 1
+
+    def _touch(self, path):
+        """Mark a cached file as the most recently used one; False if it is not cached."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries is not None and path in self._entries:
+                    # Evicted by another process
+                    self._size -= self._entries.pop(path)
+            return False
+
+        with self._lock:
+            self._load()
+            if path in self._entries:
+                self._entries.move_to_end(path)
+            else:
+                # Written by another process
+                self._entries[path] = os.path.getsize(path)
+                self._size += self._entries[path]
+                self._evict()
+        return True
+
+    def _add(self, path, size):
+        with self._lock:
+            self._load()
+            self._size -= self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._size += size
+            self._evict()
+
+    def _load(self):
+        """Index the files already in the cache directory (least recently used first), once per process."""
+        if self._entries is not None:
+            return
+        found = []
+        for directory, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                if file_name.endswith(('.part', '.lock')):
+                    continue
+                file_path = os.path.join(directory, file_name)
+                try:
+                    file_stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                found.append((file_stat.st_mtime, file_path, file_stat.st_size))
+
+        self._entries = OrderedDict((file_path, size) for _, file_path, size in sorted(found))
+        self._size = sum(self._entries.values())
+        self._evict()
+
+    def _evict(self):
+        # The file just added is kept even if it is larger than the whole budget
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            path = next(iter(self._entries))
+            self._remove(path)
+            self.evictions += 1
+            CACHE_EVICTIONS.inc()
+            logger.debug(f"Evicted {path} from the file cache")
+        CACHE_SIZE_BYTES.set(self._size)
+
+    def _remove(self, path):
+        self._size -= self._entries.pop(path)
+        for file_path in (path, f"{path}.lock"):
+            try:
+                # Readers that already opened the file keep reading it
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        CACHE_SIZE_BYTES.set(self._size)
+
+    @contextmanager
+    def _fetch_lock(self, path):
+        """Serialize the fetches of one file across the threads, then the processes, of this host."""
+        with self._lock:
+            lock = self._fetch_locks.setdefault(path, threading.Lock())
+
+        with lock:
+            if fcntl is None:
+                yield
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(f"{path}.lock", 'wb') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        with self._lock:
+            if not lock.locked():
+                self._fetch_locks.pop(path, None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_blob_cache():
+    """Return the process-wide cache of remote content, or None when FILE_CACHE_MAX_BYTES is 0."""
+    global _cache
+    max_bytes = getattr(settings, 'FILE_CACHE_MAX_BYTES', 0)
+    if not max_bytes:
+        return None
+
+    with _cache_lock:
+        if _cache is None or _cache.root != settings.FILE_CACHE_ROOT or _cache.max_bytes != max_bytes:
+            _cache = BlobCache(settings.FILE_CACHE_ROOT, max_bytes)
+        return _cache
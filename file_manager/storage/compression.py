@@ -0,0 +1,114 @@
+import io
+import os
+import zlib
+from django.conf import settings
+from loguru import logger
+
+from core.models import StoredBlob
+from file_manager.services.streaming import iter_chunks
+
+try:
+    import zstandard
+except ImportError:  # Optional, gzip is used instead when it is missing
+    zstandard = None
+
+Compression = StoredBlob.Compression
+
+# Extension added to the storage key of compressed content
+FILE_EXTENSIONS = {
+    Compression.NONE: '',
+    Compression.GZIP: '.gz',
+    Compression.ZSTD: '.zst',
+}
+
+# gzip container for zlib (header + trailer, readable with the gzip command line tool)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def select_compression(file_name):
+    """Return the codec used to store a file, following the FILE_COMPRESSION setting."""
+    codec = getattr(settings, 'FILE_COMPRESSION', 'zstd').lower()
+    skipped_extensions = getattr(settings, 'FILE_COMPRESSION_SKIP_EXTENSIONS', [])
+
+    if codec == 'none' or os.path.splitext(file_name)[1].lower() in skipped_extensions:
+        return Compression.NONE
+    if codec == 'zstd':
+        if zstandard is not None:
+            return Compression.ZSTD
+        logger.warning("zstandard is not installed, falling back to gzip compression")
+        return Compression.GZIP
+    if codec == 'gzip':
+        return Compression.GZIP
+    raise ValueError(f"Unknown file compression: {codec}")
+
+
+def _compressor(compression):
+    level = getattr(settings, 'FILE_COMPRESSION_LEVEL', None)
+    if compression == Compression.ZSTD:
+        return zstandard.ZstdCompressor(level=level or 3).compressobj()
+    return zlib.compressobj(level or 6, zlib.DEFLATED, GZIP_WBITS)
+
+
+def _decompressor(compression):
+    if compression == Compression.ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard is required to read zstd compressed files.")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(GZIP_WBITS)
+
+
+class CompressingReader(io.RawIOBase):
+    """
+    Read-only, non-seekable stream of the compressed content of a file.
+    The source is read and compressed chunk by chunk while the stream is consumed, so it can be
+    handed to any storage writer (S3 upload_fileobj, SFTP copy, Django storage) without buffering the file.
+    `progress`, if given, is called with the number of uncompressed bytes consumed after every chunk.
+    """
+
+    def __init__(self, file, compression, chunk_size=None, progress=None):
+        self._chunks = iter_chunks(file, chunk_size)
+        self._compressor = _compressor(compression)
+        self._buffer = bytearray()
+        self._eof = False
+        self._progress = progress
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self._buffer) < len(buffer) and not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+                continue
+
+            self.bytes_in += len(chunk)
+            self._buffer += self._compressor.compress(chunk)
+            if self._progress:
+                self._progress(len(chunk))
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        self.bytes_out += size
+        return size
+
+
+def iter_decompressed(chunks, compression):
+    """Decompress an iterable of stored chunks while it is being read."""
+    if compression == Compression.NONE:
+        yield from chunks
+        return
+
+    decompressor = _decompressor(compression)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+    remaining = decompressor.flush()
+    if remaining:
+        yield remaining
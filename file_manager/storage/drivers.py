@@ -0,0 +1,392 @@
+import os
+import posixpath
+import stat
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+from loguru import logger
+
+from core.models import FileReference
+from file_manager.services.streaming import copy_stream, iter_chunks
+from file_manager.storage.s3_client import get_s3_client, get_transfer_config, s3_object_url
+from file_manager.storage.sftp_pool import scp_connection
+
+#Size (in bytes) and last modification time (datetime or None) of a stored object
+StorageStat = namedtuple('StorageStat', ['size', 'modified_at'])
+#An entry of a storage listing
+StoredObject = namedtuple('StoredObject', ['key', 'size', 'modified_at'])
+
+
+class StorageDriver:
+    """
+    Streaming access to the content kept by one storage provider.
+    Content is addressed by a key relative to the provider's root (e.g. blobs/ab/ab12...zst).
+    Drivers are shared by every request and task of a process, connections come from the
+    provider's pool (shared S3 client, pooled SFTP channels).
+    """
+    #Whether uploads to this provider are transferred in the background (by a Celery task)
+    remote = False
+    #False for providers that are declared but cannot store files yet
+    available = True
+
+    @contextmanager
+    def open(self, key, offset=0):
+        """Open the stored bytes for reading, positioned at `offset`."""
+        raise NotImplementedError
+
+    def read(self, key, chunk_size=None, offset=0):
+        """Yield the stored bytes in chunks, starting at `offset`."""
+        with self.open(key, offset) as stored_file:
+            yield from iter_chunks(stored_file, chunk_size)
+
+    def write(self, key, file, progress=None):
+        """
+        Stream a file to `key` and return its URL.
+        `progress`, if given, is called with the number of bytes sent after every chunk.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Delete the content stored under `key`; deleting missing content is not an error."""
+        raise NotImplementedError
+
+    def move(self, key, new_key):
+        """Move content to a new key and return its new URL."""
+        raise NotImplementedError
+
+    def stat(self, key):
+        """Return the StorageStat of the content under `key`, or None if there is none."""
+        raise NotImplementedError
+
+    def list(self, prefix=''):
+        """
+        Yield a StoredObject for everything stored under the `prefix` directory, in key order.
+        The listing is streamed (page by page, or directory by directory), never loaded at once.
+        """
+        raise NotImplementedError
+
+    def url(self, key):
+        raise NotImplementedError
+
+    def key_from_url(self, url):
+        """Key of the content stored at a URL returned by `write` or `move`."""
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Path of the content on the local filesystem, None when it is not stored locally."""
+        return None
+
+
+class LocalStorageDriver(StorageDriver):
+    """Files under MEDIA_ROOT, through Django's default storage."""
+
+    @contextmanager
+    def open(self, key, offset=0):
+        with default_storage.open(key, 'rb') as stored_file:
+            stored_file.seek(offset)
+            # The underlying file, Django's File.chunks() would rewind it
+            yield stored_file.file
+
+    def write(self, key, file, progress=None):
+        # Keys are content addressed, an existing file with the same key already holds the same bytes.
+        # Streamed in chunks, or moved if the upload is already on disk (so no progress is reported).
+        if not default_storage.exists(key):
+            saved_path = default_storage.save(key, file)
+            if saved_path != key:
+                # Lost a race against a concurrent upload of the same content
+                default_storage.delete(saved_path)
+        return self.url(key)
+
+    def delete(self, key):
+        default_storage.delete(key)
+
+    def move(self, key, new_key):
+        new_path = default_storage.path(new_key)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        file_move_safe(default_storage.path(key), new_path)
+        return self.url(new_key)
+
+    def stat(self, key):
+        if not default_storage.exists(key):
+            return None
+        return StorageStat(default_storage.size(key), default_storage.get_modified_time(key))
+
+    def list(self, prefix=''):
+        yield from self._walk(default_storage.path(prefix), prefix)
+
+    def _walk(self, directory, key_prefix):
+        try:
+            with os.scandir(directory) as entries:
+                # Directories sort as 'name/' so keys come out in the same order as S3 listings
+                entries = sorted(entries, key=lambda entry: entry.name + '/' if entry.is_dir() else entry.name)
+        except FileNotFoundError:
+            return
+
+        for entry in entries:
+            key = key_prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(entry.path, key + '/')
+            else:
+                file_stat = entry.stat()
+                yield StoredObject(key, file_stat.st_size, datetime.fromtimestamp(file_stat.st_mtime, tz=timezone.utc))
+
+    def url(self, key):
+        return settings.MEDIA_URL + key
+
+    def key_from_url(self, url):
+        return url.replace(settings.MEDIA_URL, "").lstrip("/")
+
+    def local_path(self, key):
+        return default_storage.path(key)
+
+
+class S3StorageDriver(StorageDriver):
+    """Objects in AWS_STORAGE_BUCKET_NAME, through the shared S3 client."""
+    remote = True
+
+    @property
+    def bucket(self):
+        return settings.AWS_STORAGE_BUCKET_NAME
+
+    @contextmanager
+    def open(self, key, offset=0):
+        extra = {'Range': f'bytes={offset}-'} if offset else {}
+        body = get_s3_client().get_object(Bucket=self.bucket, Key=key, **extra)['Body']
+        try:
+            yield body
+        finally:
+            body.close()
+
+    def read(self, key, chunk_size=None, offset=0):
+        with self.open(key, offset) as body:
+            yield from body.iter_chunks(chunk_size or settings.FILE_UPLOAD_CHUNK_SIZE)
+
+    def write(self, key, file, progress=None):
+        try:
+            # upload_fileobj reads the file in parts, it never loads it fully in memory.
+            # Large files are sent as concurrent multipart uploads.
+            if file.seekable():
+                file.seek(0)
+            get_s3_client().upload_fileobj(
+                file,
+                self.bucket,
+                key,
+                Config=get_transfer_config(),
+                Callback=progress
+            )
+            return self.url(key)
+
+        except NoCredentialsError:
+            raise ValueError("AWS credentials not found.")
+        except PartialCredentialsError:
+            raise ValueError("AWS credentials are incomplete.")
+        except Exception as e:
+            raise ValueError(f"Error uploading file to S3: {str(e)}")
+
+    def delete(self, key):
+        get_s3_client().delete_object(Bucket=self.bucket, Key=key)
+
+    def move(self, key, new_key):
+        # Server-side copy, the bytes never leave S3
+        s3_client = get_s3_client()
+        s3_client.copy({'Bucket': self.bucket, 'Key': key}, self.bucket, new_key, Config=get_transfer_config())
+        s3_client.delete_object(Bucket=self.bucket, Key=key)
+        return self.url(new_key)
+
+    def stat(self, key):
+        try:
+            head = get_s3_client().head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return StorageStat(head['ContentLength'], head.get('LastModified'))
+
+    def list(self, prefix=''):
+        paginator = get_s3_client().get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get('Contents', []):
+                yield StoredObject(item['Key'], item['Size'], item['LastModified'])
+
+    def url(self, key):
+        return s3_object_url(key)
+
+    def key_from_url(self, url):
+        prefix = s3_object_url('')
+        if url.startswith(prefix):
+            return url[len(prefix):]
+        return urlparse(url).path.lstrip('/')
+
+
+class SCPStorageDriver(StorageDriver):
+    """Files under SCP_REMOTE_PATH on the SCP server, over pooled SFTP connections."""
+    remote = True
+
+    @staticmethod
+    def remote_path(key):
+        return posixpath.join(settings.SCP_REMOTE_PATH, key)
+
+    @contextmanager
+    def open(self, key, offset=0):
+        with scp_connection() as sftp:
+            with sftp.open(self.remote_path(key), 'rb') as remote_file:
+                remote_file.seek(offset)
+                remote_file.prefetch()
+                yield remote_file
+
+    def write(self, key, file, progress=None):
+        try:
+            remote_file_path = self.remote_path(key)
+            # Reuse a pooled SSH transport/SFTP channel instead of a full handshake per file
+            with scp_connection() as sftp:
+                self.make_dirs(sftp, posixpath.dirname(remote_file_path))
+                # Stream the file to the remote server chunk by chunk
+                with sftp.open(remote_file_path, 'wb') as remote_file:
+                    remote_file.set_pipelined(True)
+                    copy_stream(file, remote_file, callback=progress)
+            return self.url(key)
+
+        except Exception as e:
+            raise ValueError(f"Error uploading file to SCP: {str(e)}")
+
+    def delete(self, key):
+        remote_file_path = self.remote_path(key)
+        with scp_connection() as sftp:
+            try:
+                sftp.remove(remote_file_path)
+            except FileNotFoundError:
+                logger.warning(f"SCP file already removed: {remote_file_path}")
+
+    def move(self, key, new_key):
+        new_remote_path = self.remote_path(new_key)
+        with scp_connection() as sftp:
+            self.make_dirs(sftp, posixpath.dirname(new_remote_path))
+            sftp.posix_rename(self.remote_path(key), new_remote_path)
+        return self.url(new_key)
+
+    def stat(self, key):
+        with scp_connection() as sftp:
+            try:
+                attributes = sftp.stat(self.remote_path(key))
+            except FileNotFoundError:
+                return None
+        return StorageStat(attributes.st_size, None)
+
+    def list(self, prefix=''):
+        # Each directory is listed on a borrowed connection, which is returned before its entries are yielded
+        with scp_connection() as sftp:
+            try:
+                entries = sftp.listdir_attr(self.remote_path(prefix))
+            except FileNotFoundError:
+                return
+        entries.sort(key=lambda entry: entry.filename + '/' if stat.S_ISDIR(entry.st_mode) else entry.filename)
+
+        for entry in entries:
+            key = prefix + entry.filename
+            if stat.S_ISDIR(entry.st_mode):
+                yield from self.list(key + '/')
+            else:
+                yield StoredObject(key, entry.st_size, datetime.fromtimestamp(entry.st_mtime, tz=timezone.utc))
+
+    def url(self, key):
+        return f"scp://{settings.SCP_HOST}/{self.remote_path(key)}"
+
+    def key_from_url(self, url):
+        remote_file_path = urlparse(url).path[1:]
+        root = settings.SCP_REMOTE_PATH.rstrip('/') + '/'
+        if remote_file_path.startswith(root):
+            return remote_file_path[len(root):]
+        # Outside of SCP_REMOTE_PATH, only reachable through an absolute path
+        return remote_file_path
+
+    @staticmethod
+    def make_dirs(sftp, remote_dir):
+        """Create a remote directory and its missing parents."""
+        missing = []
+        while remote_dir and remote_dir != '/':
+            try:
+                sftp.stat(remote_dir)
+                break
+            except FileNotFoundError:
+                missing.append(remote_dir)
+                remote_dir = posixpath.dirname(remote_dir)
+
+        for directory in reversed(missing):
+            try:
+                sftp.mkdir(directory)
+            except OSError:
+                # Created meanwhile by a concurrent upload
+                pass
+
+
+class GoogleDriveStorageDriver(StorageDriver):
+    """Placeholder for Google Drive: the provider can be selected, but no file can be stored there yet."""
+    remote = True
+    available = False
+
+    @contextmanager
+    def open(self, key, offset=0):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+        yield
+
+    def write(self, key, file, progress=None):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+
+    def delete(self, key):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+
+    def move(self, key, new_key):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+
+    def stat(self, key):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+
+    def list(self, prefix=''):
+        raise NotImplementedError("Google Drive storage is not supported yet.")
+
+    def url(self, key):
+        return f"gdrive://{key}"
+
+    def key_from_url(self, url):
+        return url[len("gdrive://"):]
+
+
+# Driver class of every storage provider, see register_storage_driver
+_driver_classes = {
+    FileReference.StorageProvider.LOCAL: LocalStorageDriver,
+    FileReference.StorageProvider.S3: S3StorageDriver,
+    FileReference.StorageProvider.SCP: SCPStorageDriver,
+    FileReference.StorageProvider.GOOGLE_DRIVE: GoogleDriveStorageDriver,
+}
+_drivers = {}
+_drivers_lock = threading.Lock()
+
+
+def register_storage_driver(storage_provider, driver_class):
+    """Use `driver_class` (a StorageDriver subclass) for a storage provider, replacing its current driver."""
+    with _drivers_lock:
+        _driver_classes[storage_provider] = driver_class
+        _drivers.pop(storage_provider, None)
+
+
+def get_storage_driver(storage_provider):
+    """Return the process-wide driver of a storage provider; raises ValueError for providers without one."""
+    driver = _drivers.get(storage_provider)
+    if driver is not None:
+        return driver
+
+    with _drivers_lock:
+        driver = _drivers.get(storage_provider)
+        if driver is None:
+            driver_class = _driver_classes.get(storage_provider)
+            if driver_class is None:
+                raise ValueError("Unsupported storage provider.")
+            driver = driver_class()
+            _drivers[storage_provider] = driver
+    return driver
@@ -0,0 +1,90 @@
+import os
+import threading
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
+
+# Process-wide S3 clients. boto3 clients are thread-safe, so one client (and its
+# connection pool) is shared by every request and task handled by the process.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Return the shared S3 client for the configured credentials and endpoint.
+    The client is created once per process; its pooled connections keep TLS sessions alive between calls.
+    """
+    key = (
+        # Clients must not be shared across forked workers (gunicorn/celery prefork)
+        os.getpid(),
+        getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+        getattr(settings, 'AWS_S3_REGION_NAME', None),
+        getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+    )
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = create_s3_client()
+            _clients[key] = client
+    return client
+
+
+def create_s3_client(endpoint_url=None, max_pool_connections=None):
+    """Build a new S3 client with the deployment's connection-pool settings."""
+    config = Config(
+        max_pool_connections=max_pool_connections or settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        retries={'max_attempts': settings.AWS_S3_MAX_ATTEMPTS, 'mode': 'standard'},
+        tcp_keepalive=True,
+        # SigV4 everywhere, presigned URLs can then sign checksum headers
+        signature_version='s3v4',
+    )
+    # Sessions are not thread-safe, so every client gets its own
+    session = boto3.session.Session()
+    return session.client(
+        's3',
+        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None),
+        region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
+        endpoint_url=endpoint_url or getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+        config=config,
+    )
+
+
+def get_transfer_config(multipart_chunksize=None, max_concurrency=None):
+    """Multipart transfer settings used for every upload/download of event files."""
+    max_concurrency = max_concurrency or settings.AWS_S3_MAX_CONCURRENCY
+    return TransferConfig(
+        multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=multipart_chunksize or settings.AWS_S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=max_concurrency,
+        use_threads=max_concurrency > 1,
+    )
+
+
+def s3_object_url(key):
+    """Return the URL of an object in the configured bucket."""
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    endpoint_url = getattr(settings, 'AWS_S3_ENDPOINT_URL', None)
+    if endpoint_url:
+        return f"{endpoint_url.rstrip('/')}/{bucket}/{key}"
+    return f"https://{bucket}.s3.amazonaws.com/{key}"
+
+
+def presigned_download_url(key, expires_in=None, **response_headers):
+    """
+    Return a time-limited URL to GET an object straight from S3.
+    `response_headers` (e.g. ResponseContentDisposition) override the headers S3 sends back.
+    """
+    params = {'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key}
+    params.update(response_headers)
+    return get_s3_client().generate_presigned_url(
+        'get_object',
+        Params=params,
+        ExpiresIn=expires_in or settings.FILE_DOWNLOAD_URL_EXPIRY
+    )
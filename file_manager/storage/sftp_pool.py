@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import paramiko
+from django.conf import settings
+from loguru import logger
+
+
+class _PooledConnection:
+    """An authenticated SSH transport with an open SFTP channel."""
+
+    def __init__(self, ssh_client, sftp):
+        self.ssh_client = ssh_client
+        self.sftp = sftp
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        transport = self.ssh_client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def ping(self):
+        """Round-trip on the SFTP channel; False if the server or the network dropped the connection."""
+        try:
+            self.sftp.normalize('.')
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            self.sftp.close()
+        finally:
+            self.ssh_client.close()
+
+
+class SFTPConnectionPool:
+    """
+    Bounded, thread-safe pool of keep-alive SSH transports and SFTP channels keyed by (host, port, user).
+
+    At most `max_connections` connections per key exist at once; callers wait for a free one.
+    Idle connections are kept alive with SSH keepalives, health-checked before reuse
+    and evicted once they have been idle for longer than `idle_timeout` seconds.
+    """
+
+    def __init__(self, max_connections=8, idle_timeout=300, keepalive_interval=30,
+                 health_check_after=30, connect_timeout=10, acquire_timeout=60):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.health_check_after = health_check_after
+        self.connect_timeout = connect_timeout
+        self.acquire_timeout = acquire_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    @contextmanager
+    def connection(self, host, port, username, password=None, key_filename=None):
+        """Borrow an SFTP client for (host, port, username); it is returned to the pool on exit."""
+        key = (host, port, username)
+        slots = self._get_slots(key)
+        if not slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No SFTP connection to {host} became available in {self.acquire_timeout}s.")
+
+        connection = None
+        try:
+            connection = self._checkout(key) or self._connect(host, port, username, password, key_filename)
+            yield connection.sftp
+        finally:
+            if connection is not None:
+                self._checkin(key, connection)
+            slots.release()
+
+    def close_all(self):
+        """Close every idle connection (e.g. on shutdown)."""
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+    def _get_slots(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.max_connections)
+                self._idle[key] = deque()
+            return self._slots[key]
+
+    def _checkout(self, key):
+        """Return a healthy idle connection, closing dead or expired ones on the way."""
+        while True:
+            with self._lock:
+                idle = self._idle[key]
+                if not idle:
+                    return None
+                # Most recently used first, so rarely used connections age out
+                connection = idle.pop()
+
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.idle_timeout or not connection.is_alive():
+                connection.close()
+                continue
+            if idle_for > self.health_check_after and not connection.ping():
+                connection.close()
+                continue
+            return connection
+
+    def _checkin(self, key, connection):
+        if not connection.is_alive():
+            connection.close()
+            return
+
+        connection.last_used = time.monotonic()
+        expired = []
+        with self._lock:
+            idle = self._idle[key]
+            idle.append(connection)
+            # Oldest connections sit at the left of the deque
+            while idle and connection.last_used - idle[0].last_used > self.idle_timeout:
+                expired.append(idle.popleft())
+        for stale in expired:
+            stale.close()
+
+    def _connect(self, host, port, username, password, key_filename):
+        logger.debug(f"Opening SFTP connection to {username}@{host}:{port}")
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh_client.connect(
+            host,
+            port=port,
+            username=username,
+            password=password,
+            key_filename=key_filename,
+            timeout=self.connect_timeout,
+        )
+        ssh_client.get_transport().set_keepalive(self.keepalive_interval)
+        return _PooledConnection(ssh_client, ssh_client.open_sftp())
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_sftp_pool():
+    """Return the process-wide SFTP connection pool (a new one after a fork)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SFTPConnectionPool(
+                max_connections=getattr(settings, 'SCP_POOL_MAX_CONNECTIONS', 8),
+                idle_timeout=getattr(settings, 'SCP_POOL_IDLE_TIMEOUT', 300),
+                keepalive_interval=getattr(settings, 'SCP_KEEPALIVE_INTERVAL', 30),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def scp_connection():
+    """Borrow a pooled SFTP client for the configured SCP server."""
+    return get_sftp_pool().connection(
+        settings.SCP_HOST,
+        getattr(settings, 'SCP_PORT', 22),
+        settings.SCP_USER,
+        password=getattr(settings, 'SCP_PASSWORD', None),
+        key_filename=getattr(settings, 'SCP_KEY_FILENAME', None),
+    )
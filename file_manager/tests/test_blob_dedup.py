@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, StoredBlob, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class BlobDeduplicationTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.first_system = EventSystemService.create_event_system('First', self.user)
+        self.second_system = EventSystemService.create_event_system('Second', self.user)
+
+    def upload(self, event_system, name, content):
+        response = self.client.post(
+            f'/api/eventSystem/{event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile(name, content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return FileReference.objects.get(id=response.data['file_id'])
+
+    def test_identical_content_is_stored_once(self):
+        content = b'2024-01-01 ERROR disk full\n' * 100
+        first = self.upload(self.first_system, 'app.log', content)
+        second = self.upload(self.second_system, 'app.log.1', content)
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+        blob = StoredBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(second.url, blob.url)
+
+    def test_content_is_deleted_with_its_last_reference(self):
+        content = b'2024-01-01 INFO started\n' * 100
+        first = self.upload(self.first_system, 'app.log', content)
+        second = self.upload(self.second_system, 'app.log', content)
+        stored_path = os.path.join(self.media_root, first.blob.storage_key)
+
+        EventSystemFileService.delete_file(self.first_system.id, first.id, self.user)
+        self.assertTrue(os.path.exists(stored_path))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+
+        EventSystemFileService.delete_file(self.second_system.id, second.id, self.user)
+        self.assertFalse(os.path.exists(stored_path))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_rename_keeps_shared_content(self):
+        content = b'2024-01-01 WARN slow\n' * 100
+        first = self.upload(self.first_system, 'app.log', content)
+        self.upload(self.second_system, 'app.log', content)
+
+        renamed = EventSystemFileService.update_file_name(self.first_system.id, first.id, 'renamed.log', self.user)
+
+        self.assertEqual(renamed.file_name, 'renamed.log')
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, first.blob.storage_key)))
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemFile, FileReference, StoredBlob, User, UserSystemPermissions
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.services.tasks import delete_stored_files
+
+
+class FileBulkActionTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Bulk', self.user)
+        self.url = f'/api/eventSystem/{self.event_system.id}/files/bulk'
+
+        self.files = [
+            FileReference.objects.create(file_name=f'app-{index}.log', size=10) for index in range(50)
+        ]
+        EventSystemFileService.link_files(self.event_system, self.files)
+        self.file_ids = [str(file_reference.id) for file_reference in self.files]
+
+    def test_select_many_files_with_a_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'action': 'select', 'file_ids': self.file_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 50)
+        self.assertEqual(EventSystemFile.objects.filter(is_selected=True).count(), 50)
+        self.assertLessEqual(len(queries), 10)
+
+        response = self.client.post(self.url, {'action': 'deselect', 'file_ids': self.file_ids[:10]}, format='json')
+        self.assertEqual(EventSystemFile.objects.filter(is_selected=True).count(), 40)
+
+    def test_batch_with_foreign_file_is_rejected_entirely(self):
+        other = EventSystemService.create_event_system('Other', self.user)
+        foreign = FileReference.objects.create(file_name='foreign.log', size=1)
+        EventSystemFileService.link_files(other, [foreign])
+
+        response = self.client.post(
+            self.url, {'action': 'select', 'file_ids': self.file_ids + [str(foreign.id)]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(EventSystemFile.objects.filter(is_selected=True).exists())
+
+    def test_viewer_cannot_delete(self):
+        viewer = User.objects.create_user(email='viewer@example.com', password='password123', name='Viewer')
+        UserSystemPermissions.objects.create(
+            user=viewer, event_system=self.event_system, permission_level=UserSystemPermissions.PermissionLevel.VIEWER
+        )
+        self.client.force_authenticate(user=viewer)
+
+        response = self.client.post(self.url, {'action': 'delete', 'file_ids': self.file_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_removes_references_and_content_in_background(self):
+        upload = self.client.post(
+            f'/api/eventSystem/{self.event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile('stored.log', b'content')},
+            format='multipart'
+        )
+        stored = FileReference.objects.get(id=upload.data['file_id'])
+        stored_path = os.path.join(self.media_root, stored.blob.storage_key)
+
+        with mock.patch('file_manager.services.tasks.delete_stored_files.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url, {'action': 'delete', 'file_ids': self.file_ids + [str(stored.id)]}, format='json'
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(FileReference.objects.exists())
+        # The bytes are only removed by the task
+        self.assertTrue(os.path.exists(stored_path))
+        delete_stored_files(*delay.call_args.args)
+        self.assertFalse(os.path.exists(stored_path))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_rename_allows_swapping_names(self):
+        first, second = self.files[0], self.files[1]
+        response = self.client.post(self.url, {'action': 'rename', 'renames': [
+            {'file_id': str(first.id), 'file_name': second.file_name},
+            {'file_id': str(second.id), 'file_name': first.file_name},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        self.assertEqual(first.file_name, 'app-1.log')
+
+    def test_rename_to_existing_name_conflicts(self):
+        response = self.client.post(self.url, {'action': 'rename', 'renames': [
+            {'file_id': self.file_ids[0], 'file_name': 'app-2.log'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
@@ -0,0 +1,84 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, StoredBlob, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.storage import compression
+from file_manager.storage.compression import CompressingReader, iter_decompressed, select_compression
+
+LOG_CONTENT = b''.join(b'2024-01-01 12:00:%02d INFO worker-%d handled request\n' % (i % 60, i % 7) for i in range(5000))
+
+
+class CompressionCodecTest(SimpleTestCase):
+    def roundtrip(self, codec):
+        progress = []
+        reader = CompressingReader(io.BytesIO(LOG_CONTENT), codec, chunk_size=4096, progress=progress.append)
+        compressed = reader.read()
+
+        self.assertEqual(reader.bytes_in, len(LOG_CONTENT))
+        self.assertEqual(reader.bytes_out, len(compressed))
+        self.assertEqual(sum(progress), len(LOG_CONTENT))
+        self.assertLess(len(compressed), len(LOG_CONTENT) // 5)
+
+        chunks = [compressed[i:i + 1000] for i in range(0, len(compressed), 1000)]
+        self.assertEqual(b''.join(iter_decompressed(chunks, codec)), LOG_CONTENT)
+        return compressed
+
+    def test_gzip_roundtrip(self):
+        compressed = self.roundtrip(StoredBlob.Compression.GZIP)
+        # Stored content is a regular gzip file
+        self.assertEqual(gzip.decompress(compressed), LOG_CONTENT)
+
+    @skipIf(compression.zstandard is None, 'zstandard is not installed')
+    def test_zstd_roundtrip(self):
+        self.roundtrip(StoredBlob.Compression.ZSTD)
+
+    def test_codec_selection(self):
+        with override_settings(FILE_COMPRESSION='gzip'):
+            self.assertEqual(select_compression('app.log'), StoredBlob.Compression.GZIP)
+            self.assertEqual(select_compression('app.log.gz'), StoredBlob.Compression.NONE)
+        with override_settings(FILE_COMPRESSION='none'):
+            self.assertEqual(select_compression('app.log'), StoredBlob.Compression.NONE)
+        with override_settings(FILE_COMPRESSION='zstd'):
+            expected = StoredBlob.Compression.ZSTD if compression.zstandard else StoredBlob.Compression.GZIP
+            self.assertEqual(select_compression('app.log'), expected)
+
+
+@override_settings(FILE_COMPRESSION='gzip')
+class CompressedUploadTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Uploads', self.user)
+
+    def test_upload_is_compressed_at_rest(self):
+        response = self.client.post(
+            f'/api/eventSystem/{self.event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile('app.log', LOG_CONTENT)},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        file_reference = FileReference.objects.get(id=response.data['file_id'])
+        blob = file_reference.blob
+        self.assertEqual(blob.compression, StoredBlob.Compression.GZIP)
+        self.assertEqual(file_reference.size, len(LOG_CONTENT))
+        self.assertEqual(blob.stored_size, os.path.getsize(os.path.join(self.media_root, blob.storage_key)))
+        self.assertLess(blob.stored_size, file_reference.size // 5)
+
+        self.assertEqual(b''.join(EventSystemFileService.iter_file_content(file_reference)), LOG_CONTENT)
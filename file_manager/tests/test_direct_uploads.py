@@ -0,0 +1,197 @@
+import hashlib
+from unittest import mock, skipIf
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import DirectUpload, EventSystemFile, FileReference, StoredBlob, User
+from file_manager.services.direct_upload_services import DirectUploadService
+from file_manager.services.services import EventSystemService
+from file_manager.storage import s3_client
+
+try:
+    import requests
+    from moto import mock_aws
+except ImportError:  # moto stands in for S3 in these tests
+    mock_aws = None
+
+CONTENT = b'2024-01-01 12:00:00 INFO direct upload\n' * 1000
+
+
+@skipIf(mock_aws is None, 'moto is not installed')
+@override_settings(
+    AWS_STORAGE_BUCKET_NAME='direct-uploads',
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_ENDPOINT_URL=None,
+)
+class DirectUploadTest(APITestCase):
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        s3_client._clients.clear()
+        self.addCleanup(s3_client._clients.clear)
+        s3_client.get_s3_client().create_bucket(Bucket='direct-uploads')
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Direct', self.user)
+        self.base_url = f'/api/eventSystem/{self.event_system.id}/directUploads'
+
+    def start_upload(self, name='app.log', content=CONTENT, checksum=None):
+        return self.client.post(self.base_url, {
+            'file_name': name,
+            'size': len(content),
+            'checksum': checksum or hashlib.sha256(content).hexdigest()
+        }, format='json')
+
+    def complete(self, upload_id):
+        with mock.patch('file_manager.services.tasks.verify_direct_upload.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'{self.base_url}/{upload_id}/complete', {}, format='json')
+        for call in delay.call_args_list:
+            DirectUploadService.verify_upload(*call.args)
+        return response
+
+    def test_single_put_upload_is_verified_and_registered(self):
+        response = self.start_upload()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        put = requests.put(response.data['url'], data=CONTENT, headers=response.data['headers'])
+        self.assertEqual(put.status_code, 200)
+
+        completed = self.complete(response.data['upload_id'])
+        self.assertIn(completed.status_code, (status.HTTP_201_CREATED, status.HTTP_202_ACCEPTED))
+
+        upload = DirectUpload.objects.get(id=response.data['upload_id'])
+        self.assertEqual(upload.status, DirectUpload.DirectUploadStatus.COMPLETE)
+        file_reference = upload.file_reference
+        self.assertEqual(file_reference.storage_provider, FileReference.StorageProvider.S3)
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.COMPLETE)
+        self.assertTrue(self.event_system.file_objects.filter(id=file_reference.id).exists())
+
+        # The object was moved to its content-addressed key
+        stored = s3_client.get_s3_client().get_object(Bucket='direct-uploads', Key=file_reference.blob.storage_key)
+        self.assertEqual(stored['Body'].read(), CONTENT)
+
+    def test_multipart_upload(self):
+        content = b'x' * (6 * 1024 * 1024) + b'tail'
+        with override_settings(AWS_S3_MULTIPART_THRESHOLD=5 * 1024 * 1024, AWS_S3_MULTIPART_CHUNKSIZE=5 * 1024 * 1024):
+            response = self.start_upload(content=content)
+        self.assertEqual(len(response.data['parts']), 2)
+
+        part_size = response.data['part_size']
+        for part in response.data['parts']:
+            offset = (part['part_number'] - 1) * part_size
+            requests.put(part['url'], data=content[offset:offset + part_size])
+
+        completed = self.complete(response.data['upload_id'])
+
+        # Verified by S3, the object is not downloaded to be hashed
+        self.assertEqual(completed.status_code, status.HTTP_201_CREATED)
+        upload = DirectUpload.objects.get(id=response.data['upload_id'])
+        self.assertEqual(upload.status, DirectUpload.DirectUploadStatus.COMPLETE)
+        self.assertEqual(upload.file_reference.size, len(content))
+
+    def test_wrong_content_is_rejected(self):
+        response = self.start_upload()
+        # Same size, different bytes
+        requests.put(response.data['url'], data=CONTENT[:-1] + b'!', headers=response.data['headers'])
+
+        completed = self.complete(response.data['upload_id'])
+
+        upload = DirectUpload.objects.get(id=response.data['upload_id'])
+        if completed.status_code == status.HTTP_202_ACCEPTED:
+            self.assertEqual(upload.status, DirectUpload.DirectUploadStatus.FAILED)
+        else:
+            self.assertEqual(completed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(upload.file_reference)
+        self.assertFalse(FileReference.objects.exists())
+
+    def test_name_taken_before_registration_keeps_nothing(self):
+        response = self.start_upload()
+        requests.put(response.data['url'], data=CONTENT, headers=response.data['headers'])
+        upload = DirectUpload.objects.get(id=response.data['upload_id'])
+        # Another file of the same name was added after the upload was completed
+        other = FileReference.objects.create(
+            file_name='app.log', storage_provider=FileReference.StorageProvider.S3, size=1,
+            file_type=FileReference.FileType.EVENT_FILE
+        )
+        EventSystemFile.objects.create(event_system=self.event_system, file_reference=other, file_name='app.log')
+
+        with self.assertRaises(FileExistsError):
+            DirectUploadService.register_upload(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, DirectUpload.DirectUploadStatus.FAILED)
+        self.assertIsNone(upload.file_reference)
+        self.assertFalse(StoredBlob.objects.exists())
+        listing = s3_client.get_s3_client().list_objects_v2(Bucket='direct-uploads')
+        self.assertEqual(listing.get('Contents', []), [])
+
+    def test_content_the_user_can_read_is_registered_without_upload(self):
+        first = self.start_upload()
+        requests.put(first.data['url'], data=CONTENT, headers=first.data['headers'])
+        self.complete(first.data['upload_id'])
+
+        second = self.start_upload(name='copy.log')
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data['status'], 'Complete')
+        self.assertNotIn('url', second.data)
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+
+    def test_content_of_another_tenant_must_be_uploaded(self):
+        first = self.start_upload()
+        requests.put(first.data['url'], data=CONTENT, headers=first.data['headers'])
+        self.complete(first.data['upload_id'])
+
+        other = User.objects.create_user(email='other@example.com', password='password123', name='Other')
+        self.client.force_authenticate(user=other)
+        other_system = EventSystemService.create_event_system('Other', other)
+        self.base_url = f'/api/eventSystem/{other_system.id}/directUploads'
+
+        # Knowing the checksum is not enough, the bytes must be sent
+        response = self.start_upload()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'Active')
+        self.assertIsNotNone(response.data['url'])
+        self.assertFalse(other_system.file_objects.exists())
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+
+        requests.put(response.data['url'], data=CONTENT, headers=response.data['headers'])
+        self.complete(response.data['upload_id'])
+
+        self.assertEqual(other_system.file_objects.get().blob, StoredBlob.objects.get())
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+
+    def test_presigned_download_url(self):
+        response = self.start_upload()
+        requests.put(response.data['url'], data=CONTENT, headers=response.data['headers'])
+        self.complete(response.data['upload_id'])
+        file_id = DirectUpload.objects.get(id=response.data['upload_id']).file_reference_id
+
+        url = self.client.get(f'/api/eventSystem/{self.event_system.id}/files/{file_id}/downloadUrl').data['url']
+
+        self.assertEqual(requests.get(url).content, CONTENT)
+
+    def test_presigned_download_url_of_legacy_file(self):
+        s3_client.get_s3_client().put_object(Bucket='direct-uploads', Key='legacy/app.log', Body=CONTENT)
+        # Renamed since it was stored under its original name
+        file_reference = FileReference.objects.create(
+            file_name='renamed.log', storage_provider=FileReference.StorageProvider.S3, size=len(CONTENT),
+            url=s3_client.s3_object_url('legacy/app.log'), upload_status=FileReference.UploadStatus.COMPLETE
+        )
+        EventSystemFile.objects.create(
+            event_system=self.event_system, file_reference=file_reference, file_name='renamed.log'
+        )
+
+        url = self.client.get(
+            f'/api/eventSystem/{self.event_system.id}/files/{file_reference.id}/downloadUrl'
+        ).data['url']
+
+        self.assertEqual(requests.get(url).content, CONTENT)
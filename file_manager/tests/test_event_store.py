@@ -0,0 +1,188 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import (
+    EventSegment, EventSystemConfiguration, EventSystemFile, EventSystemUsage, FileReference, User
+)
+from file_manager.parsing.columnar import Segment, decode_timestamp, write_segment
+from file_manager.parsing.parser import LogEvent
+from file_manager.services.event_store_services import EventStoreService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.services.usage_services import StorageUsageService
+
+
+def at(minute):
+    return datetime(2024, 1, 1, 10, minute, tzinfo=timezone.utc)
+
+
+class ColumnarSegmentTest(TestCase):
+    def setUp(self):
+        descriptor, self.path = tempfile.mkstemp(suffix='.segment')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.path)
+
+    def write(self, events):
+        with open(self.path, 'wb') as segment_file:
+            return write_segment(segment_file, events)
+
+    def test_events_round_trip_sorted_by_time(self):
+        events = [
+            LogEvent(1, at(30), 'ERROR', 'db', 'Pool exhausted', {'status': 500}),
+            LogEvent(2, None, None, None, 'no timestamp', {}),
+            LogEvent(3, at(10), 'INFO', 'web', 'Served — 200', {}),
+            LogEvent(4, at(20), 'ERROR', 'web', 'Timeout', {}),
+        ]
+
+        stats = self.write(events)
+
+        self.assertEqual(stats['rows'], 4)
+        self.assertEqual((decode_timestamp(stats['min_timestamp']), decode_timestamp(stats['max_timestamp'])), (at(10), at(30)))
+        self.assertEqual(stats['levels'], {'INFO': 1, 'ERROR': 2, 'None': 1})
+        with Segment(self.path) as segment:
+            self.assertEqual([event.line_number for event in segment.events()], [3, 4, 1, 2])
+            self.assertEqual(list(segment.events())[0], events[2])
+            self.assertEqual(list(segment.events())[2].fields, {'status': 500})
+            # Dictionary-encoded columns hold codes
+            self.assertEqual(segment.dictionary('level'), ['INFO', 'ERROR', None])
+            self.assertEqual(list(segment.column('level')), [0, 1, 1, 2])
+            self.assertEqual(segment.column('message')[-1], 'no timestamp')
+
+    def test_time_range_is_a_binary_search(self):
+        self.write([LogEvent(minute, at(minute), 'INFO', None, str(minute), {}) for minute in range(60)])
+
+        with Segment(self.path) as segment:
+            self.assertEqual(segment.time_range(at(10), at(20)), (10, 20))
+            self.assertEqual([event.message for event in segment.events(at(58))], ['58', '59'])
+            self.assertEqual(segment.values('line_number', 5, 8), [5, 6, 7])
+
+    def test_other_files_are_rejected(self):
+        with open(self.path, 'wb') as segment_file:
+            segment_file.write(b'2024-01-01 10:00:00 INFO not a segment\n')
+
+        with self.assertRaises(ValueError):
+            Segment(self.path)
+
+    def test_empty_segment(self):
+        stats = write_segment(io.BytesIO(), [])
+
+        self.assertEqual((stats['rows'], stats['min_timestamp']), (0, None))
+
+
+class EventStoreServiceTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FILE_UPLOAD_STAGING_ROOT=os.path.join(self.media_root, 'staging'),
+            FILE_COMPRESSION='gzip'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Store', self.user)
+        EventSystemConfiguration.objects.filter(event_system=self.event_system).update(
+            timezone=EventSystemConfiguration.Timezone.UTC
+        )
+        # Out of order on purpose, each segment is sorted by time
+        content = b''.join(b'2024-01-01 10:%02d:00 INFO event %d\n' % (59 - index, index) for index in range(60))
+        self.source = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', content), self.event_system.id, self.user, FileReference.StorageProvider.LOCAL
+        )
+
+    def test_events_are_stored_in_segments(self):
+        segments = EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        self.assertEqual([segment.row_count for segment in segments], [25, 25, 10])
+        self.assertEqual((segments[0].min_timestamp, segments[0].max_timestamp), (at(35), at(59)))
+        file_reference = segments[0].file_reference
+        self.assertEqual(file_reference.file_type, FileReference.FileType.EVENT_SEGMENT)
+        self.assertEqual(file_reference.file_name, f'{self.source.id}.00000.segment')
+        self.assertFalse(EventSystemFile.objects.filter(file_reference=file_reference).exists())
+        # Segments are stored uncompressed, to be memory-mapped in place
+        self.assertEqual(file_reference.blob.size, file_reference.blob.stored_size)
+        usage = EventSystemUsage.objects.get(event_system=self.event_system)
+        self.assertEqual(usage.event_segment_bytes, sum(segment.file_reference.size for segment in segments))
+
+    def test_segments_are_neither_listed_nor_counted_in_the_quota(self):
+        self.event_system.max_files = 1
+        self.event_system.save()
+
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        files, _ = EventSystemFileService.list_files(self.event_system.id, self.user)
+        self.assertEqual(files, [self.source])
+        usage = EventSystemUsage.objects.get(event_system=self.event_system)
+        self.assertEqual((usage.file_count, usage.total_bytes), (1, self.source.size))
+        self.assertEqual(StorageUsageService.recompute([self.event_system.id]), 0)
+
+    def test_segment_names_never_conflict_with_files(self):
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+        EventSystemFileService.update_file_name(self.event_system.id, self.source.id, 'old.log', self.user)
+        replacement = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', b'2024-01-01 10:00:00 INFO new\n'), self.event_system.id, self.user,
+            FileReference.StorageProvider.LOCAL
+        )
+
+        EventStoreService.build_segments(replacement.id, self.event_system.id)
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        self.assertEqual(EventSegment.objects.count(), 4)
+
+    def test_segments_cannot_be_selected_as_files(self):
+        segment = EventStoreService.build_segments(self.source.id, self.event_system.id)[0]
+
+        with self.assertRaises(ValueError):
+            EventSystemFileService.bulk_action(self.event_system.id, self.user, 'select', [segment.file_reference_id])
+
+    def test_segments_of_a_shared_file_are_built_per_event_system(self):
+        other = EventSystemService.create_event_system('Other', self.user)
+        StorageUsageService.add_file(other, self.source)
+        EventSystemFileService.link_files(other, [self.source])
+        EventStoreService.build_segments(self.source.id, other.id, max_rows=25)
+
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=100)
+
+        self.assertEqual(EventStoreService.find_segments(other).count(), 3)
+        self.assertEqual(EventStoreService.find_segments(self.event_system).count(), 1)
+        self.assertEqual(StorageUsageService.recompute(), 0)
+
+    def test_time_range_reads_only_overlapping_segments(self):
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        self.assertEqual(EventStoreService.find_segments(self.event_system, at(0), at(5)).count(), 1)
+        events = list(EventStoreService.iter_events(self.event_system, at(30), at(40)))
+        self.assertEqual([event.timestamp.minute for event in events], list(range(30, 40)))
+
+    def test_rebuilding_replaces_segments(self):
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=100)
+
+        self.assertEqual(EventSegment.objects.filter(source_file=self.source).count(), 1)
+        self.assertEqual(FileReference.objects.filter(file_type=FileReference.FileType.EVENT_SEGMENT).count(), 1)
+
+    def test_segments_are_deleted_with_their_source(self):
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        EventSystemFileService.delete_file(self.event_system.id, self.source.id, self.user)
+
+        self.assertFalse(FileReference.objects.exists())
+        usage = EventSystemUsage.objects.get(event_system=self.event_system)
+        self.assertEqual((usage.file_count, usage.total_bytes, usage.event_segment_bytes), (0, 0, 0))
+
+    def test_segments_are_deleted_with_a_bulk_delete(self):
+        EventStoreService.build_segments(self.source.id, self.event_system.id, max_rows=25)
+
+        deleted_count = EventSystemFileService.bulk_action(self.event_system.id, self.user, 'delete', [self.source.id])
+
+        self.assertEqual(deleted_count, 1)
+        self.assertFalse(EventSegment.objects.exists())
+        self.assertFalse(FileReference.objects.exists())
@@ -0,0 +1,82 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemFile, EventSystemUsage, FileReference, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class EventSystemFileTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Files', self.user)
+        self.other = EventSystemService.create_event_system('Other', self.user)
+        self.file_reference = FileReference.objects.create(file_name='shared.log', size=10)
+        EventSystemFileService.link_files(self.event_system, [self.file_reference])
+        EventSystemFileService.link_files(self.other, [self.file_reference])
+
+    def test_selection_is_specific_to_the_event_system(self):
+        response = self.client.patch(f'/api/eventSystem/{self.event_system.id}/files/{self.file_reference.id}/select')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        selected = dict(EventSystemFile.objects.values_list('event_system_id', 'is_selected'))
+        self.assertEqual(selected, {self.event_system.id: True, self.other.id: False})
+        self.assertEqual(EventSystemUsage.objects.get(event_system=self.other).selected_count, 0)
+
+        response = self.client.get(f'/api/eventSystem/{self.other.id}/files/{self.file_reference.id}/')
+        self.assertFalse(response.data['is_selected'])
+        response = self.client.get(f'/api/eventSystem/{self.event_system.id}/files/', {'is_selected': 'true'})
+        self.assertEqual([item['file_name'] for item in response.data['results']], ['shared.log'])
+
+    def test_names_are_unique_per_event_system(self):
+        duplicate = FileReference.objects.create(file_name='shared.log', size=1)
+
+        with self.assertRaises(FileExistsError):
+            EventSystemFileService.link_files(self.event_system, [duplicate])
+        self.assertEqual(EventSystemFile.objects.filter(event_system=self.event_system).count(), 1)
+
+    def test_bulk_rename_can_swap_names(self):
+        first = FileReference.objects.create(file_name='first.log', size=1)
+        second = FileReference.objects.create(file_name='second.log', size=1)
+        EventSystemFileService.link_files(self.event_system, [first, second])
+
+        response = self.client.post(f'/api/eventSystem/{self.event_system.id}/files/bulk', {
+            'action': 'rename',
+            'renames': [
+                {'file_id': str(first.id), 'file_name': 'second.log'},
+                {'file_id': str(second.id), 'file_name': 'first.log'},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = dict(EventSystemFile.objects.filter(event_system=self.event_system).values_list('file_reference_id', 'file_name'))
+        self.assertEqual((names[first.id], names[second.id]), ('second.log', 'first.log'))
+        first.refresh_from_db()
+        self.assertEqual(first.file_name, 'second.log')
+
+    def test_rename_is_specific_to_the_event_system(self):
+        # The other event system has another file with the new name
+        taken = FileReference.objects.create(file_name='renamed.log', size=1)
+        EventSystemFileService.link_files(self.other, [taken])
+
+        response = self.client.patch(
+            f'/api/eventSystem/{self.event_system.id}/files/{self.file_reference.id}/',
+            {'file_name': 'renamed.log'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        names = dict(EventSystemFile.objects.filter(file_reference=self.file_reference).values_list('event_system_id', 'file_name'))
+        self.assertEqual(names, {self.event_system.id: 'renamed.log', self.other.id: 'shared.log'})
+        # A shared file keeps the name it was uploaded with
+        self.file_reference.refresh_from_db()
+        self.assertEqual(self.file_reference.file_name, 'shared.log')
+
+    def test_bulk_rename_is_specific_to_the_event_system(self):
+        response = self.client.post(f'/api/eventSystem/{self.event_system.id}/files/bulk', {
+            'action': 'rename',
+            'renames': [{'file_id': str(self.file_reference.id), 'file_name': 'renamed.log'}]
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = dict(EventSystemFile.objects.filter(file_reference=self.file_reference).values_list('event_system_id', 'file_name'))
+        self.assertEqual(names, {self.event_system.id: 'renamed.log', self.other.id: 'shared.log'})
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import FileReference, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.storage.cache import BlobCache, get_blob_cache
+from file_manager.storage.drivers import LocalStorageDriver, SCPStorageDriver, register_storage_driver
+
+
+class BlobCacheTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def test_concurrent_misses_fetch_once(self):
+        cache = BlobCache(self.root, 1024)
+        fetches = []
+
+        def fetch(destination):
+            fetches.append(1)
+            time.sleep(0.05)
+            destination.write(b'content')
+
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(cache.get(2, 'blobs/ab/abc', fetch))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual(len(set(paths)), 1)
+        with open(paths[0], 'rb') as cached_file:
+            self.assertEqual(cached_file.read(), b'content')
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['hits'], 7)
+
+    def test_least_recently_used_files_are_evicted(self):
+        cache = BlobCache(self.root, 25)
+        write = lambda destination: destination.write(b'x' * 10)
+
+        first = cache.get(2, 'a', write)
+        second = cache.get(2, 'b', write)
+        cache.get(2, 'a', write)  # 'b' is now the least recently used
+        cache.get(2, 'c', write)
+
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 20)
+        self.assertFalse(os.path.exists(second))
+        # Another process indexes the files left on disk
+        self.assertEqual(BlobCache(self.root, 25).get(2, 'a', lambda destination: self.fail('fetched again')), first)
+
+
+class CountingRemoteDriver(LocalStorageDriver):
+    """Local storage posing as a remote provider, counting the reads that reach it."""
+    remote = True
+    reads = 0
+
+    def read(self, key, chunk_size=None, offset=0):
+        CountingRemoteDriver.reads += 1
+        yield from super().read(key, chunk_size, offset)
+
+
+@override_settings(FILE_CACHE_MAX_BYTES=1024 * 1024)
+class ReadThroughTest(TestCase):
+    def setUp(self):
+        for name in ('media_root', 'cache_root'):
+            directory = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+            setattr(self, name, directory)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_CACHE_ROOT=self.cache_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        register_storage_driver(FileReference.StorageProvider.SCP, CountingRemoteDriver)
+        self.addCleanup(register_storage_driver, FileReference.StorageProvider.SCP, SCPStorageDriver)
+        CountingRemoteDriver.reads = 0
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        event_system = EventSystemService.create_event_system('Cache', self.user)
+        file_reference = FileReference.objects.create(
+            file_name='app.log',
+            storage_provider=FileReference.StorageProvider.SCP,
+            size=4000
+        )
+        EventSystemFileService.link_files(event_system, [file_reference])
+        self.content = b'2024-01-01 INFO cached\n' * 200
+        blob = EventSystemFileService.store_content(
+            SimpleUploadedFile('app.log', self.content), 'ab' * 32, len(self.content), FileReference.StorageProvider.SCP
+        )
+        self.file_reference = EventSystemFileService.attach_blob(file_reference, blob)
+
+    def test_remote_content_is_fetched_once(self):
+        for _ in range(3):
+            self.assertEqual(b''.join(EventSystemFileService.iter_file_content(self.file_reference)), self.content)
+        self.assertEqual(b''.join(EventSystemFileService.read_stored_content(self.file_reference, offset=5))[:5],
+                         b''.join(EventSystemFileService.read_stored_content(self.file_reference))[5:10])
+
+        self.assertEqual(CountingRemoteDriver.reads, 1)
+        self.assertGreaterEqual(get_blob_cache().stats()['hits'], 3)
+
+    def test_cache_can_be_disabled(self):
+        with override_settings(FILE_CACHE_MAX_BYTES=0):
+            for _ in range(2):
+                b''.join(EventSystemFileService.iter_file_content(self.file_reference))
+
+        self.assertEqual(CountingRemoteDriver.reads, 2)
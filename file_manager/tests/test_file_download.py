@@ -0,0 +1,102 @@
+import gzip
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, User
+from file_manager.services.download_services import FileDownloadService, RangeNotSatisfiable
+from file_manager.services.services import EventSystemService
+
+LOG_CONTENT = b''.join(b'2024-01-01 12:00:00 INFO request %d served\n' % i for i in range(2000))
+
+
+class RangeParsingTest(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(FileDownloadService.parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(FileDownloadService.parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(FileDownloadService.parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(FileDownloadService.parse_range('bytes=500-5000', 1000), (500, 999))
+        # Unsupported forms fall back to the whole file
+        self.assertIsNone(FileDownloadService.parse_range('bytes=0-1,5-6', 1000))
+        self.assertIsNone(FileDownloadService.parse_range(None, 1000))
+        with self.assertRaises(RangeNotSatisfiable):
+            FileDownloadService.parse_range('bytes=1000-', 1000)
+
+
+@override_settings(FILE_COMPRESSION='gzip', FILE_DOWNLOAD_OFFLOAD='')
+class FileDownloadViewTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='reader@example.com', password='password123', name='Reader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Downloads', self.user)
+        response = self.client.post(
+            f'/api/eventSystem/{self.event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile('app.log', LOG_CONTENT)},
+            format='multipart'
+        )
+        self.file_reference = FileReference.objects.get(id=response.data['file_id'])
+        self.url = f'/api/eventSystem/{self.event_system.id}/files/{self.file_reference.id}/download'
+
+    def test_download_is_decompressed_for_clients_without_gzip(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), LOG_CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(LOG_CONTENT)))
+        self.assertEqual(response['ETag'], f'"{self.file_reference.checksum}"')
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), LOG_CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(LOG_CONTENT)}')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(LOG_CONTENT)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_stored_bytes_are_sent_when_gzip_is_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), LOG_CONTENT)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(FILE_DOWNLOAD_OFFLOAD='x-accel', FILE_COMPRESSION='none')
+    def test_local_download_is_offloaded(self):
+        response = self.client.post(
+            f'/api/eventSystem/{self.event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile('raw.log', b'plain content')},
+            format='multipart'
+        )
+        file_reference = FileReference.objects.get(id=response.data['file_id'])
+
+        response = self.client.get(f'/api/eventSystem/{self.event_system.id}/files/{file_reference.id}/download')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + file_reference.blob.storage_key)
+
+    def test_user_without_permission_is_rejected(self):
+        other = User.objects.create_user(email='other@example.com', password='password123', name='Other')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemFile, FileReference, User
+from file_manager.services.pagination import encode_cursor
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class EventSystemFileListTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='lister@example.com', password='password123', name='Lister')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Listing', self.user)
+        self.url = f'/api/eventSystem/{self.event_system.id}/files/'
+
+        now = timezone.now()
+        files = []
+        for index in range(25):
+            file_reference = FileReference.objects.create(
+                file_name=f'{"app" if index % 2 else "db"}-{index:02d}.log',
+                size=index,
+                upload_status=FileReference.UploadStatus.COMPLETE,
+            )
+            files.append(file_reference)
+        # Several files share the same upload date, the id breaks the tie
+        for index, file_reference in enumerate(files):
+            file_reference.upload_date = now - timedelta(minutes=index // 3)
+            FileReference.objects.filter(id=file_reference.id).update(upload_date=file_reference.upload_date)
+        EventSystemFileService.link_files(self.event_system, files)
+        EventSystemFile.objects.filter(file_reference__in=files[::5]).update(is_selected=True)
+        # Files of another event system never show up
+        other = EventSystemService.create_event_system('Other', self.user)
+        EventSystemFileService.link_files(other, [FileReference.objects.create(file_name='other.log', size=1)])
+
+    def fetch_all(self, **params):
+        names, cursor = [], None
+        while True:
+            query = dict(params, page_size=4)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(item['file_name'] for item in response.data['results'])
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return names
+
+    def test_pages_cover_every_file_once_in_order(self):
+        names = self.fetch_all()
+
+        expected = list(
+            EventSystemFile.objects.filter(event_system=self.event_system)
+            .order_by('-upload_date', '-id').values_list('file_name', flat=True)
+        )
+        self.assertEqual(names, expected)
+        self.assertEqual(len(names), 25)
+
+    def test_ordering_by_name(self):
+        self.assertEqual(self.fetch_all(ordering='file_name'), sorted(self.fetch_all()))
+
+    def test_filters(self):
+        self.assertTrue(all(name.startswith('app') for name in self.fetch_all(name_prefix='app')))
+        self.assertEqual(len(self.fetch_all(name_prefix='app')), 12)
+        self.assertEqual(len(self.fetch_all(is_selected='true')), 5)
+        self.assertEqual(len(self.fetch_all(upload_status=FileReference.UploadStatus.PENDING)), 0)
+
+    def test_page_query_count_does_not_depend_on_depth(self):
+        first = self.client.get(self.url, {'page_size': 4})
+        with CaptureQueriesContext(connection) as first_queries:
+            self.client.get(self.url, {'page_size': 4})
+        with CaptureQueriesContext(connection) as deep_queries:
+            self.client.get(self.url, {'page_size': 4, 'cursor': first.data['next_cursor']})
+        self.assertEqual(len(first_queries), len(deep_queries))
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in deep_queries.captured_queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_values_are_validated(self):
+        file_id = EventSystemFile.objects.first().id
+        for cursor in (
+            encode_cursor('-upload_date', 'yesterday', file_id),
+            encode_cursor('-upload_date', None, file_id),
+            encode_cursor('-upload_date', timezone.now(), 'not-a-uuid'),
+        ):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['error'], 'Invalid cursor.')
@@ -0,0 +1,156 @@
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import skipIf
+from zoneinfo import ZoneInfo
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import EventSystemConfiguration, FileReference, User
+from file_manager.parsing.parser import LogParser, iter_lines
+from file_manager.parsing import patterns
+from file_manager.parsing.patterns import BUILTIN_PATTERNS, compile_pattern
+from file_manager.services.parsing_services import LogParsingService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class LogParserTest(TestCase):
+    def test_grok_tokens_capture_typed_fields(self):
+        parser = LogParser(compile_pattern('apache-access-log'))
+
+        event = parser.parse_line(
+            '10.0.0.1 - alice [10/Oct/2024:13:55:36 +0200] "GET /index.html HTTP/1.1" 200 2326 "-" "curl"', 7
+        )
+
+        self.assertEqual(event.line_number, 7)
+        self.assertEqual(event.timestamp, datetime(2024, 10, 10, 11, 55, 36, tzinfo=timezone.utc))
+        self.assertEqual(event.event_type, 'GET')
+        self.assertEqual(event.fields['status'], 200)
+        self.assertEqual(event.fields['bytes'], 2326)
+        self.assertEqual(event.fields['client'], '10.0.0.1')
+
+    def test_regex_with_named_groups(self):
+        parser = LogParser(compile_pattern(r'^(?P<timestamp>\S+) (?P<level>\w+) (?P<event_type>[\w.]+): (?P<message>.*)$'))
+
+        event = parser.parse_line('2024-05-01T10:00:00Z warn db.pool: Pool exhausted')
+
+        self.assertEqual(event.level, 'WARNING')
+        self.assertEqual(event.event_type, 'db.pool')
+        self.assertEqual(event.message, 'Pool exhausted')
+        self.assertEqual(event.timestamp, datetime(2024, 5, 1, 10, tzinfo=timezone.utc))
+        self.assertEqual(event.fields, {})
+
+    def test_naive_timestamps_use_the_configured_timezone(self):
+        parser = LogParser(compile_pattern('default-log-pattern'), ZoneInfo('Asia/Jerusalem'))
+
+        winter = parser.parse_line('2024-01-15 12:00:00,250 INFO started').timestamp
+        summer = parser.parse_line('2024-07-15 12:00:00.250 INFO started').timestamp
+
+        self.assertEqual(winter.utcoffset(), timedelta(hours=2))
+        self.assertEqual(summer.utcoffset(), timedelta(hours=3))
+        self.assertEqual(winter.microsecond, 250000)
+
+    def test_unmatched_lines_are_counted(self):
+        parser = LogParser(compile_pattern('default-log-pattern'))
+
+        events = list(parser.parse_lines(['2024-01-01 10:00:00 INFO ok', 'garbage', '2024-01-01 10:00:01 ERROR ko']))
+
+        self.assertEqual([event.line_number for event in events], [1, 3])
+        self.assertEqual((parser.lines, parser.matched), (3, 2))
+
+    def test_invalid_patterns_are_rejected(self):
+        for pattern in ('(?P<level>unclosed', '%{NOPE:level}', 'no groups here'):
+            with self.assertRaises(ValueError):
+                compile_pattern(pattern)
+
+    def test_lines_are_split_across_chunks(self):
+        content = 'première ligne\r\nzweite Zeile\nlast'.encode()
+        chunks = [content[index:index + 3] for index in range(0, len(content), 3)]
+
+        self.assertEqual(list(iter_lines(chunks)), ['première ligne', 'zweite Zeile', 'last'])
+
+    def test_stream_is_batched(self):
+        parser = LogParser(compile_pattern('default-log-pattern'))
+        content = b''.join(b'2024-01-01 10:00:%02d INFO line %d\n' % (index, index) for index in range(25))
+
+        batches = list(parser.parse_stream([content[:100], content[100:]], batch_size=10))
+
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(parser.bytes, len(content))
+
+
+class LogParsingServiceTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_COMPRESSION='gzip')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Parsing', self.user)
+        EventSystemConfiguration.objects.filter(event_system=self.event_system).update(
+            timezone=EventSystemConfiguration.Timezone.UTC
+        )
+
+    def test_stored_file_is_parsed_with_the_configured_pattern(self):
+        content = b''.join(b'2024-01-01 10:00:%02d ERROR failure %d\n' % (index, index) for index in range(30))
+        file_reference = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', content), self.event_system.id, self.user, FileReference.StorageProvider.LOCAL
+        )
+
+        parser = LogParsingService.get_parser(self.event_system)
+        events = [event for batch in LogParsingService.parse_file(file_reference, parser, batch_size=8) for event in batch]
+
+        self.assertEqual(len(events), 30)
+        self.assertEqual(events[-1].message, 'failure 29')
+        self.assertEqual(events[0].timestamp, datetime(2024, 1, 1, 10, tzinfo=timezone.utc))
+        self.assertEqual(parser.match_rate, 1.0)
+
+
+class LinearEngineTest(TestCase):
+    def test_backtracking_constructs_are_rejected(self):
+        for pattern in (r'^(?P<word>\w+) (?P=word)$', r'^(?P<message>(?!DEBUG).*)$', r'^(?P<message>a{5000})$'):
+            with self.assertRaises(ValueError):
+                compile_pattern(pattern, engine='linear', timeout=0.05)
+
+        self.assertEqual(compile_pattern(r'^(?P<word>\w+) \1$').engine, 're')
+
+    def test_builtin_patterns_are_linear_compatible(self):
+        for name in BUILTIN_PATTERNS:
+            parser = LogParser(compile_pattern(name, engine='linear', timeout=1))
+            self.assertEqual(parser.pattern.engine, 'linear')
+
+        event = LogParser(compile_pattern('default-log-pattern', engine='linear', timeout=1)).parse_line(
+            '2024-01-01 10:00:00 ERROR failure'
+        )
+        self.assertEqual((event.level, event.message), ('ERROR', 'failure'))
+
+    @skipIf(patterns.re2 is not None or patterns.regex is None, 'the regex fallback is not used')
+    def test_lines_over_the_time_budget_are_not_matched(self):
+        parser = LogParser(compile_pattern(r'^(?P<message>(a|aa)+)$', engine='linear', timeout=0.05))
+
+        started = time.perf_counter()
+        events = list(parser.parse_lines(['a' * 40 + 'b', 'aaaa']))
+
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual([event.message for event in events], ['aaaa'])
+        self.assertEqual(parser.pattern.regex.timeouts, 1)
+
+    @override_settings(LOG_PATTERN_ENGINE='linear')
+    def test_custom_patterns_are_checked_for_the_engine(self):
+        user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        event_system = EventSystemService.create_event_system('Linear', user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse('set-custom-pattern', args=[event_system.id]), {'pattern': r'^(?P<a>\w+) \1$'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('backreferences', str(response.data['pattern']))
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemUsage, FileReference, StoredBlob, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class MultiFileUploadTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        for root in (self.media_root, self.staging_root):
+            self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_STAGING_ROOT=self.staging_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Batch', self.user)
+        self.url = f'/api/eventSystem/{self.event_system.id}/uploadFiles'
+
+    def upload(self, names, storage_provider=FileReference.StorageProvider.LOCAL):
+        files = [SimpleUploadedFile(name, f'{name} content'.encode()) for name in names]
+        with mock.patch('file_manager.services.tasks.finalize_file_uploads.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url,
+                    {'files': files, 'storage_provider': storage_provider},
+                    format='multipart'
+                )
+        return response, delay
+
+    def test_local_batch_is_stored_and_counted(self):
+        response, delay = self.upload(['a.log', 'b.log', 'c.log'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['file_name'] for item in response.data['files']], ['a.log', 'b.log', 'c.log'])
+        files = self.event_system.file_objects.all()
+        self.assertEqual(files.count(), 3)
+        self.assertTrue(all(file.upload_status == FileReference.UploadStatus.COMPLETE for file in files))
+        self.assertEqual(StoredBlob.objects.count(), 3)
+        self.assertEqual(EventSystemUsage.objects.get(event_system=self.event_system).file_count, 3)
+        delay.assert_not_called()
+
+    def test_name_conflicts_reject_the_whole_batch(self):
+        self.upload(['a.log'])
+
+        response, _ = self.upload(['b.log', 'a.log'])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('a.log', response.data['error'])
+
+        response, _ = self.upload(['c.log', 'c.log'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.event_system.file_objects.count(), 1)
+
+    def test_batch_over_quota_is_rejected(self):
+        self.event_system.max_files = 2
+        self.event_system.save()
+
+        response, _ = self.upload(['a.log', 'b.log', 'c.log'])
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(FileReference.objects.count(), 0)
+
+    def test_remote_batch_is_transferred_by_one_task(self):
+        response, delay = self.upload(['a.log', 'b.log'], FileReference.StorageProvider.S3)
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once()
+        uploads = delay.call_args.args[0]
+        self.assertEqual(len(uploads), 2)
+        for file_reference_id, staged_path in uploads:
+            self.assertEqual(staged_path, EventSystemFileService.staged_file_path(file_reference_id))
+            self.assertTrue(os.path.exists(staged_path))
+
+    def test_failed_transfers_are_reported(self):
+        uploads = [('1', '/tmp/one'), ('2', '/tmp/two'), ('3', '/tmp/three')]
+
+        def complete(file_reference_id, staged_path):
+            if file_reference_id == '2':
+                raise ConnectionError('Connection reset')
+
+        with mock.patch.object(EventSystemFileService, 'complete_staged_upload', side_effect=complete) as completed:
+            failures = EventSystemFileService.complete_staged_uploads(uploads, max_workers=2)
+
+        self.assertEqual(completed.call_count, 3)
+        self.assertEqual([(file_id, path) for file_id, path, _ in failures], [('2', '/tmp/two')])
+        self.assertIsInstance(failures[0][2], ConnectionError)
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import EventSystemConfiguration, FileReference, User
+from file_manager.parsing.parallel import collect_events, parse_file_parallel, split_ranges
+from file_manager.parsing.parser import LogParser
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.parsing_services import LogParsingService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+def multiline_log(records):
+    lines = []
+    for index in range(records):
+        lines.append(f"2024-01-01 10:{index // 60 % 60:02d}:{index % 60:02d} ERROR failure {index}")
+        if index % 3 == 0:
+            lines.append('Traceback (most recent call last):')
+            lines.append(f'  File "job.py", line {index}')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+class ParallelLogParserTest(TestCase):
+    def setUp(self):
+        descriptor, self.path = tempfile.mkstemp(suffix='.log')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.path)
+
+    def write(self, content):
+        with open(self.path, 'wb') as log_file:
+            log_file.write(content)
+
+    def test_ranges_start_at_line_boundaries(self):
+        content = b''.join(b'2024-01-01 10:00:00 INFO line %d\n' % index for index in range(200))
+        self.write(content)
+
+        ranges = split_ranges(self.path, 100)
+
+        self.assertGreater(len(ranges), 10)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (0, len(content)))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(content[start - 1:start], b'\n')
+
+    def test_multiline_records_are_not_split(self):
+        content = multiline_log(100)
+        self.write(content)
+
+        ranges = split_ranges(self.path, 64, compile_pattern('default-log-pattern'))
+
+        for start, _ in ranges[1:]:
+            self.assertTrue(content[start:].startswith(b'2024-01-01'))
+
+    def test_parallel_parse_matches_a_sequential_parse(self):
+        content = multiline_log(300)
+        self.write(content)
+        sequential = LogParser(compile_pattern('default-log-pattern'), multiline=True)
+        expected = [event for batch in sequential.parse_stream([content]) for event in batch]
+
+        results = list(parse_file_parallel(
+            self.path, 'default-log-pattern', multiline=True, workers=2, range_size=512, consumer=collect_events
+        ))
+        events = [event for result in results for event in result.value]
+
+        self.assertGreater(len(results), 5)
+        self.assertEqual(events, expected)
+        self.assertEqual(sum(result.lines for result in results), sequential.lines)
+        self.assertEqual(sum(result.continued for result in results), sequential.continued)
+        self.assertEqual(events[0].message, 'failure 0\nTraceback (most recent call last):\n  File "job.py", line 0')
+
+    def test_unordered_parse_sends_back_only_counters(self):
+        content = multiline_log(300)
+        self.write(content)
+        sequential = LogParser(compile_pattern('default-log-pattern'), multiline=True)
+        for _ in sequential.parse_stream([content]):
+            pass
+
+        results = list(parse_file_parallel(
+            self.path, 'default-log-pattern', multiline=True, workers=2, range_size=512, ordered=False
+        ))
+
+        self.assertEqual(sorted(result.start for result in results), [start for start, _ in split_ranges(
+            self.path, 512, compile_pattern('default-log-pattern')
+        )])
+        self.assertEqual({result.value for result in results}, {None})
+        self.assertEqual(sum(result.matched for result in results), sequential.matched)
+
+
+class ParallelLogParsingServiceTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FILE_UPLOAD_STAGING_ROOT=os.path.join(self.media_root, 'staging'),
+            FILE_COMPRESSION='gzip'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Parsing', self.user)
+        EventSystemConfiguration.objects.filter(event_system=self.event_system).update(
+            timezone=EventSystemConfiguration.Timezone.UTC
+        )
+
+    def test_compressed_file_is_parsed_from_a_local_copy(self):
+        content = b''.join(b'2024-01-01 10:00:%02d INFO line %d\n' % (index % 60, index) for index in range(500))
+        file_reference = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', content), self.event_system.id, self.user, FileReference.StorageProvider.LOCAL
+        )
+        parser = LogParsingService.get_parser(self.event_system)
+
+        results = list(LogParsingService.parse_file_in_parallel(
+            file_reference, parser, consumer=collect_events, workers=2, range_size=4096
+        ))
+
+        self.assertEqual([event.line_number for result in results for event in result.value], list(range(1, 501)))
+        self.assertEqual((parser.lines, parser.bytes), (500, len(content)))
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'staging', 'parsing')), [])
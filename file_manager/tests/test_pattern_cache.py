@@ -0,0 +1,108 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import EventSystemConfiguration, LogsPattern, User
+from file_manager.parsing.cache import CompiledPatternCache, get_pattern_cache
+from file_manager.services.parsing_services import LogParsingService
+from file_manager.services.services import EventSystemService
+from user_management.serializers.eventsystem_serializers import EventSystemConfigurationPatchSerializer
+
+
+class CompiledPatternCacheTest(TestCase):
+    def test_patterns_are_compiled_once(self):
+        cache = CompiledPatternCache(max_size=4)
+
+        first = cache.get(1, 'default-log-pattern')
+        second = cache.get(1, 'default-log-pattern')
+
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_changed_text_is_a_miss(self):
+        cache = CompiledPatternCache(max_size=4)
+
+        first = cache.get(1, r'^(?P<message>.*)$')
+        second = cache.get(1, r'^(?P<level>\w+) (?P<message>.*)$')
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.fields, ('level', 'message'))
+
+    def test_least_recently_used_patterns_are_evicted(self):
+        cache = CompiledPatternCache(max_size=2)
+        cache.get(1, 'syslog')
+        cache.get(2, 'apache-access-log')
+        cache.get(1, 'syslog')
+
+        cache.get(3, 'default-log-pattern')
+        cache.get(1, 'syslog')
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.stats()['size'], 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_invalid_patterns_are_not_cached(self):
+        cache = CompiledPatternCache(max_size=2)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                cache.get(1, '(?P<level>unclosed')
+        self.assertEqual(cache.stats()['size'], 0)
+
+
+@override_settings(LOG_PATTERN_CACHE_SIZE=16)
+class PatternCacheInvalidationTest(TestCase):
+    def setUp(self):
+        self.cache = get_pattern_cache()
+        self.cache.clear()
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Patterns', self.user)
+        self.configuration = EventSystemConfiguration.objects.get(event_system=self.event_system)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def cached_pattern_ids(self):
+        return {key[0] for key in self.cache._entries}
+
+    def test_parsers_share_the_compiled_pattern(self):
+        first = LogParsingService.get_parser(self.event_system)
+        second = LogParsingService.get_parser(self.event_system)
+
+        self.assertIs(first.pattern, second.pattern)
+
+    def test_assigning_a_pattern_invalidates_it(self):
+        LogParsingService.get_parser(self.event_system)
+        syslog = LogsPattern.objects.create(pattern='syslog')
+
+        response = self.client.patch(
+            reverse('patch_logs_pattern', args=[self.event_system.id]), {'logpattern ID': syslog.id}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.cached_pattern_ids(), set())
+        self.assertEqual(LogParsingService.get_parser(self.event_system).pattern.source, 'syslog')
+
+    def test_custom_patterns_invalidate_the_previous_one(self):
+        LogParsingService.get_parser(self.event_system)
+
+        response = self.client.post(
+            reverse('set-custom-pattern', args=[self.event_system.id]),
+            {'pattern': r'^(?P<message>.*)$'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.cached_pattern_ids(), set())
+
+    def test_configuration_patch_invalidates_the_patterns(self):
+        LogParsingService.get_parser(self.event_system)
+        previous_id = self.configuration.logs_pattern_id
+        syslog = LogsPattern.objects.create(pattern='syslog')
+
+        serializer = EventSystemConfigurationPatchSerializer(
+            self.configuration, data={'logs_pattern_id': syslog.id}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertNotIn(previous_id, self.cached_pattern_ids())
@@ -0,0 +1,75 @@
+import re
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import FileReference, LogsPattern, User
+from file_manager.management.commands.benchmark_pattern_matcher import generate_lines, generate_patterns
+from file_manager.parsing.multi import MultiPatternMatcher, required_literals, trie_regex
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.parsing_services import LogParsingService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+
+class MultiPatternMatcherTest(TestCase):
+    def test_required_literals_skip_optional_parts(self):
+        regex = compile_pattern(r'^(?P<host>\w+) \[svc-(?:one|two)\](?: retry)? handler: (?P<message>.*)$').regex
+
+        self.assertEqual(required_literals(regex), [' [svc-', ' handler: '])
+        self.assertEqual(required_literals(compile_pattern(r'(?i)^(?P<message>ERROR .*)$').regex), [])
+
+    def test_trie_regex_prefers_the_longest_literal(self):
+        regex = trie_regex(['abc', 'abcde', 'abd', 'xyz'])
+
+        self.assertEqual(re.findall(regex, 'abcdef abc abd xyz'), ['abcde', 'abc', 'abd', 'xyz'])
+
+    def test_overlapping_keys_are_found(self):
+        matcher = MultiPatternMatcher([
+            compile_pattern(r'^(?P<message>.*service-one.*)$'),
+            compile_pattern(r'^(?P<message>.*one-two.*)$'),
+            compile_pattern(r'^(?P<message>.*service.*)$'),
+        ])
+
+        self.assertEqual(matcher.matching('boot service-one-two'), [0, 1, 2])
+        self.assertEqual(matcher.candidates('nothing here'), [])
+
+    def test_same_first_match_as_trying_every_pattern(self):
+        compiled = [compile_pattern(pattern) for pattern in generate_patterns(120)]
+        matcher = MultiPatternMatcher(compiled)
+
+        for line in generate_lines(500, 120):
+            expected = next((index for index, pattern in enumerate(compiled) if pattern.match(line)), None)
+            self.assertEqual(matcher.match(line)[0], expected, line)
+            self.assertLess(len(matcher.candidates(line)), 10)
+
+
+class PatternDetectionTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Detection', self.user)
+
+    def test_patterns_are_ranked_by_matched_lines(self):
+        content = (
+            b'Jan 12 06:25:43 web-1 sshd[102]: Accepted publickey\n' * 3 +
+            b'2024-01-01 10:00:00 INFO started\n'
+        )
+        file_reference = EventSystemFileService.upload_file(
+            SimpleUploadedFile('mixed.log', content), self.event_system.id, self.user, FileReference.StorageProvider.LOCAL
+        )
+        syslog = LogsPattern.objects.create(pattern='syslog')
+        LogsPattern.objects.create(pattern='(?P<broken')
+
+        results = LogParsingService.detect_patterns(file_reference)
+
+        self.assertEqual(results[0][0], syslog)
+        self.assertEqual(results[0][1:], (3, 0.75))
+        self.assertEqual(results[1][0].pattern, 'default-log-pattern')
+        self.assertEqual(len(results), 2)
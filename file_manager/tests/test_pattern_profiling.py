@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import (
+    EventSystemConfiguration, EventSystemFile, FileReference, LogsPattern, PatternProfile, User, UserSystemPermissions
+)
+from file_manager.parsing.cache import get_compiled_pattern
+from file_manager.services.profiling_services import PatternProfilingService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+PATTERN = r'^%{TIMESTAMP_ISO8601:timestamp} %{LOGLEVEL:level} %{GREEDYDATA:message}$'
+
+
+class PatternProfilingTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Profiled', self.user)
+        self.base_url = f'/api/eventSystem/{self.event_system.id}'
+        self.pattern = LogsPattern.objects.create(pattern=PATTERN)
+
+        # 9 lines of 10 match the pattern
+        content = b''.join(
+            b'unstructured line %d\n' % index if index % 10 == 9 else b'2024-01-01 10:00:00 INFO event %d\n' % index
+            for index in range(100)
+        )
+        self.file = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', content), self.event_system.id, self.user, FileReference.StorageProvider.LOCAL
+        )
+        EventSystemFile.objects.filter(file_reference=self.file).update(is_selected=True)
+
+    def request_profile(self):
+        with mock.patch('file_manager.services.tasks.profile_pattern.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f'{self.base_url}/patternProfiles', {'logs_pattern_id': self.pattern.id}, format='json'
+                )
+        return response, delay
+
+    def test_profile_is_run_in_the_background(self):
+        response, delay = self.request_profile()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'Pending')
+        delay.assert_called_once_with(str(response.data['id']))
+
+    def test_profile_reports_match_rate_and_slowest_lines(self):
+        response, _ = self.request_profile()
+
+        with override_settings(LOGS_PATTERN_PROFILE_WORST_LINES=3):
+            PatternProfilingService.run_profile(response.data['id'])
+
+        profile = self.client.get(f"{self.base_url}/patternProfiles/{response.data['id']}").data
+        self.assertEqual(profile['status'], 'Complete')
+        self.assertEqual((profile['file_count'], profile['line_count'], profile['matched_count']), (1, 100, 90))
+        self.assertAlmostEqual(profile['match_rate'], 0.9)
+        self.assertGreater(profile['lines_per_second'], 0)
+        self.assertLessEqual(profile['p99_line_microseconds'], profile['max_line_microseconds'])
+        self.assertEqual(len(profile['worst_lines']), 3)
+        self.assertEqual(profile['worst_lines'][0]['microseconds'], round(profile['max_line_microseconds'], 3))
+        self.assertEqual([line['line_number'] for line in profile['unmatched_lines']], [10, 20, 30])
+        self.assertEqual(profile['unmatched_lines'][0]['line'], 'unstructured line 9')
+
+    def test_sample_is_limited(self):
+        profile = PatternProfile.objects.create(event_system=self.event_system, logs_pattern=self.pattern)
+
+        PatternProfilingService.measure(profile, sample_lines=25)
+
+        self.assertEqual(profile.line_count, 25)
+
+    @override_settings(LOG_PATTERN_ENGINE='linear', LOG_PATTERN_MATCH_TIMEOUT=1.0)
+    def test_timeouts_are_counted_per_profile(self):
+        cached = get_compiled_pattern(self.pattern).regex
+        match = cached.match
+
+        def match_elsewhere(line):
+            # Lines given up on by another parser of the process sharing the cached pattern
+            cached.timeouts += 1
+            return match(line)
+
+        profile = PatternProfile.objects.create(event_system=self.event_system, logs_pattern=self.pattern)
+
+        with mock.patch.object(cached, 'match', side_effect=match_elsewhere):
+            PatternProfilingService.measure(profile)
+
+        self.assertEqual(profile.timeout_count, 0)
+        self.assertEqual(profile.matched_count, 90)
+
+    def test_profile_needs_a_selected_file(self):
+        EventSystemFile.objects.update(is_selected=False)
+
+        response, delay = self.request_profile()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        delay.assert_not_called()
+
+    def test_viewers_cannot_profile_patterns(self):
+        UserSystemPermissions.objects.filter(user=self.user).update(
+            permission_level=UserSystemPermissions.PermissionLevel.VIEWER
+        )
+
+        response, _ = self.request_profile()
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(LOGS_PATTERN_REQUIRE_PROFILE=True)
+    def test_pattern_must_be_profiled_before_it_is_assigned(self):
+        url = f'/api/eventsystem/{self.event_system.id}/configuration'
+
+        response = self.client.patch(url, {'logpattern ID': self.pattern.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        profile_id = self.request_profile()[0].data['id']
+        PatternProfilingService.run_profile(profile_id)
+        response = self.client.patch(url, {'logpattern ID': self.pattern.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        configuration = EventSystemConfiguration.objects.get(event_system=self.event_system)
+        self.assertEqual(configuration.logs_pattern_id, self.pattern.id)
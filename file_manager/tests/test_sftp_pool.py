@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from file_manager.storage.sftp_pool import SFTPConnectionPool, _PooledConnection
+
+
+def fake_connection(alive=True):
+    ssh_client = MagicMock()
+    ssh_client.get_transport.return_value.is_active.return_value = alive
+    return _PooledConnection(ssh_client, MagicMock())
+
+
+class SFTPConnectionPoolTest(SimpleTestCase):
+    def test_connection_is_reused(self):
+        pool = SFTPConnectionPool()
+        with patch.object(pool, '_connect', side_effect=lambda *args: fake_connection()) as connect:
+            with pool.connection('host', 22, 'user') as first:
+                pass
+            with pool.connection('host', 22, 'user') as second:
+                pass
+
+        self.assertIs(first, second)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_dead_connection_is_replaced(self):
+        pool = SFTPConnectionPool()
+        dead = fake_connection()
+        with patch.object(pool, '_connect', side_effect=[dead, fake_connection()]) as connect:
+            with pool.connection('host', 22, 'user'):
+                pass
+            dead.ssh_client.get_transport.return_value.is_active.return_value = False
+            with pool.connection('host', 22, 'user') as sftp:
+                pass
+
+        self.assertIsNot(sftp, dead.sftp)
+        self.assertEqual(connect.call_count, 2)
+        dead.ssh_client.close.assert_called_once()
+
+    def test_idle_connection_is_evicted(self):
+        pool = SFTPConnectionPool(idle_timeout=0)
+        with patch.object(pool, '_connect', side_effect=lambda *args: fake_connection()) as connect:
+            with pool.connection('host', 22, 'user'):
+                pass
+            with pool.connection('host', 22, 'user'):
+                pass
+
+        self.assertEqual(connect.call_count, 2)
+
+    def test_connections_per_host_are_bounded(self):
+        pool = SFTPConnectionPool(max_connections=1, acquire_timeout=0.05)
+        with patch.object(pool, '_connect', side_effect=lambda *args: fake_connection()):
+            with pool.connection('host', 22, 'user'):
+                errors = []
+
+                def borrow():
+                    try:
+                        with pool.connection('host', 22, 'user'):
+                            pass
+                    except TimeoutError as e:
+                        errors.append(e)
+
+                thread = threading.Thread(target=borrow)
+                thread.start()
+                thread.join()
+
+                # Another host has its own slots
+                with pool.connection('other-host', 22, 'user'):
+                    pass
+
+        self.assertEqual(len(errors), 1)
@@ -0,0 +1,118 @@
+import io
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.storage import drivers, s3_client
+from file_manager.storage.drivers import LocalStorageDriver, get_storage_driver, register_storage_driver
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto stands in for S3 in these tests
+    mock_aws = None
+
+
+class LocalStorageDriverTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.driver = get_storage_driver(FileReference.StorageProvider.LOCAL)
+
+    def test_write_read_move_delete(self):
+        url = self.driver.write('a/app.log', io.BytesIO(b'0123456789'))
+
+        self.assertEqual(self.driver.key_from_url(url), 'a/app.log')
+        self.assertEqual(b''.join(self.driver.read('a/app.log', chunk_size=4, offset=6)), b'6789')
+        self.assertEqual(self.driver.stat('a/app.log').size, 10)
+
+        new_url = self.driver.move('a/app.log', 'b/renamed.log')
+        self.assertIsNone(self.driver.stat('a/app.log'))
+        self.assertEqual(b''.join(self.driver.read(self.driver.key_from_url(new_url))), b'0123456789')
+
+        self.driver.delete('b/renamed.log')
+        self.assertIsNone(self.driver.stat('b/renamed.log'))
+
+    def test_registry(self):
+        self.assertIs(get_storage_driver(FileReference.StorageProvider.LOCAL), self.driver)
+        with self.assertRaises(ValueError):
+            get_storage_driver(FileReference.StorageProvider.AWS)
+
+        class CustomDriver(LocalStorageDriver):
+            pass
+
+        self.addCleanup(register_storage_driver, FileReference.StorageProvider.LOCAL, LocalStorageDriver)
+        register_storage_driver(FileReference.StorageProvider.LOCAL, CustomDriver)
+        self.assertIsInstance(get_storage_driver(FileReference.StorageProvider.LOCAL), CustomDriver)
+
+
+class UnsupportedProviderUploadTest(APITestCase):
+    def test_google_drive_uploads_are_rejected(self):
+        user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=user)
+        event_system = EventSystemService.create_event_system('Drive', user)
+
+        response = self.client.post(
+            f'/api/eventSystem/{event_system.id}/uploadFile',
+            {'file': SimpleUploadedFile('app.log', b'x'), 'storage_provider': FileReference.StorageProvider.GOOGLE_DRIVE},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(FileReference.objects.exists())
+
+
+@skipIf(mock_aws is None, 'moto is not installed')
+@override_settings(
+    AWS_STORAGE_BUCKET_NAME='legacy-files',
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_ENDPOINT_URL=None,
+)
+class LegacyS3FileTest(APITestCase):
+    """Files stored in S3 under their name, before content-addressed blobs, are renamed and deleted in S3 too."""
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        s3_client._clients.clear()
+        self.addCleanup(s3_client._clients.clear)
+        s3_client.get_s3_client().create_bucket(Bucket='legacy-files')
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Legacy', self.user)
+
+        self.driver = drivers.get_storage_driver(FileReference.StorageProvider.S3)
+        url = self.driver.write('app.log', io.BytesIO(b'legacy content'))
+        self.file_reference = FileReference.objects.create(
+            file_name='app.log',
+            storage_provider=FileReference.StorageProvider.S3,
+            url=url,
+            size=14
+        )
+        EventSystemFileService.link_files(self.event_system, [self.file_reference])
+
+    def test_rename_moves_the_object(self):
+        EventSystemFileService.update_file_name(self.event_system.id, self.file_reference.id, 'renamed.log', self.user)
+
+        self.assertIsNone(self.driver.stat('app.log'))
+        self.assertEqual(self.driver.stat('renamed.log').size, 14)
+        self.file_reference.refresh_from_db()
+        self.assertEqual(b''.join(EventSystemFileService.read_stored_content(self.file_reference)), b'legacy content')
+
+    def test_delete_removes_the_object(self):
+        EventSystemFileService.delete_file(self.event_system.id, self.file_reference.id, self.user)
+
+        self.assertIsNone(self.driver.stat('app.log'))
@@ -0,0 +1,103 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import FileReference, StoredBlob, User
+from file_manager.services.reconciliation_services import StorageReconciliationService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+LOCAL = FileReference.StorageProvider.LOCAL
+
+
+@override_settings(FILE_COMPRESSION='none')
+class StorageReconciliationTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.event_system = EventSystemService.create_event_system('Reconcile', self.user)
+        self.files = [self.upload(f'app-{index}.log', f'content {index}'.encode()) for index in range(5)]
+
+    def upload(self, name, content):
+        return EventSystemFileService.upload_file(SimpleUploadedFile(name, content), self.event_system.id, self.user, LOCAL)
+
+    def write(self, key, content=b'orphan'):
+        path = os.path.join(self.media_root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as stored_file:
+            stored_file.write(content)
+        return path
+
+    def reconcile(self, action, **kwargs):
+        kwargs.setdefault('grace_period', timedelta(0))
+        return StorageReconciliationService.reconcile(LOCAL, action=action, page_size=2, max_deletes_per_second=0, **kwargs)
+
+    def test_consistent_storage_reports_nothing(self):
+        report = self.reconcile('delete')
+
+        self.assertEqual(report['scanned'], 5)
+        self.assertEqual(report['orphaned_objects'] + report['missing_content'] + report['unreferenced_blobs'], 0)
+        self.assertEqual(StoredBlob.objects.count(), 5)
+
+    def test_orphaned_objects_are_reported_then_quarantined(self):
+        orphan = self.write('blobs/00/' + '0' * 64)
+        last = self.write('blobs/ff/' + 'f' * 64)
+
+        report = self.reconcile('report')
+        self.assertEqual(report['orphaned_objects'], 2)
+        self.assertTrue(os.path.exists(orphan))
+
+        report = self.reconcile('quarantine')
+        self.assertEqual(report['removed_objects'], 2)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(last))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'quarantine', 'blobs', '00', '0' * 64)))
+
+    def test_recent_orphans_are_left_alone(self):
+        orphan = self.write('blobs/00/' + '0' * 64)
+
+        report = self.reconcile('delete', grace_period=timedelta(hours=1))
+
+        self.assertEqual(report['orphaned_objects'], 0)
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_files_with_missing_content_are_marked_failed(self):
+        file_reference = self.files[2]
+        os.remove(os.path.join(self.media_root, file_reference.blob.storage_key))
+
+        report = self.reconcile('delete')
+
+        self.assertEqual(report['missing_content'], 1)
+        file_reference.refresh_from_db()
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.FAILED)
+        self.assertEqual(FileReference.objects.filter(upload_status=FileReference.UploadStatus.FAILED).count(), 1)
+
+    def test_unreferenced_blobs_are_deleted(self):
+        blob = self.files[0].blob
+        # A deletion that stopped before the blob was released
+        FileReference.objects.filter(id=self.files[0].id).delete()
+
+        report = self.reconcile('delete')
+
+        self.assertEqual(report['removed_blobs'], 1)
+        self.assertFalse(StoredBlob.objects.filter(id=blob.id).exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, blob.storage_key)))
+
+    def test_management_command(self):
+        self.write('blobs/00/' + '0' * 64)
+        output = io.StringIO()
+
+        call_command('reconcile_storage', '--grace-hours=0', '--action=delete', stdout=output)
+
+        self.assertIn('removed objects', output.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'blobs', '00', '0' * 64)))
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemUsage, FileReference, StoredBlob, User
+from file_manager.services.services import EventSystemService
+from file_manager.services.usage_services import StorageUsageService
+
+
+class StorageUsageTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Usage', self.user)
+        self.base_url = f'/api/eventSystem/{self.event_system.id}'
+
+    def upload(self, name, size):
+        return self.client.post(
+            f'{self.base_url}/uploadFile',
+            {'file': SimpleUploadedFile(name, b'x' * size)},
+            format='multipart'
+        )
+
+    def usage(self):
+        response = self.client.get(f'{self.base_url}/usage')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counters_follow_uploads_selection_and_deletion(self):
+        first = self.upload('first.log', 100).data['file_id']
+        second = self.upload('second.log', 50).data['file_id']
+        FileReference.objects.filter(id=second).update(file_type=FileReference.FileType.PREDICTION_FILE)
+        StorageUsageService.recompute([self.event_system.id])
+
+        usage = self.usage()
+        self.assertEqual(usage['file_count'], 2)
+        self.assertEqual(usage['total_bytes'], 150)
+        self.assertEqual(usage['bytes_by_type'], {'Event File': 100, 'Prediction File': 50, 'Event Segment': 0})
+
+        self.client.patch(f'{self.base_url}/files/{first}/select')
+        self.assertEqual(self.usage()['selected_count'], 1)
+
+        self.client.post(f'{self.base_url}/files/bulk', {'action': 'select', 'file_ids': [first, second]}, format='json')
+        self.assertEqual(self.usage()['selected_count'], 2)
+
+        self.client.delete(f'{self.base_url}/files/{first}/')
+        usage = self.usage()
+        self.assertEqual((usage['file_count'], usage['total_bytes'], usage['selected_count']), (1, 50, 1))
+
+        self.client.post(f'{self.base_url}/files/bulk', {'action': 'delete', 'file_ids': [second]}, format='json')
+        usage = self.usage()
+        self.assertEqual((usage['file_count'], usage['total_bytes'], usage['selected_count']), (0, 0, 0))
+        self.assertEqual(usage['bytes_by_type'], {'Event File': 0, 'Prediction File': 0, 'Event Segment': 0})
+
+    def test_upload_over_quota_is_rejected_before_storing_anything(self):
+        self.event_system.max_storage_bytes = 120
+        self.event_system.save()
+        self.assertEqual(self.upload('first.log', 100).status_code, status.HTTP_201_CREATED)
+
+        response = self.upload('second.log', 50)
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(FileReference.objects.count(), 1)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+        self.assertEqual(self.usage()['max_storage_bytes'], 120)
+
+    @override_settings(EVENT_SYSTEM_MAX_FILES=1)
+    def test_default_file_quota(self):
+        self.upload('first.log', 10)
+
+        response = self.client.post(
+            f'{self.base_url}/uploadSessions',
+            {'file_name': 'second.log', 'total_size': 10, 'storage_provider': FileReference.StorageProvider.LOCAL},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(self.usage()['file_count'], 1)
+
+    def test_quota_is_enforced_atomically(self):
+        self.event_system.max_files = 1
+        self.event_system.save()
+        self.upload('first.log', 10)
+        # Simulates a concurrent upload that read the usage before the first one was counted
+        EventSystemUsage.objects.filter(event_system=self.event_system).update(file_count=0)
+        StorageUsageService.check_quota(self.event_system, 10)
+
+        EventSystemUsage.objects.filter(event_system=self.event_system).update(file_count=1)
+        self.assertEqual(self.upload('second.log', 10).status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_repair_job_fixes_drifted_counters(self):
+        self.upload('first.log', 100)
+        EventSystemUsage.objects.filter(event_system=self.event_system).update(file_count=7, total_bytes=3)
+
+        self.assertEqual(StorageUsageService.recompute(), 1)
+        usage = self.usage()
+        self.assertEqual((usage['file_count'], usage['total_bytes']), (1, 100))
+
+    def test_usage_of_existing_event_system_is_computed_on_first_use(self):
+        self.upload('first.log', 100)
+        EventSystemUsage.objects.all().delete()
+
+        self.assertEqual(self.usage()['total_bytes'], 100)
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, LogsPattern, LogTemplate, User
+from file_manager.parsing.mining import TemplateMiner
+from file_manager.parsing.patterns import compile_pattern
+from file_manager.services.mining_services import TemplateMiningService
+from file_manager.services.services import EventSystemFileService, EventSystemService
+
+LINES = [
+    '2024-01-01 10:00:00 INFO User 17 logged in from 10.0.0.1',
+    '2024-01-01 10:00:01 ERROR Connection to db-1 failed after 30 ms',
+    '2024-01-01 10:00:02 WARN User 4242 logged in from 192.168.1.20',
+    '2024-01-01 10:00:03 ERROR Connection to db-2 failed after 5 ms',
+    '2024-01-01 10:00:04 INFO User 9 logged in from 10.0.0.7',
+    '',
+    '[10/Oct/2024:13:55:36 +0200] worker started',
+]
+
+
+class TemplateMinerTest(SimpleTestCase):
+    def test_lines_are_grouped_by_template(self):
+        miner = TemplateMiner()
+        miner.add_lines(LINES)
+
+        templates = [cluster.template for cluster in miner.clusters()]
+        self.assertEqual(templates, [
+            '<timestamp> <*> User <*> logged in from <*>',
+            '<timestamp> <*> Connection to <*> failed after <*> ms',
+            '<timestamp> worker started',
+        ])
+        self.assertEqual((miner.lines, miner.empty), (7, 1))
+
+    def test_candidates_match_their_lines(self):
+        miner = TemplateMiner()
+        miner.add_lines(LINES)
+
+        candidates = miner.candidates()
+        self.assertEqual(candidates[0].pattern, (
+            r'^%{TIMESTAMP_ISO8601:timestamp}\s+%{LOGLEVEL:level}\s+'
+            r'(?P<message>User\s+%{INT}\s+logged\s+in\s+from\s+%{IPV4})\s*$'
+        ))
+        self.assertEqual((candidates[0].count, candidates[0].coverage), (3, 3 / 7))
+        for candidate in candidates:
+            match = compile_pattern(candidate.pattern).regex.match(candidate.sample)
+            self.assertIsNotNone(match, candidate.pattern)
+        self.assertEqual(
+            compile_pattern(candidates[1].pattern).regex.match(LINES[3]).group('message'),
+            'Connection to db-2 failed after 5 ms'
+        )
+
+    def test_words_that_differ_become_wildcards(self):
+        miner = TemplateMiner()
+        miner.add_lines([f'Session opened for user {name} by admin' for name in ('alice', 'bob', 'carol')])
+
+        self.assertEqual([cluster.template for cluster in miner.clusters()], ['Session opened for user <*> by admin'])
+        self.assertIn(r'user\s+%{NOTSPACE}\s+by', miner.candidates()[0].pattern)
+
+    def test_long_patterns_are_truncated(self):
+        line = 'INFO ' + ' '.join(f'word{index}' for index in range(80))
+        miner = TemplateMiner()
+        miner.add(line)
+
+        candidate = miner.candidates(max_length=255)[0]
+
+        self.assertTrue(candidate.truncated)
+        self.assertLessEqual(len(candidate.pattern), 255)
+        self.assertIsNotNone(compile_pattern(candidate.pattern).regex.match(line))
+
+    def test_clusters_are_bounded(self):
+        miner = TemplateMiner(max_clusters=5)
+        for index in range(20):
+            miner.add(f'event{chr(97 + index)} happened')
+            miner.add('heartbeat ok')
+
+        self.assertEqual(miner.cluster_count, 5)
+        self.assertEqual(miner.clusters()[0].template, 'heartbeat ok')
+        # 20 + 1 clusters, 5 kept
+        self.assertEqual(miner.evicted_lines, 16)
+        self.assertEqual(sum(cluster.count for cluster in miner.clusters()) + miner.evicted_lines, miner.lines)
+
+
+class TemplateMiningServiceTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123', name='Owner')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Mined', self.user)
+        self.base_url = f'/api/eventSystem/{self.event_system.id}'
+        self.file = EventSystemFileService.upload_file(
+            SimpleUploadedFile('app.log', '\n'.join(LINES).encode()), self.event_system.id, self.user,
+            FileReference.StorageProvider.LOCAL
+        )
+
+    def test_mining_runs_in_the_background(self):
+        with mock.patch('file_manager.services.tasks.mine_log_templates.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'{self.base_url}/files/{self.file.id}/templates')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(str(self.file.id), str(self.event_system.id))
+
+    def test_templates_are_stored_and_listed(self):
+        TemplateMiningService.mine_file(self.file.id, self.event_system.id)
+        TemplateMiningService.mine_file(self.file.id, self.event_system.id)
+
+        response = self.client.get(f'{self.base_url}/files/{self.file.id}/templates')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([template['rank'] for template in response.data], [1, 2, 3])
+        self.assertEqual(response.data[0]['line_count'], 3)
+        self.assertEqual(response.data[0]['sample_line'], LINES[0])
+        self.assertEqual(LogTemplate.objects.count(), 3)
+
+    def test_templates_are_mined_per_event_system(self):
+        other = EventSystemService.create_event_system('Other', self.user)
+        EventSystemFileService.link_files(other, [self.file])
+        TemplateMiningService.mine_file(self.file.id, other.id)
+
+        TemplateMiningService.mine_file(self.file.id, self.event_system.id)
+
+        self.assertEqual(LogTemplate.objects.filter(event_system=other).count(), 3)
+        self.assertEqual(LogTemplate.objects.filter(event_system=self.event_system).count(), 3)
+
+    def test_accepted_template_becomes_a_logs_pattern(self):
+        template = TemplateMiningService.mine_file(self.file.id, self.event_system.id)[0]
+
+        response = self.client.post(f'{self.base_url}/templates/{template.id}/accept')
+        again = self.client.post(f'{self.base_url}/templates/{template.id}/accept')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(again.data['logs_pattern_id'], response.data['logs_pattern_id'])
+        self.assertEqual(LogsPattern.objects.get(id=response.data['logs_pattern_id']).pattern, template.pattern)
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.storage.drivers import S3StorageDriver
+
+
+class AsyncUploadFinalizationTest(APITestCase):
+    def setUp(self):
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging_root, ignore_errors=True)
+        settings_override = override_settings(FILE_UPLOAD_STAGING_ROOT=self.staging_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Uploads', self.user)
+        self.url = f'/api/eventSystem/{self.event_system.id}/uploadFile'
+
+    def upload(self, storage_provider):
+        with mock.patch('file_manager.services.tasks.finalize_file_upload.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url,
+                    {'file': SimpleUploadedFile('app.log', b'x' * 1000), 'storage_provider': storage_provider},
+                    format='multipart'
+                )
+        return response, delay
+
+    def test_remote_upload_is_accepted_and_finalized_in_background(self):
+        response, delay = self.upload(FileReference.StorageProvider.S3)
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        file_reference = FileReference.objects.get(id=response.data['file_id'])
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.PENDING)
+
+        staged_path = EventSystemFileService.staged_file_path(file_reference.id)
+        self.assertTrue(os.path.exists(staged_path))
+        delay.assert_called_once_with(str(file_reference.id), staged_path)
+
+        with mock.patch.object(S3StorageDriver, 'write', return_value='https://bucket/app.log') as upload:
+            EventSystemFileService.complete_staged_upload(file_reference.id, staged_path)
+
+        upload.assert_called_once()
+        file_reference.refresh_from_db()
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.COMPLETE)
+        self.assertEqual(file_reference.uploaded_bytes, 1000)
+        self.assertEqual(file_reference.url, 'https://bucket/app.log')
+        self.assertFalse(os.path.exists(staged_path))
+
+    def test_invalid_storage_provider_is_rejected(self):
+        response, delay = self.upload('ftp')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        delay.assert_not_called()
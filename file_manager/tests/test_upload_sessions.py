@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import EventSystemUsage, FileReference, UploadSession, User
+from file_manager.services.services import EventSystemService
+
+
+class UploadSessionFlowTest(APITestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp_dir, 'media'),
+            FILE_UPLOAD_STAGING_ROOT=os.path.join(self.tmp_dir, 'staging'),
+            UPLOAD_SESSION_MIN_CHUNK_SIZE=4,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='chunks@example.com', password='password123', name='Chunks')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Chunked', self.user)
+        self.base_url = f'/api/eventSystem/{self.event_system.id}/uploadSessions'
+        self.content = b'0123456789' * 3 + b'xyz'  # 33 bytes -> 4 chunks of 10 bytes
+
+    def create_session(self):
+        response = self.client.post(self.base_url, {
+            'file_name': 'big.log',
+            'total_size': len(self.content),
+            'chunk_size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def put_chunk(self, session_id, index, data, **headers):
+        return self.client.generic(
+            'PUT',
+            f'{self.base_url}/{session_id}/chunks/{index}',
+            data,
+            content_type='application/octet-stream',
+            **headers
+        )
+
+    def test_chunks_in_any_order_then_commit(self):
+        session = self.create_session()
+        self.assertEqual(session['total_chunks'], 4)
+        file_reference = FileReference.objects.get(id=session['file_id'])
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.PENDING)
+
+        for index in (3, 1, 0):
+            data = self.content[index * 10:(index + 1) * 10]
+            self.assertEqual(self.put_chunk(session['session_id'], index, data).status_code, status.HTTP_204_NO_CONTENT)
+
+        # Committing with a missing chunk fails and the client can see which one to resend
+        response = self.client.post(f"{self.base_url}/{session['session_id']}/commit", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        state = self.client.get(f"{self.base_url}/{session['session_id']}").data
+        self.assertEqual(state['missing_chunks'], [2])
+
+        self.put_chunk(session['session_id'], 2, self.content[20:30])
+        response = self.client.post(
+            f"{self.base_url}/{session['session_id']}/commit",
+            {'checksum': hashlib.sha256(self.content).hexdigest()},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        file_reference.refresh_from_db()
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.COMPLETE)
+        self.assertEqual(file_reference.size, len(self.content))
+        self.assertEqual(file_reference.checksum, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(UploadSession.objects.get(id=session['session_id']).status, UploadSession.SessionStatus.COMMITTED)
+
+    def test_chunk_with_wrong_size_or_checksum_is_rejected(self):
+        session = self.create_session()
+
+        self.assertEqual(self.put_chunk(session['session_id'], 0, b'short').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.put_chunk(session['session_id'], 0, self.content[:10], HTTP_X_CHUNK_CHECKSUM='0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f"{self.base_url}/{session['session_id']}").data['missing_chunks'], [0, 1, 2, 3])
+
+    def test_abort_releases_the_file_name(self):
+        session = self.create_session()
+
+        response = self.client.delete(f"{self.base_url}/{session['session_id']}")
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(FileReference.objects.filter(id=session['file_id']).exists())
+        self.create_session()
+
+    def test_file_that_cannot_be_stored_can_be_aborted(self):
+        session = self.create_session()
+        for index in range(4):
+            self.put_chunk(session['session_id'], index, self.content[index * 10:(index + 1) * 10])
+
+        with mock.patch(
+            'file_manager.services.services.EventSystemFileService.store_content', side_effect=OSError('Disk full')
+        ):
+            response = self.client.post(f"{self.base_url}/{session['session_id']}/commit", {}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        file_reference = FileReference.objects.get(id=session['file_id'])
+        self.assertEqual(file_reference.upload_status, FileReference.UploadStatus.FAILED)
+
+        response = self.client.delete(f"{self.base_url}/{session['session_id']}")
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(FileReference.objects.filter(id=session['file_id']).exists())
+        self.assertEqual(EventSystemUsage.objects.get(event_system=self.event_system).file_count, 0)
+
+    def test_unavailable_provider_reserves_nothing(self):
+        response = self.client.post(self.base_url, {
+            'file_name': 'big.log',
+            'total_size': len(self.content),
+            'storage_provider': FileReference.StorageProvider.GOOGLE_DRIVE,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(FileReference.objects.exists())
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import FileReference, User
+from file_manager.services.services import EventSystemFileService, EventSystemService
+from file_manager.services.streaming import copy_stream, file_sha256
+from file_manager.services.upload_handlers import HashingFileUploadHandler
+
+
+class HashingFileUploadHandlerTest(SimpleTestCase):
+    def test_file_is_hashed_while_received(self):
+        handler = HashingFileUploadHandler()
+        handler.new_file('file', 'app.log', 'text/plain', None)
+        handler.receive_data_chunk(b'line 1\n', 0)
+        handler.receive_data_chunk(b'line 2\n', 7)
+        uploaded_file = handler.file_complete(14)
+
+        self.assertEqual(uploaded_file.sha256, hashlib.sha256(b'line 1\nline 2\n').hexdigest())
+        self.assertTrue(os.path.exists(uploaded_file.temporary_file_path()))
+        uploaded_file.close()
+
+
+class StreamingHelpersTest(SimpleTestCase):
+    def test_copy_stream_returns_size_and_checksum(self):
+        source = SimpleUploadedFile('app.log', b'x' * 10000)
+        destination = tempfile.TemporaryFile()
+
+        written, checksum = copy_stream(source, destination, chunk_size=1024)
+
+        destination.seek(0)
+        self.assertEqual(written, 10000)
+        self.assertEqual(destination.read(), b'x' * 10000)
+        self.assertEqual(checksum, hashlib.sha256(b'x' * 10000).hexdigest())
+        self.assertEqual(file_sha256(source), checksum)
+
+
+class StreamingFileUploadViewTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.user = User.objects.create_user(email='uploader@example.com', password='password123', name='Uploader')
+        self.client.force_authenticate(user=self.user)
+        self.event_system = EventSystemService.create_event_system('Uploads', self.user)
+        self.url = f'/api/eventSystem/{self.event_system.id}/uploadFile'
+
+    def test_upload_is_stored_with_checksum(self):
+        content = b'2024-01-01 INFO started\n' * 1000
+
+        with override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_CHUNK_SIZE=4096):
+            response = self.client.post(
+                self.url,
+                {'file': SimpleUploadedFile('app.log', content)},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        file_reference = FileReference.objects.get(id=response.data['file_id'])
+        self.assertEqual(file_reference.size, len(content))
+        self.assertEqual(file_reference.checksum, hashlib.sha256(content).hexdigest())
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            stored_content = b''.join(EventSystemFileService.iter_file_content(file_reference))
+        self.assertEqual(stored_content, content)
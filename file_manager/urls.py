@@ -2,6 +2,7 @@ from django.urls import path
 from .views.views import (
     DeselectFileView,
     FileUploadView,
+    FileBatchUploadView,
     EventSystemCreateView,
     ActivateEventSystemView,
     DeactivateEventSystemView,
@@ -12,18 +13,50 @@ from .views.views import (
     LogPatternsView,
     AddCustomPatternView,
     PatchLogsPatternView,
+    FileBulkActionView,
 )
+from .views.upload_session_views import (
+    UploadSessionCreateView,
+    UploadSessionView,
+    UploadChunkView,
+    UploadSessionCommitView,
+)
+from .views.download_views import FileDownloadView, FileDownloadUrlView
+from .views.direct_upload_views import (
+    DirectUploadCreateView,
+    DirectUploadView,
+    DirectUploadCompleteView,
+)
+from .views.usage_views import EventSystemUsageView
+from .views.profiling_views import PatternProfileCreateView, PatternProfileView
+from .views.mining_views import LogTemplateListView, LogTemplateAcceptView
 
 urlpatterns = [
     path('eventSystem/<uuid:eventSystemId>/file/<uuid:fileId>/deselect', DeselectFileView.as_view(), name='deselect-file'),
     path('eventSystem/<uuid:eventSystemId>/uploadFile', FileUploadView.as_view(), name='upload-file'),
+    path('eventSystem/<uuid:eventSystemId>/uploadFiles', FileBatchUploadView.as_view(), name='upload-files'),
+    path('eventSystem/<uuid:eventSystemId>/uploadSessions', UploadSessionCreateView.as_view(), name='create-upload-session'),
+    path('eventSystem/<uuid:eventSystemId>/uploadSessions/<uuid:sessionId>', UploadSessionView.as_view(), name='upload-session'),
+    path('eventSystem/<uuid:eventSystemId>/uploadSessions/<uuid:sessionId>/chunks/<int:chunkIndex>', UploadChunkView.as_view(), name='upload-session-chunk'),
+    path('eventSystem/<uuid:eventSystemId>/uploadSessions/<uuid:sessionId>/commit', UploadSessionCommitView.as_view(), name='commit-upload-session'),
+    path('eventSystem/<uuid:eventSystemId>/directUploads', DirectUploadCreateView.as_view(), name='create-direct-upload'),
+    path('eventSystem/<uuid:eventSystemId>/directUploads/<uuid:uploadId>', DirectUploadView.as_view(), name='direct-upload'),
+    path('eventSystem/<uuid:eventSystemId>/directUploads/<uuid:uploadId>/complete', DirectUploadCompleteView.as_view(), name='complete-direct-upload'),
     path('user/createEventSystem/', EventSystemCreateView.as_view(), name='create-eventsystem'),
     path('eventSystem/<uuid:eventSystemId>/activate', ActivateEventSystemView.as_view(), name='activate-event-system'),
     path('eventSystem/<uuid:eventSystemId>/deactivate', DeactivateEventSystemView.as_view(), name='deactivate-event-system'),
     path('eventSystem/<uuid:eventSystemId>/', EventSystemNameUpdateView.as_view(), name='update_event_system_name'),
     path('eventSystem/<uuid:eventSystemId>/files/<uuid:fileId>/select', FileSelectView.as_view(), name='select-file'),
+    path('eventSystem/<uuid:eventSystemId>/files/<uuid:fileId>/download', FileDownloadView.as_view(), name='download-file'),
+    path('eventSystem/<uuid:eventSystemId>/files/<uuid:fileId>/downloadUrl', FileDownloadUrlView.as_view(), name='download-file-url'),
+    path('eventSystem/<uuid:eventSystemId>/files/<uuid:fileId>/templates', LogTemplateListView.as_view(), name='file-log-templates'),
+    path('eventSystem/<uuid:eventSystemId>/templates/<uuid:templateId>/accept', LogTemplateAcceptView.as_view(), name='accept-log-template'),
     path('eventSystem/<uuid:eventSystemId>/files/<uuid:fileId>/', FileReferenceView.as_view(), name='file-delete-get-updatename'),
+    path('eventSystem/<uuid:eventSystemId>/files/bulk', FileBulkActionView.as_view(), name='bulk-file-action'),
     path('eventSystem/<uuid:eventSystemId>/files/', EventSystemFileListView.as_view(), name='list-event-system-files'),
+    path('eventSystem/<uuid:eventSystemId>/usage', EventSystemUsageView.as_view(), name='event-system-usage'),
+    path('eventSystem/<uuid:eventSystemId>/patternProfiles', PatternProfileCreateView.as_view(), name='create-pattern-profile'),
+    path('eventSystem/<uuid:eventSystemId>/patternProfiles/<uuid:profileId>', PatternProfileView.as_view(), name='pattern-profile'),
     path('api/events/log-patterns', LogPatternsView.as_view(), name='log-patterns'),
     path('api/events/eventSystem/<uuid:eventSystemId>/log-pattern', AddCustomPatternView.as_view(), name='set-custom-pattern'),
     path("eventsystem/<uuid:eventSystemId>/configuration", PatchLogsPatternView.as_view(), name="patch_logs_pattern"),
@@ -0,0 +1,173 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema
+
+from core.models import DirectUpload, EventSystem
+from file_manager.services.direct_upload_services import DirectUploadService
+from file_manager.services.usage_services import QuotaExceeded
+from file_manager.serializers.direct_upload_serializers import (
+    DirectUploadCompleteSerializer,
+    DirectUploadCreateSerializer,
+    DirectUploadSerializer,
+)
+
+
+class DirectUploadCreateView(APIView):
+    """Start an upload that the client sends straight to S3 with presigned URLs."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Start a direct upload to S3. Returns a presigned PUT URL (send it the x-amz-checksum-sha256 header '
+            'given in `headers`) or, for large files, one presigned URL per part of `part_size` bytes. '
+            'When the same content is already stored in an EventSystem of the user, the file is registered at once '
+            'and no URL is returned.'
+        ),
+        request=DirectUploadCreateSerializer,
+        responses={
+            201: DirectUploadSerializer,
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem not found'},
+            409: {'description': 'Conflict'},
+            413: {'description': 'Storage or file quota of the EventSystem exceeded'},
+        }
+    )
+    def post(self, request, eventSystemId):
+        """Create a direct upload"""
+        serializer = DirectUploadCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = DirectUploadService.create_upload(
+                eventSystemId,
+                request.user,
+                serializer.validated_data['file_name'],
+                serializer.validated_data['size'],
+                serializer.validated_data['checksum']
+            )
+            data = DirectUploadSerializer(upload).data
+            if upload.status == DirectUpload.DirectUploadStatus.ACTIVE:
+                data.update(DirectUploadService.presigned_urls(upload))
+            logger.info(f"Created direct upload {upload.id} for file {upload.file_name}")
+            return Response(data, status=status.HTTP_201_CREATED)
+
+        except QuotaExceeded as e:
+            logger.warning(f"Upload quota exceeded for EventSystem {eventSystemId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            logger.warning(f"Permission denied for direct upload. User: {request.user.email}")
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except FileExistsError:
+            return Response(
+                {'error': 'A file with the same name already exists.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            logger.exception("Unexpected error while creating direct upload")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DirectUploadView(APIView):
+    """Inspect or abort a direct upload."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Get the state of a direct upload.',
+        responses={
+            200: DirectUploadSerializer,
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Direct upload not found'},
+        }
+    )
+    def get(self, request, eventSystemId, uploadId):
+        """Get direct upload state"""
+        try:
+            upload = DirectUploadService.get_upload(eventSystemId, uploadId, request.user)
+            return Response(DirectUploadSerializer(upload).data, status=status.HTTP_200_OK)
+        except DirectUpload.DoesNotExist:
+            return Response({"error": "Direct upload not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Abort a direct upload and delete what was sent for it.',
+        responses={
+            204: {},
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Direct upload not found'},
+        }
+    )
+    def delete(self, request, eventSystemId, uploadId):
+        """Abort direct upload"""
+        try:
+            upload = DirectUploadService.get_upload(eventSystemId, uploadId, request.user)
+            DirectUploadService.abort_upload(upload)
+            logger.info(f"Aborted direct upload {uploadId}")
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except DirectUpload.DoesNotExist:
+            return Response({"error": "Direct upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DirectUploadCompleteView(APIView):
+    """Completion callback of a direct upload: verify the object and register the file."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Complete a direct upload once every byte was sent to S3. The object size is verified at once; '
+            'the file is registered (201) when S3 confirmed the checksum, otherwise it is verified in the '
+            'background (202) and the upload state tells when it is done.'
+        ),
+        request=DirectUploadCompleteSerializer,
+        responses={
+            201: DirectUploadSerializer,
+            202: DirectUploadSerializer,
+            400: {'description': 'Bad request, e.g. size or checksum mismatch'},
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Direct upload not found'},
+            409: {'description': 'Conflict'},
+        }
+    )
+    def post(self, request, eventSystemId, uploadId):
+        """Complete direct upload"""
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = DirectUploadService.get_upload(eventSystemId, uploadId, request.user)
+            upload = DirectUploadService.complete_upload(upload, serializer.validated_data.get('parts'))
+            if upload.status == DirectUpload.DirectUploadStatus.COMPLETE:
+                logger.info(f"Completed direct upload {uploadId}. File ID: {upload.file_reference_id}")
+                return Response(DirectUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+            return Response(DirectUploadSerializer(upload).data, status=status.HTTP_202_ACCEPTED)
+
+        except DirectUpload.DoesNotExist:
+            return Response({"error": "Direct upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            logger.warning(f"Invalid completion of direct upload {uploadId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except FileExistsError:
+            return Response(
+                {'error': 'A file with the same name already exists.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            logger.exception(f"Unexpected error while completing direct upload {uploadId}")
+            return Response({"error": f"An unexpected error occurred: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,198 @@
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+from core.models import EventSystem, FileReference, StoredBlob
+from file_manager.services.download_services import CONTENT_ENCODINGS, FileDownloadService, RangeNotSatisfiable
+from file_manager.services.services import EventSystemFileService
+from file_manager.services.streaming import slice_chunks
+
+
+class FileDownloadView(APIView):
+    """
+    Download the content of a file.
+    S3 downloads are redirected to a presigned URL and local ones can be handed to the web server
+    (FILE_DOWNLOAD_OFFLOAD), so Python workers do not stream the bytes. Range requests and
+    conditional GETs are supported when Django sends the file itself.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def perform_content_negotiation(self, request, force=False):
+        # Download clients send Accept headers for the file type, errors are still rendered as JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Download a file. Supports Range requests (single byte range), If-None-Match / If-Modified-Since '
+            'and If-Range. Compressed files are sent as stored (with Content-Encoding) when the client accepts '
+            'the codec, otherwise they are decompressed on the fly.'
+        ),
+        parameters=[
+            OpenApiParameter(name='Range', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, required=False),
+        ],
+        responses={
+            200: OpenApiTypes.BINARY,
+            206: OpenApiTypes.BINARY,
+            302: {'description': 'Redirect to a presigned storage URL'},
+            304: {'description': 'Not modified'},
+            400: {'description': 'File does not belong to the EventSystem or is not uploaded yet'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'File or event system not found'},
+            416: {'description': 'Range not satisfiable'},
+        }
+    )
+    def get(self, request, eventSystemId, fileId):
+        """Download a file"""
+        try:
+            file_reference = FileDownloadService.get_downloadable_file(eventSystemId, fileId, request.user)
+        except EventSystem.DoesNotExist:
+            return Response({"error": "Event system not found"}, status=status.HTTP_404_NOT_FOUND)
+        except FileReference.DoesNotExist:
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            logger.warning(f"Permission denied for file download. User: {request.user.email}")
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            encoding = FileDownloadService.negotiate_encoding(file_reference, request.headers.get('Accept-Encoding'))
+            etag = FileDownloadService.etag(file_reference, encoding)
+            last_modified = int(file_reference.upload_date.timestamp())
+
+            # 304 Not Modified / 412 Precondition Failed
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = self.send_file(request, file_reference, encoding, etag, last_modified)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            if file_reference.blob and file_reference.blob.compression != StoredBlob.Compression.NONE:
+                response['Vary'] = 'Accept-Encoding'
+            return response
+
+        except Exception as e:
+            logger.exception(f"Unexpected error while downloading file {fileId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def send_file(self, request, file_reference, encoding, etag, last_modified):
+        blob = file_reference.blob
+        storage_provider = blob.storage_provider if blob else file_reference.storage_provider
+        # Whether the stored bytes are exactly what the client gets
+        sent_as_stored = encoding is not None or blob is None or blob.compression == StoredBlob.Compression.NONE
+        content_type = FileDownloadService.content_type(file_reference)
+        disposition = content_disposition_header(True, file_reference.file_name)
+
+        if sent_as_stored and storage_provider == FileReference.StorageProvider.S3:
+            # S3 serves the bytes itself, including Range requests
+            return HttpResponseRedirect(FileDownloadService.presigned_url(file_reference, encoding))
+
+        offload = getattr(settings, 'FILE_DOWNLOAD_OFFLOAD', '')
+        if sent_as_stored and offload and storage_provider == FileReference.StorageProvider.LOCAL:
+            # The web server sends the file (and handles Range) once Django has checked the permissions
+            relative_path = blob.storage_key if blob else file_reference.url.replace(settings.MEDIA_URL, "").lstrip("/")
+            response = HttpResponse(content_type=content_type)
+            if offload == 'x-accel':
+                response['X-Accel-Redirect'] = settings.FILE_DOWNLOAD_ACCEL_PREFIX + quote(relative_path)
+            else:
+                response['X-Sendfile'] = default_storage.path(relative_path)
+            response['Content-Disposition'] = disposition
+            if encoding:
+                response['Content-Encoding'] = encoding
+            return response
+
+        length = FileDownloadService.representation_length(file_reference, encoding)
+        try:
+            byte_range = FileDownloadService.parse_range(request.headers.get('Range'), length)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{length}'
+            return response
+
+        # If-Range: only send the part when the client still has the same version of the file
+        if_range = request.headers.get('If-Range')
+        if byte_range and if_range and if_range not in (etag, http_date(last_modified)):
+            byte_range = None
+
+        start, end = byte_range or (0, length - 1)
+        if sent_as_stored:
+            # Seek straight to the requested offset in the stored bytes
+            chunks = EventSystemFileService.read_stored_content(file_reference, offset=start)
+            content = slice_chunks(chunks, 0, end - start + 1)
+        else:
+            content = slice_chunks(EventSystemFileService.iter_file_content(file_reference), start, end - start + 1)
+
+        response = StreamingHttpResponse(
+            content,
+            status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = disposition
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{length}'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+
+
+class FileDownloadUrlView(APIView):
+    """Return a presigned URL to download a file stored in S3 straight from the bucket."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Get a time-limited presigned URL to download a file stored in S3. Compressed files are served '
+            'as stored, with the Content-Encoding given in `content_encoding`.'
+        ),
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'url': {'type': 'string'},
+                    'expires_in': {'type': 'integer'},
+                    'content_encoding': {'type': 'string', 'nullable': True},
+                }
+            },
+            400: {'description': 'File is not stored in S3, not uploaded yet or not in the EventSystem'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'File or event system not found'},
+        }
+    )
+    def get(self, request, eventSystemId, fileId):
+        """Get a presigned download URL"""
+        try:
+            file_reference = FileDownloadService.get_downloadable_file(eventSystemId, fileId, request.user)
+            blob = file_reference.blob
+            encoding = CONTENT_ENCODINGS.get(blob.compression) if blob else None
+            return Response({
+                "url": FileDownloadService.presigned_url(file_reference, encoding),
+                "expires_in": settings.FILE_DOWNLOAD_URL_EXPIRY,
+                "content_encoding": encoding
+            }, status=status.HTTP_200_OK)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "Event system not found"}, status=status.HTTP_404_NOT_FOUND)
+        except FileReference.DoesNotExist:
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except Exception as e:
+            logger.exception(f"Unexpected error while creating a download URL for file {fileId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,118 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema
+
+from core.models import EventSystem, FileReference, LogTemplate
+from file_manager.services.mining_services import TemplateMiningService
+from file_manager.serializers.mining_serializers import LogTemplateSerializer
+
+
+class LogTemplateListView(APIView):
+    """Templates mined from an event file, proposed as LogsPatterns."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'List the templates mined from an event file, the most frequent first: the LogsPattern each one '
+            'proposes, the lines of the file it matches and their share of the file.'
+        ),
+        responses={
+            200: LogTemplateSerializer(many=True),
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem or file not found'},
+        }
+    )
+    def get(self, request, eventSystemId, fileId):
+        """List the templates of a file"""
+        try:
+            templates = TemplateMiningService.list_templates(eventSystemId, request.user, fileId)
+            return Response(LogTemplateSerializer(templates, many=True).data, status=status.HTTP_200_OK)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except FileReference.DoesNotExist:
+            return Response({"error": "File not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except Exception as e:
+            logger.exception(f"Unexpected error while listing the templates of file {fileId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Mine the templates of an uploaded event file in the background, replacing those mined before. '
+            'List them once the mining is done.'
+        ),
+        request=None,
+        responses={
+            202: {'description': 'Mining started'},
+            400: {'description': 'Not an event file, or its upload is not complete'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem or file not found'},
+        }
+    )
+    def post(self, request, eventSystemId, fileId):
+        """Mine the templates of a file"""
+        try:
+            file_reference = TemplateMiningService.request_mining(eventSystemId, request.user, fileId)
+            return Response({"file_id": str(file_reference.id)}, status=status.HTTP_202_ACCEPTED)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except FileReference.DoesNotExist:
+            return Response({"error": "File not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(f"Unexpected error while mining the templates of file {fileId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class LogTemplateAcceptView(APIView):
+    """Turn a mined template into a LogsPattern."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Create the LogsPattern proposed by a mined template (or return it if it exists). It is not assigned '
+            'to the EventSystem: profile it, then assign it through the configuration.'
+        ),
+        request=None,
+        responses={
+            201: {'description': 'The LogsPattern: logs_pattern_id and pattern'},
+            400: {'description': 'The configured engine cannot run the pattern'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem or template not found'},
+        }
+    )
+    def post(self, request, eventSystemId, templateId):
+        """Accept a template"""
+        try:
+            logs_pattern = TemplateMiningService.accept_template(eventSystemId, request.user, templateId)
+            return Response(
+                {"logs_pattern_id": logs_pattern.id, "pattern": logs_pattern.pattern},
+                status=status.HTTP_201_CREATED
+            )
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except LogTemplate.DoesNotExist:
+            return Response({"error": "Template not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(f"Unexpected error while accepting template {templateId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,86 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema
+
+from core.models import EventSystem, LogsPattern, PatternProfile
+from file_manager.services.profiling_services import PatternProfilingService
+from file_manager.serializers.profiling_serializers import PatternProfileRequestSerializer, PatternProfileSerializer
+
+
+class PatternProfileCreateView(APIView):
+    """Profile a candidate LogsPattern on the selected files of an EventSystem before assigning it."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Start profiling a LogsPattern on a sample of the selected event files of an EventSystem: lines per '
+            'second, match rate, p99 time per line and the slowest lines. The profile runs in the background, '
+            'poll it until its status is Complete or Failed.'
+        ),
+        request=PatternProfileRequestSerializer,
+        responses={
+            202: PatternProfileSerializer,
+            400: {'description': 'Invalid pattern, or no selected event file'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem or LogsPattern not found'},
+        }
+    )
+    def post(self, request, eventSystemId):
+        """Start profiling a pattern"""
+        serializer = PatternProfileRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            profile = PatternProfilingService.request_profile(
+                eventSystemId, request.user, serializer.validated_data['logs_pattern_id']
+            )
+            return Response(PatternProfileSerializer(profile).data, status=status.HTTP_202_ACCEPTED)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except LogsPattern.DoesNotExist:
+            return Response({"error": "LogsPattern not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(f"Unexpected error while profiling a pattern for EventSystem {eventSystemId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PatternProfileView(APIView):
+    """Results of a PatternProfile."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Get the status and, once it is Complete, the results of a pattern profile.',
+        responses={
+            200: PatternProfileSerializer,
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem or profile not found'},
+        }
+    )
+    def get(self, request, eventSystemId, profileId):
+        """Get a pattern profile"""
+        try:
+            profile = PatternProfilingService.get_profile(eventSystemId, request.user, profileId)
+            return Response(PatternProfileSerializer(profile).data, status=status.HTTP_200_OK)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PatternProfile.DoesNotExist:
+            return Response({"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except Exception as e:
+            logger.exception(f"Unexpected error while reading profile {profileId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,225 @@
+import io
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+from core.models import EventSystem, FileReference, UploadSession
+from file_manager.services.upload_session_services import UploadSessionService
+from file_manager.services.usage_services import QuotaExceeded
+from file_manager.serializers.upload_session_serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+
+
+class UploadSessionCreateView(APIView):
+    """Start a resumable, chunked upload into an EventSystem."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Create a resumable upload session. The file is then sent as numbered chunks and committed.',
+        request=UploadSessionCreateSerializer,
+        responses={
+            201: UploadSessionSerializer,
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem not found'},
+            409: {'description': 'Conflict'},
+            413: {'description': 'Storage or file quota of the EventSystem exceeded'},
+        }
+    )
+    def post(self, request, eventSystemId):
+        """Create an upload session"""
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = UploadSessionService.create_session(
+                eventSystemId,
+                request.user,
+                serializer.validated_data['file_name'],
+                serializer.validated_data['total_size'],
+                serializer.validated_data['storage_provider'],
+                serializer.validated_data.get('chunk_size')
+            )
+            logger.info(f"Created upload session {session.id} for file {session.file_reference.file_name}")
+            return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+        except QuotaExceeded as e:
+            logger.warning(f"Upload quota exceeded for EventSystem {eventSystemId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            logger.warning(f"Permission denied for upload session. User: {request.user.email}")
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except FileExistsError:
+            return Response(
+                {'error': 'A file with the same name already exists.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            logger.exception("Unexpected error while creating upload session")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UploadSessionView(APIView):
+    """Inspect or abort an upload session."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Get the state of an upload session, including the chunks that still have to be sent.',
+        responses={
+            200: UploadSessionSerializer,
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Upload session not found'},
+        }
+    )
+    def get(self, request, eventSystemId, sessionId):
+        """Get upload session state"""
+        try:
+            session = UploadSessionService.get_session(eventSystemId, sessionId, request.user)
+            return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Abort an upload session and discard the chunks received so far.',
+        responses={
+            204: {},
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Upload session not found'},
+        }
+    )
+    def delete(self, request, eventSystemId, sessionId):
+        """Abort upload session"""
+        try:
+            session = UploadSessionService.get_session(eventSystemId, sessionId, request.user)
+            UploadSessionService.abort_session(session)
+            logger.info(f"Aborted upload session {sessionId}")
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class UploadChunkView(APIView):
+    """Receive one chunk of an upload session as the raw request body."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Upload one chunk (raw bytes as the request body). Chunks can be sent in any order, in parallel, '
+            'and retried. An optional X-Chunk-Checksum header (SHA-256 hex) is verified.'
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='chunkIndex',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.PATH,
+                description='Zero-based index of the chunk'
+            ),
+        ],
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses={
+            204: {},
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Upload session not found'},
+        }
+    )
+    def put(self, request, eventSystemId, sessionId, chunkIndex):
+        """Upload a chunk"""
+        try:
+            session = UploadSessionService.get_session(eventSystemId, sessionId, request.user)
+            # Read the body straight from the request stream, never through request.data
+            UploadSessionService.receive_chunk(
+                session,
+                chunkIndex,
+                request.stream or io.BytesIO(),
+                request.headers.get('X-Chunk-Checksum')
+            )
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            logger.warning(f"Invalid chunk {chunkIndex} for upload session {sessionId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(f"Unexpected error while receiving chunk {chunkIndex} of upload session {sessionId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UploadSessionCommitView(APIView):
+    """Assemble the chunks of an upload session into the final file."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description='Commit an upload session once every chunk has been received.',
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'checksum': {'type': 'string', 'description': 'Optional SHA-256 (hex) of the whole file'},
+                },
+            }
+        },
+        responses={
+            201: {
+                'description': 'File uploaded successfully',
+                'type': 'object',
+                'properties': {
+                    'message': {'type': 'string'},
+                    'file_id': {'type': 'string'},
+                }
+            },
+            202: {
+                'description': 'File assembled, it is transferred to the storage provider in the background',
+                'type': 'object',
+                'properties': {
+                    'message': {'type': 'string'},
+                    'file_id': {'type': 'string'},
+                    'upload_status': {'type': 'string'},
+                }
+            },
+            400: {'description': 'Bad request, e.g. missing chunks'},
+            401: {'description': 'Authentication required'},
+            404: {'description': 'Upload session not found'},
+        }
+    )
+    def post(self, request, eventSystemId, sessionId):
+        """Commit upload session"""
+        try:
+            session = UploadSessionService.get_session(eventSystemId, sessionId, request.user)
+            file_reference = UploadSessionService.commit_session(session, request.data.get('checksum'))
+            logger.info(f"Committed upload session {sessionId}. File ID: {file_reference.id}")
+            if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+                return Response({
+                    "message": "File accepted, it is being transferred to storage",
+                    "file_id": file_reference.id,
+                    "upload_status": file_reference.get_upload_status_display()
+                }, status=status.HTTP_202_ACCEPTED)
+            return Response({
+                "message": "File uploaded successfully",
+                "file_id": file_reference.id
+            }, status=status.HTTP_201_CREATED)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            logger.warning(f"Invalid commit for upload session {sessionId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(f"Unexpected error while committing upload session {sessionId}")
+            return Response({"error": f"An unexpected error occurred: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,42 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from loguru import logger
+from drf_spectacular.utils import extend_schema
+
+from core.models import EventSystem
+from file_manager.services.usage_services import StorageUsageService
+from file_manager.serializers.usage_serializers import EventSystemUsageSerializer
+
+
+class EventSystemUsageView(APIView):
+    """Storage used by the files of an EventSystem, and its quotas."""
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Get the number of files, the bytes they use (in total and per file type), the number of selected '
+            'files and the quotas of an EventSystem. A null quota means there is no limit.'
+        ),
+        responses={
+            200: EventSystemUsageSerializer,
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem not found'},
+        }
+    )
+    def get(self, request, eventSystemId):
+        """Get the storage usage of an event system"""
+        try:
+            usage = StorageUsageService.get_usage(eventSystemId, request.user)
+            return Response(EventSystemUsageSerializer(usage).data, status=status.HTTP_200_OK)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except Exception as e:
+            logger.exception(f"Unexpected error while reading the usage of EventSystem {eventSystemId}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
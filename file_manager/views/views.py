@@ -7,9 +7,12 @@ import os
 from rest_framework.permissions import IsAuthenticated
 from loguru import logger  # Use loguru instead of standard logging
 
-from core.models import EventSystem, FileReference, UserSystemPermissions, LogsPattern, EventSystemConfiguration
+from core.models import EventSystem, EventSystemFile, FileReference, UserSystemPermissions, LogsPattern, EventSystemConfiguration
+from file_manager.parsing.cache import get_compiled_pattern, invalidate_patterns
+from file_manager.services.profiling_services import PatternProfilingService
 from file_manager.services.services import EventSystemService, EventSystemFileService
-from file_manager.serializers.serializers import EventSystemNameUpdateSerializer, FileReferenceSerializer, EventSystemCreateSerializer, CustomPatternSerializer
+from file_manager.services.usage_services import QuotaExceeded
+from file_manager.serializers.serializers import EventSystemNameUpdateSerializer, FileReferenceSerializer, EventSystemCreateSerializer, CustomPatternSerializer, FileListQuerySerializer, FileBulkActionSerializer
 
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiTypes
 from django.http import FileResponse
@@ -309,6 +312,7 @@ class FileUploadView(APIView):
                 'type': 'object',
                 'properties': {
                     'file': {'type': 'string', 'format': 'binary'},
+                    'storage_provider': {'type': 'integer', 'description': 'Storage provider, defaults to local storage'},
                 },
                 'required': ['file']
             }
@@ -322,11 +326,21 @@ class FileUploadView(APIView):
                     'file_id': {'type': 'string'},
                 }
             },
+            202: {
+                'description': 'File accepted, it is transferred to the storage provider in the background',
+                'type': 'object',
+                'properties': {
+                    'message': {'type': 'string'},
+                    'file_id': {'type': 'string'},
+                    'upload_status': {'type': 'string'},
+                }
+            },
             400: {'description': 'Bad request'},
             401: {'description': 'Authentication required'},
             403: {'description': 'Permission denied'},
             404: {'description': 'EventSystem not found'},
             409: {'description': 'Conflict'},
+            413: {'description': 'Storage or file quota of the EventSystem exceeded'},
         }
     )
     def post(self, request, eventSystemId):
@@ -338,10 +352,25 @@ class FileUploadView(APIView):
             logger.warning(f"File upload attempted without file. User: {request.user.email}")
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Form data arrives as strings, the storage provider is compared against integer choices
+        try:
+            storage_provider = int(storage_provider)
+        except (TypeError, ValueError):
+            storage_provider = None
+        if storage_provider not in FileReference.StorageProvider.values:
+            return Response({"error": "Invalid storage provider."}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             logger.debug(f"Attempting to upload file. Name: {file.name}, Size: {file.size}, User: {request.user.email}")
             file_reference = EventSystemFileService.upload_file(file, eventSystemId, request.user, storage_provider)
 
+            if file_reference.upload_status != FileReference.UploadStatus.COMPLETE:
+                logger.info(f"Accepted file for background transfer. ID: {file_reference.id}, Name: {file.name}")
+                return Response({
+                    "message": "File accepted, it is being transferred to storage",
+                    "file_id": file_reference.id,
+                    "upload_status": file_reference.get_upload_status_display()
+                }, status=status.HTTP_202_ACCEPTED)
 
             logger.info(f"Successfully uploaded file. ID: {file_reference.id}, Name: {file.name}")
             return Response({
@@ -349,6 +378,9 @@ class FileUploadView(APIView):
                 "file_id": file_reference.id
             }, status=status.HTTP_201_CREATED)
 
+        except QuotaExceeded as e:
+            logger.warning(f"Upload quota exceeded for EventSystem {eventSystemId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         except ValueError as e:
             logger.warning(f"Invalid file upload request: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -366,7 +398,99 @@ class FileUploadView(APIView):
             )
         except Exception as e:
             logger.exception(f"Unexpected error during file upload: {file.name}")
-            return Response({"error": f"An unexpected error occurred: {str(e)}"}, 
+            return Response({"error": f"An unexpected error occurred: {str(e)}"},
+                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class FileBatchUploadView(APIView):
+    parser_classes = (MultiPartParser, FormParser)
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            'Upload several files to an event system in one request. The batch is accepted or rejected as a whole; '
+            'Django limits the number of files per request with DATA_UPLOAD_MAX_NUMBER_FILES.'
+        ),
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                    'storage_provider': {'type': 'integer', 'description': 'Storage provider, defaults to local storage'},
+                },
+                'required': ['files']
+            }
+        },
+        responses={
+            201: {
+                'description': 'Files uploaded successfully',
+                'type': 'object',
+                'properties': {
+                    'message': {'type': 'string'},
+                    'files': {'type': 'array', 'items': {'type': 'object'}},
+                }
+            },
+            202: {'description': 'Files accepted, some are transferred to the storage provider in the background'},
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem not found'},
+            409: {'description': 'Conflict'},
+            413: {'description': 'Storage or file quota of the EventSystem exceeded'},
+        }
+    )
+    def post(self, request, eventSystemId):
+        """Upload several files to event system"""
+        files = request.FILES.getlist('files')
+        storage_provider = request.data.get('storage_provider', FileReference.StorageProvider.LOCAL)  # Default to LOCAL
+
+        if not files:
+            logger.warning(f"Multi-file upload attempted without files. User: {request.user.email}")
+            return Response({"error": "No files provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Form data arrives as strings, the storage provider is compared against integer choices
+        try:
+            storage_provider = int(storage_provider)
+        except (TypeError, ValueError):
+            storage_provider = None
+        if storage_provider not in FileReference.StorageProvider.values:
+            return Response({"error": "Invalid storage provider."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            logger.debug(f"Attempting to upload {len(files)} files. User: {request.user.email}")
+            file_references = EventSystemFileService.upload_files(files, eventSystemId, request.user, storage_provider)
+
+            complete = all(
+                file_reference.upload_status == FileReference.UploadStatus.COMPLETE for file_reference in file_references
+            )
+            logger.info(f"Uploaded {len(file_references)} files to EventSystem {eventSystemId}")
+            return Response({
+                "message": "Files uploaded successfully" if complete else "Files accepted, they are being transferred to storage",
+                "files": [{
+                    "file_id": file_reference.id,
+                    "file_name": file_reference.file_name,
+                    "upload_status": file_reference.get_upload_status_display()
+                } for file_reference in file_references]
+            }, status=status.HTTP_201_CREATED if complete else status.HTTP_202_ACCEPTED)
+
+        except QuotaExceeded as e:
+            logger.warning(f"Upload quota exceeded for EventSystem {eventSystemId}: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            logger.warning(f"Invalid multi-file upload request: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except EventSystem.DoesNotExist:
+            logger.error(f"Event system not found for file upload. ID: {eventSystemId}")
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            logger.warning(f"Permission denied for file upload. User: {request.user.email}")
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except FileExistsError as e:
+            logger.warning(f"Duplicate file names detected: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            logger.exception(f"Unexpected error during multi-file upload to EventSystem {eventSystemId}")
+            return Response({"error": f"An unexpected error occurred: {str(e)}"},
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class FileReferenceView(APIView):
@@ -454,8 +578,10 @@ class FileReferenceView(APIView):
                 raise PermissionError("You do not have permission to retrieve this file.")
 
             # Ensure file belongs to the event system
-            if not event_system.file_objects.filter(id=fileId).exists():
+            link = EventSystemFile.objects.filter(event_system=event_system, file_reference=file_reference).first()
+            if link is None:
                 raise ValueError("File does not belong to this EventSystem.")
+            file_reference.is_selected = link.is_selected
             serializer = FileReferenceSerializer(file_reference)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -660,13 +786,16 @@ class DeselectFileView(APIView):
 
 class EventSystemFileListView(APIView):
     """
-    Retrieve all files associated with a specific EventSystem.
+    Retrieve the files associated with a specific EventSystem, one page at a time.
     """
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         tags=['file manager'],
-        description="Retrieve all files associated with a specific EventSystem.",
+        description=(
+            "Retrieve the files associated with a specific EventSystem. Results are paginated with a cursor: "
+            "pass the `next_cursor` of a page (with the same ordering and filters) to get the following one."
+        ),
         parameters=[
             OpenApiParameter(
                 name="eventSystemId",
@@ -674,9 +803,16 @@ class EventSystemFileListView(APIView):
                 location=OpenApiParameter.PATH,
                 description="UUID of the EventSystem"
             ),
+            FileListQuerySerializer,
         ],
         responses={
-            200: FileReferenceSerializer(many=True),
+            200: {
+                'type': 'object',
+                'properties': {
+                    'results': {'type': 'array', 'items': {'type': 'object'}},
+                    'next_cursor': {'type': 'string', 'nullable': True},
+                }
+            },
             400: {"description": "Bad request"},
             401: {"description": "Authentication required"},
             403: {"description": "Permission denied"},
@@ -684,44 +820,33 @@ class EventSystemFileListView(APIView):
         }
     )
     def get(self, request, eventSystemId):
-        """Retrieve all files for a given EventSystem."""
+        """Retrieve a page of files for a given EventSystem."""
+        # A plain dict: with a QueryDict a missing boolean parameter would be read as False
+        query = FileListQuerySerializer(data=request.query_params.dict())
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
         try:
             logger.debug(f"Attempting to list files for event system. ID: {eventSystemId}, User: {request.user.email}")
-            
-            # Get the event system
-            event_system = EventSystem.objects.get(id=eventSystemId)
-
-            try:
-                user_permission = UserSystemPermissions.objects.get(user=request.user, event_system=event_system)
-                
-                allowed_roles = {
-                    UserSystemPermissions.PermissionLevel.ADMIN,
-                    UserSystemPermissions.PermissionLevel.OWNER,
-                    UserSystemPermissions.PermissionLevel.VIEWER
-                }
-
-                if user_permission.permission_level not in allowed_roles:
-                    logger.warning(f"Insufficient permissions for user {request.user.email} to list files")
-                    raise PermissionError("You do not have permission to view files.")
-                    
-            except UserSystemPermissions.DoesNotExist:
-                logger.warning(f"Permission denied - User {request.user.email} attempted to list files for event system {eventSystemId}")
-                raise PermissionError("You do not have permission to view files.")
 
-
-            # Retrieve files associated with this event system
-            files = event_system.file_objects.all()
-
-            if not files.exists():
-                logger.info(f"No files found for event system {eventSystemId}")
-                return Response(
-                    {"message": "No files associated with this EventSystem.", "files": []},
-                    status=status.HTTP_200_OK,
-                )
+            files, next_cursor = EventSystemFileService.list_files(
+                eventSystemId,
+                request.user,
+                filters={
+                    'file_type': params.get('file_type'),
+                    'upload_status': params.get('upload_status'),
+                    'is_selected': params.get('is_selected'),
+                    'name_prefix': params.get('name_prefix'),
+                },
+                ordering=params['ordering'],
+                cursor=params.get('cursor'),
+                page_size=params.get('page_size')
+            )
 
             serializer = FileReferenceSerializer(files, many=True)
-            logger.info(f"Successfully retrieved {files.count()} files for event system {eventSystemId}")
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            logger.info(f"Successfully retrieved {len(files)} files for event system {eventSystemId}")
+            return Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
 
         except EventSystem.DoesNotExist:
             logger.error(f"Event system not found for file listing. ID: {eventSystemId}")
@@ -730,20 +855,83 @@ class EventSystemFileListView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-            
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         except PermissionError as e:
             logger.warning(f"Permission error during file listing: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
 
-
         except Exception as e:
             logger.exception("Unexpected error during file listing")
             return Response(
                 {"error": f"An unexpected error occurred: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
-        
+
+class FileBulkActionView(APIView):
+    """
+    Select, deselect, delete or rename many files of an EventSystem in one request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=['file manager'],
+        description=(
+            "Apply an action to many files at once. `select`, `deselect` and `delete` take `file_ids`; "
+            "`rename` takes `renames` ([{file_id, file_name}]). The batch is applied entirely or not at all. "
+            "Stored content of deleted files is removed in the background."
+        ),
+        request=FileBulkActionSerializer,
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'action': {'type': 'string'},
+                    'count': {'type': 'integer'},
+                }
+            },
+            400: {'description': 'Bad request'},
+            401: {'description': 'Authentication required'},
+            403: {'description': 'Permission denied'},
+            404: {'description': 'EventSystem not found'},
+            409: {'description': 'Conflict'},
+        }
+    )
+    def post(self, request, eventSystemId):
+        """Apply an action to many files"""
+        serializer = FileBulkActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        action = serializer.validated_data['action']
+        if action == 'rename':
+            new_names = {rename['file_id']: rename['file_name'] for rename in serializer.validated_data['renames']}
+            file_ids = list(new_names)
+        else:
+            new_names = None
+            file_ids = serializer.validated_data['file_ids']
+
+        try:
+            count = EventSystemFileService.bulk_action(eventSystemId, request.user, action, file_ids, new_names)
+            logger.info(f"Applied {action} to {count} files of event system {eventSystemId}")
+            return Response({"action": action, "count": count}, status=status.HTTP_200_OK)
+
+        except EventSystem.DoesNotExist:
+            return Response({"error": "EventSystem not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            logger.warning(f"Invalid bulk {action} request: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            logger.warning(f"Permission denied for bulk {action}. User: {request.user.email}")
+            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except FileExistsError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            logger.exception(f"Unexpected error during bulk {action}")
+            return Response({"error": f"An unexpected error occurred: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class LogPatternsView(APIView):
     def get(self, request):
         patterns = LogsPattern.objects.all()
@@ -754,8 +942,11 @@ class LogPatternsView(APIView):
         return Response(pattern_map, status=status.HTTP_200_OK)
 
 class AddCustomPatternView(APIView):
-    def post(self, request):
-        serializer = CustomPatternSerializer(data=request.data)
+    def post(self, request, eventSystemId):
+        # The event system is the one of the URL
+        data = request.data.copy()
+        data['event_system_id'] = str(eventSystemId)
+        serializer = CustomPatternSerializer(data=data)
 
         if serializer.is_valid():
             serializer.save()
@@ -783,7 +974,7 @@ class PatchLogsPatternView(APIView):
         },
         responses={
             204: {"description": "Logs pattern updated successfully. No content returned."},
-            400: {"description": "Bad request, e.g., missing 'logpattern ID' or attempting to assign the same LogsPattern."},
+            400: {"description": "Bad request, e.g., missing 'logpattern ID', attempting to assign the same LogsPattern or a LogsPattern that was not profiled yet."},
             401: {"description": "Authentication required"},
             403: {"description": "Permission denied"},
             404: {"description": "EventSystem, EventSystemConfiguration, or LogsPattern not found"},
@@ -804,9 +995,15 @@ class PatchLogsPatternView(APIView):
             pattern = LogsPattern.objects.get(id=pattern_id)
             if configuration.logs_pattern_id == pattern.id:
                 raise ValueError("The same LogsPattern is already assigned.")
+            # Raises ValueError if the configured engine cannot run the pattern
+            get_compiled_pattern(pattern)
+            # Raises ValueError if the pattern must be profiled first (LOGS_PATTERN_REQUIRE_PROFILE)
+            PatternProfilingService.check_assignable(event_system, pattern)
 
+            previous_pattern_id = configuration.logs_pattern_id
             configuration.logs_pattern = pattern
             configuration.save()
+            invalidate_patterns(previous_pattern_id, pattern.id)
 
             logger.info(f"Logs pattern updated to ID {pattern_id} for EventSystem {eventSystemId}")
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -20,6 +20,22 @@ app.conf.beat_schedule = {
         'task': 'message_queue.services.tasks.clean_expired_fcm_tokens', 
         'schedule': crontab(minute=0, hour=2),  # This runs daily at 2:00 AM (offset from the other task)
     },
+    'delete-expired-upload-sessions-every-hour': {  # Resumable uploads that were never committed
+        'task': 'file_manager.services.tasks.delete_expired_upload_sessions',
+        'schedule': crontab(minute=30),  # This runs every hour at :30
+    },
+    'delete-expired-direct-uploads-every-hour': {  # Direct-to-S3 uploads that were never completed
+        'task': 'file_manager.services.tasks.delete_expired_direct_uploads',
+        'schedule': crontab(minute=45),  # This runs every hour at :45
+    },
+    'reconcile-storage-every-24-hours': {  # Orphaned content and blobs left by failed uploads/deletions
+        'task': 'file_manager.services.tasks.reconcile_storage',
+        'schedule': crontab(minute=0, hour=3),  # This runs daily at 3:00 AM
+    },
+    'repair-storage-usage-every-24-hours': {  # Counters that drifted from the files (e.g. rows edited by hand)
+        'task': 'file_manager.services.tasks.repair_storage_usage',
+        'schedule': crontab(minute=30, hour=3),  # This runs daily at 3:30 AM
+    },
 }
 
 @app.task(bind=True)
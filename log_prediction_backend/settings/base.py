@@ -15,6 +15,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'user_management.apps.UserManagementConfig',
+    'file_manager',
     'rest_framework',
     'drf_spectacular',
     'core',
@@ -126,6 +127,90 @@ AUTHENTICATION_BACKENDS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# File uploads
+# Uploaded files are streamed to a temporary file on disk (and hashed) chunk by chunk,
+# so the memory used per upload stays the same no matter how large the file is.
+FILE_UPLOAD_HANDLERS = [
+    'file_manager.services.upload_handlers.HashingFileUploadHandler',
+]
+FILE_UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the request body / written to storage at a time
+
+# Local directory where chunks of resumable uploads are staged until they are committed
+FILE_UPLOAD_STAGING_ROOT = os.path.join(BASE_DIR, 'upload_staging')
+UPLOAD_SESSION_DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_MIN_CHUNK_SIZE = 256 * 1024
+UPLOAD_SESSION_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+# Files of a multi-file upload transferred to a remote storage provider at the same time
+FILE_UPLOAD_MAX_CONCURRENCY = int(os.environ.get('FILE_UPLOAD_MAX_CONCURRENCY', 4))
+
+# At-rest compression of stored file content: 'zstd' (gzip is used when zstandard is not installed), 'gzip' or 'none'.
+# Content is compressed while it is streamed to storage and decompressed while it is read back.
+FILE_COMPRESSION = os.environ.get('FILE_COMPRESSION', 'zstd')
+FILE_COMPRESSION_LEVEL = None  # None uses the codec default (zstd 3, gzip 6)
+# Already compressed, or read in place through a memory map (event segments)
+FILE_COMPRESSION_SKIP_EXTENSIONS = ['.gz', '.zst', '.zip', '.bz2', '.xz', '.7z', '.segment']
+
+# File downloads. Local files can be handed to the web server instead of being streamed by Django:
+# 'x-accel' (nginx: an `internal` location at FILE_DOWNLOAD_ACCEL_PREFIX aliased to MEDIA_ROOT)
+# or 'x-sendfile' (Apache mod_xsendfile, lighttpd). Leave empty to stream from Django.
+FILE_DOWNLOAD_OFFLOAD = os.environ.get('FILE_DOWNLOAD_OFFLOAD', '')
+FILE_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+FILE_DOWNLOAD_URL_EXPIRY = 300  # Seconds a presigned S3 download URL stays valid
+
+# Direct uploads: clients PUT files straight to S3 with presigned URLs (the bucket needs a CORS rule
+# allowing PUT and exposing the ETag header for browser clients)
+DIRECT_UPLOAD_URL_EXPIRY = 3600  # Seconds a presigned upload URL stays valid
+DIRECT_UPLOAD_TTL = timedelta(hours=24)  # Unfinished direct uploads are aborted after this delay
+
+# Default upload quotas of an EventSystem (EventSystem.max_storage_bytes / max_files override them), None = no limit
+EVENT_SYSTEM_MAX_STORAGE_BYTES = int(os.environ['EVENT_SYSTEM_MAX_STORAGE_BYTES']) if os.environ.get('EVENT_SYSTEM_MAX_STORAGE_BYTES') else None
+EVENT_SYSTEM_MAX_FILES = int(os.environ['EVENT_SYSTEM_MAX_FILES']) if os.environ.get('EVENT_SYSTEM_MAX_FILES') else None
+
+# Local read-through cache of remote (S3/SCP) file content, evicted least recently used first.
+# Set FILE_CACHE_MAX_BYTES to 0 to read remote files straight from storage every time.
+FILE_CACHE_ROOT = os.environ.get('FILE_CACHE_ROOT', os.path.join(BASE_DIR, 'file_cache'))
+FILE_CACHE_MAX_BYTES = int(os.environ.get('FILE_CACHE_MAX_BYTES', 10 * 1024 ** 3))
+FILE_CACHE_MAX_FILE_BYTES = int(os.environ.get('FILE_CACHE_MAX_FILE_BYTES', 2 * 1024 ** 3))  # Larger files bypass it
+
+# Storage reconciliation (reconcile_storage task/command): content no StoredBlob points to is moved under
+# quarantine/ ('quarantine'), deleted ('delete') or only logged ('report')
+STORAGE_RECONCILE_ACTION = os.environ.get('STORAGE_RECONCILE_ACTION', 'quarantine')
+STORAGE_RECONCILE_GRACE_PERIOD = timedelta(hours=24)  # Younger content may belong to an upload in progress
+STORAGE_RECONCILE_PAGE_SIZE = 1000  # Listed objects compared with the database at a time
+STORAGE_RECONCILE_MAX_DELETES_PER_SECOND = 20
+
+# Log parsing: events are handed over in batches of this many events
+LOG_PARSE_BATCH_SIZE = 10000
+# Parallel parsing of large files: worker processes (default: one per core) and bytes parsed per task
+LOG_PARSE_WORKERS = int(os.environ.get('LOG_PARSE_WORKERS', 0)) or None
+LOG_PARSE_RANGE_SIZE = 64 * 1024 * 1024
+# Compiled log patterns kept per process (least recently used evicted first), 0 disables the cache
+LOG_PATTERN_CACHE_SIZE = 256
+# Engine running LogsPatterns: 're' (Python, backtracking) or 'linear', which bounds the time spent on a line:
+# RE2 (google-re2) when installed, otherwise the regex module giving up on a line after LOG_PATTERN_MATCH_TIMEOUT
+# seconds. 'linear' rejects patterns using backreferences or lookarounds.
+LOG_PATTERN_ENGINE = os.environ.get('LOG_PATTERN_ENGINE', 're')
+LOG_PATTERN_MATCH_TIMEOUT = 0.05
+# Pattern profiling (patternProfiles endpoint): lines sampled from the selected files, slowest and unmatched lines
+# reported. With LOGS_PATTERN_REQUIRE_PROFILE a pattern can only be assigned once it was profiled successfully.
+LOGS_PATTERN_PROFILE_SAMPLE_LINES = 100000
+LOGS_PATTERN_PROFILE_WORST_LINES = 10
+LOGS_PATTERN_REQUIRE_PROFILE = os.environ.get('LOGS_PATTERN_REQUIRE_PROFILE', 'false').lower() == 'true'
+# Template mining (Drain parse tree, see file_manager.parsing.mining): tree depth, similarity for a line to join a
+# template, children per tree node, templates kept in memory, and patterns proposed per file. Files are mined
+# entirely unless LOG_TEMPLATE_MINING_MAX_LINES is set.
+LOG_TEMPLATE_MINING_DEPTH = 4
+LOG_TEMPLATE_SIMILARITY = 0.4
+LOG_TEMPLATE_MAX_CHILDREN = 100
+LOG_TEMPLATE_MAX_CLUSTERS = 1000
+LOG_TEMPLATE_CANDIDATES = 20
+LOG_TEMPLATE_MINING_MAX_LINES = None
+# Lines of a file tried against every LogsPattern to detect its format
+LOG_PATTERN_DETECTION_LINES = 10000
+# Columnar event store: events per segment, each segment is sorted by time
+EVENT_SEGMENT_MAX_ROWS = 1000000
+
 # # S3 Storage settings
 # AWS_ACCESS_KEY_ID = "your-access-key"  # Replace with the actual key
 # AWS_SECRET_ACCESS_KEY = "your-secret-key"  # Replace with the actual secret
@@ -136,9 +221,22 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
 
+# S3 client and multipart transfer tuning (set per deployment through environment variables)
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL')  # e.g. a local S3-compatible server such as MinIO
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_S3_MAX_POOL_CONNECTIONS', 50))  # Keep >= max concurrency
+AWS_S3_MAX_ATTEMPTS = int(os.environ.get('AWS_S3_MAX_ATTEMPTS', 5))
+AWS_S3_MULTIPART_THRESHOLD = int(os.environ.get('AWS_S3_MULTIPART_THRESHOLD', 16 * 1024 * 1024))
+AWS_S3_MULTIPART_CHUNKSIZE = int(os.environ.get('AWS_S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024))
+AWS_S3_MAX_CONCURRENCY = int(os.environ.get('AWS_S3_MAX_CONCURRENCY', 10))
+
 # # SCP Storage settings
 # SCP_HOST = 'example.com'  # Replace with SCP server's hostname or IP address
 # SCP_PORT = 22  # Default SCP port
 # SCP_USER = 'your_username'  # Replace with SCP username
 # SCP_PASSWORD = 'your_password'  # Replace with SCP password (or use SSH key authentication)
-# SCP_REMOTE_PATH = '/path/to/remote/directory'  # The directory we want to store the files
\ No newline at end of file
+# SCP_REMOTE_PATH = '/path/to/remote/directory'  # The directory we want to store the files
+
+# SFTP connection pool used by the SCP storage provider
+SCP_POOL_MAX_CONNECTIONS = int(os.environ.get('SCP_POOL_MAX_CONNECTIONS', 8))  # Per host/user
+SCP_POOL_IDLE_TIMEOUT = 300  # Seconds an idle connection is kept before being closed
+SCP_KEEPALIVE_INTERVAL = 30  # Seconds between SSH keepalive packets
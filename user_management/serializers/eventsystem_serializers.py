@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from core.models import EventSystemConfiguration, LogsPattern
+from file_manager.parsing.cache import invalidate_patterns
+from file_manager.services.profiling_services import PatternProfilingService
 
 
 class EventSystemConfigurationPatchSerializer(serializers.ModelSerializer):
@@ -24,10 +26,22 @@ class EventSystemConfigurationPatchSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"LogsPattern with id {value} does not exist.")
         return value
 
+    def validate(self, attrs):
+        logs_pattern_id = attrs.get('logs_pattern_id')
+        if self.instance is not None and logs_pattern_id is not None and logs_pattern_id != self.instance.logs_pattern_id:
+            try:
+                PatternProfilingService.check_assignable(self.instance.event_system, logs_pattern_id)
+            except ValueError as e:
+                raise serializers.ValidationError({'logs_pattern_id': str(e)})
+        return attrs
+
     def update(self, instance, validated_data):
         # Handle logs_pattern_id
+        changed_pattern_ids = ()
         if 'logs_pattern_id' in validated_data:
             logs_pattern_id = validated_data.pop('logs_pattern_id')
+            if logs_pattern_id != instance.logs_pattern_id:
+                changed_pattern_ids = (instance.logs_pattern_id, logs_pattern_id)
             instance.logs_pattern_id = logs_pattern_id
 
         # Update other fields and save
@@ -35,4 +49,5 @@ class EventSystemConfigurationPatchSerializer(serializers.ModelSerializer):
             setattr(instance, field, value)
 
         instance.save()
-        return instance
\ No newline at end of file
+        invalidate_patterns(*changed_pattern_ids)
+        return instance